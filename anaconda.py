@@ -307,6 +307,10 @@ if __name__ == "__main__":
         stdout_log.error("anaconda must be run as root.")
         sys.exit(1)
 
+    # Start a new profile of the installation.
+    from pyanaconda.core.profiling import reset_profile_records
+    reset_profile_records()
+
     # check if input kickstart should be saved
     if flags.nosave_input_ks:
         log.warning("Input kickstart will not be saved to the installed system due to the nosave option.")
@@ -909,9 +909,18 @@ class BootLoader(object):
             return
 
         self.write_config()
+        self.sync()
+        self.install()
+
+    def sync(self):
+        """Flush the written data to the target.
+
+        The stage2 file system is also synced explicitly, because some
+        file systems (XFS) keep the data in the journal where the boot
+        loader can't read them.
+        """
         os.sync()
         self.stage2_device.format.sync(root=util.getTargetPhysicalRoot())
-        self.install()
 
     def install(self, args=None):
         raise NotImplementedError()
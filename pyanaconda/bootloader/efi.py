@@ -119,8 +119,7 @@ class EFIBase(object):
             return
 
         try:
-            os.sync()
-            self.stage2_device.format.sync(root=util.getTargetPhysicalRoot()) # pylint: disable=no-member
+            self.sync()  # pylint: disable=no-member
             self.install()
         finally:
             self.write_config()  # pylint: disable=no-member
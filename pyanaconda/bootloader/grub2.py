@@ -17,6 +17,8 @@
 #
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
 from _ped import PARTITION_BIOS_GRUB
 
 from blivet.devicelibs import raid
@@ -32,6 +34,10 @@ log = get_module_logger(__name__)
 
 __all__ = ["GRUB2", "IPSeriesGRUB2"]
 
+# The maximal number of stage1 disks set up at once.
+MAX_STAGE1_SETUP_WORKERS = 8
+
+
 class SerialConsoleOptions(object):
     """The serial console options."""
 
@@ -76,6 +82,22 @@ def _parse_serial_opt(arg):
         pass
     return opts
 
+class _CallOnce(object):
+    """Call the function only once."""
+
+    def __init__(self, function):
+        self._function = function
+        self._called = False
+        self._lock = Lock()
+
+    def __call__(self):
+        with self._lock:
+            if self._called:
+                return
+            self._called = True
+
+        self._function()
+
 class GRUB2(BootLoader):
     """GRUBv2.
 
@@ -126,6 +148,12 @@ class GRUB2(BootLoader):
     # XXX we probably need special handling for raid stage1 w/ gpt disklabel
     #     since it's unlikely there'll be a bios boot partition on each disk
 
+    # The boot sectors of the redundant stage1 disks are written
+    # by this tool from the images installed in this platform
+    # directory by grub2-install.
+    stage1_setup_tool = "grub2-bios-setup"
+    stage1_setup_platform = "i386-pc"
+
     def __init__(self):
         super().__init__()
         self.encrypted_password = ""
@@ -402,29 +430,120 @@ class GRUB2(BootLoader):
     def update(self):
         self.install()
 
-    def install(self, args=None):
+    def _install_target(self, stage1dev, stage2dev, args):
+        """Install the boot loader to the given target with grub2-install."""
+        grub_args = args + ["--no-floppy", stage1dev.path]
+        if stage1dev == stage2dev:
+            # This is hopefully a temporary hack. GRUB2 currently refuses
+            # to install to a partition's boot block without --force.
+            grub_args.insert(0, '--force')
+        else:
+            if self.keep_mbr:
+                grub_args.insert(0, '--grub-setup=/bin/true')
+                log.info("bootloader.py: mbr update by grub2 disabled")
+            else:
+                log.info("bootloader.py: mbr will be updated for grub2")
+
+        rc = util.execWithRedirect("grub2-install", grub_args,
+                                   root=util.getSysroot(),
+                                   env_prune=['MALLOC_PERTURB_'])
+        if rc:
+            raise BootLoaderError("boot loader install failed")
+
+    def _setup_stage1(self, stage1dev):
+        """Write the boot sector of the stage1 disk from the installed images."""
+        log.info("bootloader.py: setting up stage1 on %s", stage1dev.path)
+        images_dir = "%s/%s" % (self.config_dir, self.stage1_setup_platform)
+        return util.execWithRedirect(self.stage1_setup_tool,
+                                     ["-d", images_dir, stage1dev.path],
+                                     root=util.getSysroot(),
+                                     env_prune=['MALLOC_PERTURB_'])
+
+    def _can_embed_core(self, stage1dev, stage2dev):
+        """Can core.img be embedded on the given stage1 disk?
+
+        Without a place to embed core.img, the boot sector points to the
+        blocks of core.img in /boot, so it has to be set up by grub2-install
+        with its own core.img.
+        """
+        disklabel = getattr(stage1dev, "format", None)
+        parted_disk = getattr(disklabel, "parted_disk", None)
+        if parted_disk is None:
+            return False
+
+        min_start = self._get_min_embedding_start(stage2dev)
+        biosboot = False
+        gap = True
+        for p in parted_disk.partitions:
+            if p.getFlag(PARTITION_BIOS_GRUB):
+                biosboot = True
+                break
+
+            if p.geometry.start * p.disk.device.sectorSize < min_start:
+                gap = False
+
+        if getattr(disklabel, "label_type", None) == "gpt":
+            return biosboot
+
+        return biosboot or gap
+
+    def install(self, args=None, concurrent_task=None):
+        """Install the boot loader to the install targets.
+
+        The first target is installed by grub2-install. The other targets
+        are disks with members of the /boot array. If core.img can be
+        embedded on all of them, they would get the same images, so only
+        their boot sectors are written, all at once. The search hints of
+        core.img refer to the /boot array, not to the first disk. Otherwise,
+        every target is installed by grub2-install, one after another.
+
+        :param args: additional arguments of grub2-install
+        :param concurrent_task: a function to run while the boot sectors
+                                of the other targets are written; it is run
+                                after the installation if they are installed
+                                by grub2-install
+        """
         if args is None:
             args = []
 
-        # XXX will installing to multiple drives work as expected with GRUBv2?
-        for (stage1dev, stage2dev) in self.install_targets:
-            grub_args = args + ["--no-floppy", stage1dev.path]
-            if stage1dev == stage2dev:
-                # This is hopefully a temporary hack. GRUB2 currently refuses
-                # to install to a partition's boot block without --force.
-                grub_args.insert(0, '--force')
-            else:
-                if self.keep_mbr:
-                    grub_args.insert(0, '--grub-setup=/bin/true')
-                    log.info("bootloader.py: mbr update by grub2 disabled")
-                else:
-                    log.info("bootloader.py: mbr will be updated for grub2")
-
-            rc = util.execWithRedirect("grub2-install", grub_args,
-                                       root=util.getSysroot(),
-                                       env_prune=['MALLOC_PERTURB_'])
-            if rc:
-                raise BootLoaderError("boot loader install failed")
+        targets = self.install_targets
+        stage1dev, stage2dev = targets[0]
+        self._install_target(stage1dev, stage2dev, args)
+
+        stage1_disks = [stage1dev for stage1dev, _stage2dev in targets[1:]]
+
+        if not stage1_disks or not self.stage1_setup_tool or self.keep_mbr \
+                or not all(self._can_embed_core(*target) for target in targets[1:]):
+            for stage1dev, stage2dev in targets[1:]:
+                self._install_target(stage1dev, stage2dev, args)
+
+            if concurrent_task:
+                concurrent_task()
+
+            return
+
+        # The boot sectors are written from the images in /boot, but
+        # nothing is written there, so the concurrent task can write
+        # the configuration in the meantime.
+        failed = []
+
+        with ThreadPoolExecutor(max_workers=min(len(stage1_disks), MAX_STAGE1_SETUP_WORKERS),
+                                thread_name_prefix="AnaGrub2Setup") as executor:
+            futures = [(disk, executor.submit(self._setup_stage1, disk)) for disk in stage1_disks]
+
+            try:
+                if concurrent_task:
+                    concurrent_task()
+            finally:
+                for disk, future in futures:
+                    rc = future.result()
+                    if rc:
+                        log.error("bootloader.py: stage1 setup on %s failed: status=%s",
+                                  disk.path, rc)
+                        failed.append(disk.path)
+
+        if failed:
+            raise BootLoaderError("boot loader install failed on %s" % ", ".join(failed))
 
     def write(self):
         """Write the bootloader configuration and install the bootloader."""
@@ -435,17 +554,30 @@ class GRUB2(BootLoader):
             self.update()
             return
 
+        # The configuration is written while the boot sectors of
+        # the redundant stage1 disks are written, or after all of them
+        # are installed. The installed boot loader and its configuration
+        # are synced together once the configuration is written.
+        write_config = _CallOnce(self.write_config)
+
         try:
             self.write_device_map()
-            self.stage2_device.format.sync(root=util.getTargetPhysicalRoot())
-            os.sync()
-            self.install()
-            os.sync()
-            self.stage2_device.format.sync(root=util.getTargetPhysicalRoot())
+            self.sync()
+            self.install(concurrent_task=write_config)
         finally:
-            self.write_config()
-            os.sync()
-            self.stage2_device.format.sync(root=util.getTargetPhysicalRoot())
+            write_config()
+            self.sync()
+
+    def _get_min_embedding_start(self, stage2dev):
+        """The minimal start of the first partition to embed core.img."""
+        base_gap_bytes = 32256       # 31.5KiB
+        advanced_gap_bytes = 524288  # 512KiB
+
+        # These are small enough to fit
+        if stage2dev.type == "partition":
+            return base_gap_bytes
+        else:
+            return advanced_gap_bytes
 
     def check(self):
         """When installing to the mbr of a disk grub2 needs enough space
@@ -455,19 +587,13 @@ class GRUB2(BootLoader):
         sure it starts >= 512K, otherwise return an error.
         """
         ret = True
-        base_gap_bytes = 32256       # 31.5KiB
-        advanced_gap_bytes = 524288  # 512KiB
         self.errors = []
         self.warnings = []
 
         if self.stage1_device == self.stage2_device:
             return ret
 
-        # These are small enough to fit
-        if self.stage2_device.type == "partition":
-            min_start = base_gap_bytes
-        else:
-            min_start = advanced_gap_bytes
+        min_start = self._get_min_embedding_start(self.stage2_device)
 
         if not self.stage1_disk:
             return False
@@ -547,18 +673,19 @@ class IPSeriesGRUB2(GRUB2):
 
     stage2_bootable = False
     terminal_type = "ofconsole"
+    stage1_setup_tool = None
 
     #
     # installation
     #
 
-    def install(self, args=None):
+    def install(self, args=None, concurrent_task=None):
         if self.keep_boot_order:
             log.info("leavebootorder passed as an option. Will not update the NVRAM boot list.")
         else:
             self.updateNVRAMBootList()
 
-        super().install(args=["--no-nvram"])
+        super().install(args=["--no-nvram"], concurrent_task=concurrent_task)
 
     # This will update the PowerPC's (ppc) bios boot devive order list
     def updateNVRAMBootList(self):
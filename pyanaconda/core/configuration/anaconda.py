@@ -55,6 +55,16 @@ class AnacondaSection(Section):
         """List of enabled kickstart modules."""
         return self._get_option("kickstart_modules").split()
 
+    @property
+    def profiling(self):
+        """Record the timing and the resource usage of the installation.
+
+        The installer will write a timeline and a trace of all recorded
+        tasks and programs to /tmp and /var/log/anaconda of the installed
+        system.
+        """
+        return self._get_option("profiling", bool)
+
 
 class AnacondaConfiguration(Configuration):
     """Representation of the Anaconda configuration."""
@@ -69,3 +69,94 @@ class PayloadSection(Section):
         are supported by the payload?
         """
         return self._get_option("check_supported_locales", bool)
+
+    @property
+    def pipelined_install(self):
+        """Download and install packages in batches.
+
+        The packages are split into dependency-ordered batches. The next
+        batch is downloaded while the previous one is installed, so the
+        download and the installation overlap and only two batches have
+        to fit in the download location at the same time.
+        """
+        return self._get_option("pipelined_install", bool)
+
+    @property
+    def pipelined_batch_size(self):
+        """Maximal download size of a batch of packages in MiB.
+
+        This option is used only for the pipelined installation.
+        """
+        return self._get_option("pipelined_batch_size", int)
+
+    @property
+    def package_cache(self):
+        """Location of the persistent package cache.
+
+        Downloaded packages are stored in this directory and reused by
+        the following installations, if their checksums match. The cache
+        can be on a local disk, in a bind-mounted directory or on an NFS
+        export specified as nfs://server:/path. It is disabled if empty.
+        """
+        return self._get_option("package_cache", str)
+
+    @property
+    def package_cache_size(self):
+        """Maximal size of the persistent package cache in MiB.
+
+        The least recently used packages are removed from the cache
+        when the size is exceeded.
+        """
+        return self._get_option("package_cache_size", int)
+
+    @property
+    def cache_repo_metadata(self):
+        """Keep the repository metadata cache between payload restarts.
+
+        The cached metadata of a repository are revalidated every time
+        they are loaded and reused only if the repomd.xml file of the
+        repository hasn't changed. Otherwise, the whole cache is removed
+        every time the installation source is changed.
+        """
+        return self._get_option("cache_repo_metadata", bool)
+
+    @property
+    def stream_tar_image(self):
+        """Extract tar-based live images while they are downloaded.
+
+        The downloaded archive is piped directly to tar, so it doesn't
+        have to be stored on the target system. This option has no effect
+        on images that are not tar archives or are not downloaded.
+        """
+        return self._get_option("stream_tar_image", bool)
+
+    @property
+    def ostree_local_repos(self):
+        """List of local OSTree repositories used as sources of objects.
+
+        The objects that are available in these repositories are not
+        downloaded from the remote repository. A repository can be a local
+        path, for example a repository on the installation media, or an
+        NFS export specified as nfs://server:/path.
+        """
+        return self._get_option("ostree_local_repos", str).split()
+
+    @property
+    def ostree_content_url(self):
+        """URL of a mirror of the OSTree objects.
+
+        If set, the objects are downloaded from this URL during the
+        installation, for example from a local HTTP cache. The metadata
+        are still downloaded from the URL of the remote repository.
+        """
+        return self._get_option("ostree_content_url", str)
+
+    @property
+    def ostree_static_deltas(self):
+        """Use static deltas to pull the OSTree commit.
+
+        If disabled, the objects of the commit are pulled one by one,
+        so only the objects missing in the local repositories have to
+        be downloaded from the remote repository.
+        """
+        return self._get_option("ostree_static_deltas", bool)
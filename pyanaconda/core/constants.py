@@ -99,7 +99,6 @@ GRAPHICAL_TARGET = 'graphical.target'
 
 # Network
 NETWORK_CONNECTION_TIMEOUT = 45  # in seconds
-NETWORK_CONNECTED_CHECK_INTERVAL = 0.1  # in seconds
 
 # DBus
 DEFAULT_DBUS_TIMEOUT = -1       # use default
@@ -115,7 +114,6 @@ THREAD_PAYLOAD = "AnaPayloadThread"
 THREAD_PAYLOAD_RESTART = "AnaPayloadRestartThread"
 THREAD_SYNC_TIME_BASENAME = "AnaSyncTime"
 THREAD_EXCEPTION_HANDLING_TEST = "AnaExceptionHandlingTest"
-THREAD_LIVE_PROGRESS = "AnaLiveProgressThread"
 THREAD_SOFTWARE_WATCHER = "AnaSoftwareWatcher"
 THREAD_CHECK_SOFTWARE = "AnaCheckSoftwareThread"
 THREAD_SOURCE_WATCHER = "AnaSourceWatcher"
@@ -230,7 +228,7 @@ NOTICEABLE_FREEZE = 0.1
 PW_ASCII_CHARS = string.digits + string.ascii_letters + string.punctuation + " "
 
 # Recognizing a tarfile
-TAR_SUFFIX = (".tar", ".tbz", ".tgz", ".txz", ".tar.bz2", "tar.gz", "tar.xz")
+TAR_SUFFIX = (".tar", ".tbz", ".tgz", ".txz", ".tar.bz2", ".tar.gz", ".tar.xz")
 
 # screenshots
 SCREENSHOTS_DIRECTORY = "/tmp/anaconda-screenshots"
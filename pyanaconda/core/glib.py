@@ -22,8 +22,11 @@
 #  Author(s):  Jiri Konecny <jkonecny@redhat.com>
 #
 
+import time
+
 import gi
 gi.require_version("GLib", "2.0")
+gi.require_version("Gio", "2.0")
 
 from gi.repository.GLib import markup_escape_text, format_size_full, \
                                timeout_add_seconds, timeout_add, idle_add, \
@@ -33,9 +36,11 @@ from gi.repository.GLib import markup_escape_text, format_size_full, \
                                MainLoop, MainContext, \
                                GError, Variant, VariantType, Bytes, \
                                IOCondition, IOChannel, SpawnFlags, \
-                               MAXUINT
+                               MAXUINT, PRIORITY_LOW, timeout_source_new
+
+from gi.repository.Gio import DBusSignalFlags
 
-__all__ = ["create_main_loop", "create_new_context",
+__all__ = ["create_main_loop", "create_new_context", "wait_for_signals",
            "markup_escape_text", "format_size_full",
            "timeout_add_seconds", "timeout_add", "idle_add",
            "io_add_watch", "child_watch_add",
@@ -43,7 +48,7 @@ __all__ = ["create_main_loop", "create_new_context",
            "spawn_close_pid", "spawn_async_with_pipes",
            "GError", "Variant", "VariantType", "Bytes",
            "IOCondition", "IOChannel", "SpawnFlags",
-           "MAXUINT"]
+           "MAXUINT", "PRIORITY_LOW"]
 
 
 def create_main_loop():
@@ -59,3 +64,55 @@ def create_new_context():
 
     :returns: GLib.MainContext."""
     return MainContext.new()
+
+
+def wait_for_signals(connection, signals, check, timeout):
+    """Wait until the check passes.
+
+    The check is evaluated again every time one of the DBus signals is
+    received. The signals are dispatched in a private main context of the
+    calling thread, so the wait doesn't depend on a running main loop.
+
+    :param connection: a DBus connection
+    :type connection: Gio.DBusConnection
+    :param signals: a list of (sender, interface name, signal name, object path),
+                    the None values match everything
+    :param check: a function that returns True if the wait is over
+    :param timeout: timeout in seconds
+    :return: the last result of the check
+    """
+    context = create_new_context()
+    context.push_thread_default()
+    subscriptions = []
+
+    try:
+        # Subscribe before the first check, so no change is missed.
+        for sender, interface_name, signal_name, object_path in signals:
+            subscriptions.append(connection.signal_subscribe(
+                sender, interface_name, signal_name, object_path, None,
+                DBusSignalFlags.NONE, lambda *args: None
+            ))
+
+        deadline = time.monotonic() + timeout
+        result = check()
+
+        while not result:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            # Wake up on a signal or on the timeout.
+            source = timeout_source_new(max(int(remaining * 1000), 1))
+            source.set_callback(lambda *args: False)
+            source.attach(context)
+            context.iteration(True)
+            source.destroy()
+
+            result = check()
+    finally:
+        for subscription in subscriptions:
+            connection.signal_unsubscribe(subscription)
+
+        context.pop_thread_default()
+
+    return result
@@ -0,0 +1,283 @@
+#
+# Timing and resource usage profile of the installation.
+#
+# Copyright (C) 2019  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import os
+import json
+import time
+import resource
+import threading
+from contextlib import contextmanager
+
+from pyanaconda.core.configuration.anaconda import conf
+
+from pyanaconda.anaconda_loggers import get_module_logger
+log = get_module_logger(__name__)
+
+__all__ = ["profile_task", "profile_program", "write_profile_report", "reset_profile_records",
+           "PROFILE_RECORDS_FILE", "PROFILE_TIMELINE_FILE", "PROFILE_TRACE_FILE",
+           "PROFILE_TASK", "PROFILE_DBUS_TASK", "PROFILE_PROGRAM"]
+
+# The records are appended to this file by all Anaconda processes
+# and removed at the start of every run.
+PROFILE_RECORDS_FILE = "/tmp/anaconda-profile.jsonl"
+
+# The reports generated from the records.
+PROFILE_TIMELINE_FILE = "anaconda-timeline.json"
+PROFILE_TRACE_FILE = "anaconda-trace.json"
+
+# Categories of the records.
+PROFILE_TASK = "task"
+PROFILE_DBUS_TASK = "dbus-task"
+PROFILE_PROGRAM = "program"
+
+# The size of the block reported by getrusage.
+RUSAGE_BLOCK_SIZE = 512
+
+_records_lock = threading.Lock()
+
+
+def _read_thread_io():
+    """Read the numbers of bytes read and written by the current thread.
+
+    :return: a tuple of read bytes and written bytes
+    """
+    values = {}
+
+    try:
+        with open("/proc/thread-self/io", "r") as f:
+            for line in f:
+                key, _sep, value = line.partition(":")
+                values[key.strip()] = int(value)
+    except (OSError, ValueError):
+        pass
+
+    return values.get("read_bytes", 0), values.get("write_bytes", 0)
+
+
+def _get_thread_usage():
+    """Get the resource usage of the current thread.
+
+    :return: a tuple of CPU time, peak RSS in KiB, read bytes and written bytes
+    """
+    usage = resource.getrusage(resource.RUSAGE_THREAD)
+    # The peak RSS is tracked only for the whole process.
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    read_bytes, write_bytes = _read_thread_io()
+    return usage.ru_utime + usage.ru_stime, max_rss, read_bytes, write_bytes
+
+
+def _get_children_usage():
+    """Get the resource usage of the terminated child processes.
+
+    :return: a tuple of CPU time, peak RSS in KiB, read bytes and written bytes
+    """
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return (usage.ru_utime + usage.ru_stime,
+            usage.ru_maxrss,
+            usage.ru_inblock * RUSAGE_BLOCK_SIZE,
+            usage.ru_oublock * RUSAGE_BLOCK_SIZE)
+
+
+def _open_private(path, flags=os.O_TRUNC):
+    """Open a file for writing that only the owner can read.
+
+    The recorded command lines can contain sensitive data.
+    """
+    return os.fdopen(os.open(path, os.O_WRONLY | os.O_CREAT | flags, 0o600), "w")
+
+
+def _store_record(record):
+    """Append the record to the file with records."""
+    try:
+        with _records_lock:
+            with _open_private(PROFILE_RECORDS_FILE, os.O_APPEND) as f:
+                f.write(json.dumps(record) + "\n")
+    except OSError as e:
+        log.debug("Failed to store the profile record: %s", e)
+
+
+def _store_usage(name, category, start, end, start_usage, end_usage):
+    """Store a record with the time and the resources used by the code."""
+    _store_record({
+        "name": name,
+        "category": category,
+        "pid": os.getpid(),
+        "thread": threading.current_thread().name,
+        "start": start,
+        "end": end,
+        "wall_time": end - start,
+        "cpu_time": end_usage[0] - start_usage[0],
+        "max_rss": end_usage[1],
+        "read_bytes": end_usage[2] - start_usage[2],
+        "write_bytes": end_usage[3] - start_usage[3],
+    })
+
+
+@contextmanager
+def profile_task(name, category=PROFILE_TASK):
+    """Record the time and the resources used by a task.
+
+    The task has to run in the current thread. The peak RSS is
+    the peak RSS of the whole process.
+
+    :param name: a name of the task
+    :param category: a category of the task
+    :return: a context manager
+    """
+    if not conf.anaconda.profiling:
+        yield
+        return
+
+    start = time.time()
+    start_usage = _get_thread_usage()
+
+    try:
+        yield
+    finally:
+        end_usage = _get_thread_usage()
+        end = time.time()
+        _store_usage(name, category, start, end, start_usage, end_usage)
+
+
+@contextmanager
+def profile_program(argv):
+    """Record the time and the resources used by an external program.
+
+    The resources are taken from the usage of all terminated child
+    processes, so they are not accurate if the programs overlap.
+    The peak RSS is the peak RSS of all terminated child processes.
+
+    :param argv: the command to run and arguments
+    :return: a context manager
+    """
+    if not conf.anaconda.profiling:
+        yield
+        return
+
+    start = time.time()
+    start_usage = _get_children_usage()
+
+    try:
+        yield
+    finally:
+        end_usage = _get_children_usage()
+        end = time.time()
+        _store_usage(" ".join(argv), PROFILE_PROGRAM, start, end, start_usage, end_usage)
+
+
+def reset_profile_records():
+    """Remove the profile records of a previous run."""
+    try:
+        with _records_lock:
+            os.remove(PROFILE_RECORDS_FILE)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        log.debug("Failed to remove the profile records: %s", e)
+
+
+def _load_records(path):
+    """Load the profile records."""
+    records = []
+
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # Skip an incomplete record.
+                continue
+
+    records.sort(key=lambda r: r["start"])
+    return records
+
+
+def _create_trace(records):
+    """Create the Chrome trace events from the profile records."""
+    events = []
+    threads = {}
+
+    for record in records:
+        key = (record["pid"], record["thread"])
+
+        if key not in threads:
+            threads[key] = len(threads) + 1
+            events.append({
+                "name": "thread_name",
+                "ph": "M",
+                "pid": record["pid"],
+                "tid": threads[key],
+                "args": {"name": record["thread"]},
+            })
+
+        events.append({
+            "name": record["name"],
+            "cat": record["category"],
+            "ph": "X",
+            "ts": int(record["start"] * 1000000),
+            "dur": int(record["wall_time"] * 1000000),
+            "pid": record["pid"],
+            "tid": threads[key],
+            "args": {
+                "cpu_time": record["cpu_time"],
+                "max_rss": record["max_rss"],
+                "read_bytes": record["read_bytes"],
+                "write_bytes": record["write_bytes"],
+            },
+        })
+
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def write_profile_report(directories):
+    """Write the timeline and the trace of the installation.
+
+    The timeline is a JSON file with all recorded tasks and programs
+    sorted by the start time. The trace is a file in the Chrome trace
+    event format.
+
+    :param directories: a list of paths to the output directories
+    """
+    if not os.path.exists(PROFILE_RECORDS_FILE):
+        return
+
+    try:
+        records = _load_records(PROFILE_RECORDS_FILE)
+    except OSError as e:
+        log.error("Failed to load the profile records: %s", e)
+        return
+
+    timeline = {"records": records}
+    trace = _create_trace(records)
+
+    for directory in directories:
+        try:
+            os.makedirs(directory, exist_ok=True)
+
+            with _open_private(os.path.join(directory, PROFILE_TIMELINE_FILE)) as f:
+                json.dump(timeline, f, indent=1)
+
+            with _open_private(os.path.join(directory, PROFILE_TRACE_FILE)) as f:
+                json.dump(trace, f)
+
+        except OSError as e:
+            log.error("Failed to write the profile report to %s: %s", directory, e)
+            continue
+
+        log.debug("The profile report was written to %s.", directory)
@@ -19,6 +19,7 @@
 #
 
 import glob
+import io
 import os
 import stat
 import os.path
@@ -37,6 +38,9 @@ import imp
 import types
 import inspect
 import functools
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 from requests_file import FileAdapter
@@ -45,6 +49,7 @@ from requests_ftp import FTPAdapter
 from pyanaconda.core.configuration.anaconda import conf
 from pyanaconda.flags import flags
 from pyanaconda.core.process_watchers import WatchProcesses
+from pyanaconda.core.profiling import profile_program
 from pyanaconda.core.constants import DRACUT_SHUTDOWN_EJECT, TRANSLATIONS_UPDATE_DIR, \
     IPMI_ABORTED, X_TIMEOUT, TAINT_HARDWARE_UNSUPPORTED, TAINT_SUPPORT_REMOVED, \
     WARNING_HARDWARE_UNSUPPORTED, WARNING_SUPPORT_REMOVED
@@ -63,6 +68,30 @@ from pykickstart.constants import KS_SCRIPT_ONERROR
 
 _child_env = {}
 
+# The prefix of the messages about programs run by the current thread.
+_program_log_context = threading.local()
+
+
+@contextmanager
+def program_log_prefix(prefix):
+    """Prefix the messages about programs run by the current thread.
+
+    The messages of programs run concurrently can be told apart.
+
+    :param prefix: a prefix of the messages, for example a kernel version
+    """
+    previous = getattr(_program_log_context, "prefix", "")
+    _program_log_context.prefix = "{}: ".format(prefix)
+
+    try:
+        yield
+    finally:
+        _program_log_context.prefix = previous
+
+
+def _get_program_log_prefix():
+    return getattr(_program_log_context, "prefix", "")
+
 
 def setenv(name, value):
     """ Set an environment variable to be used by child processes.
@@ -184,9 +213,10 @@ def startProgram(argv, root='/', stdin=None, stdout=subprocess.PIPE, stderr=subp
 
     with program_log_lock:
         if target_root != '/':
-            program_log.info("Running in chroot '%s'... %s", target_root, " ".join(argv))
+            program_log.info("%sRunning in chroot '%s'... %s", _get_program_log_prefix(),
+                             target_root, " ".join(argv))
         else:
-            program_log.info("Running... %s", " ".join(argv))
+            program_log.info("%sRunning... %s", _get_program_log_prefix(), " ".join(argv))
 
     env = augmentEnv()
     for var in env_prune:
@@ -287,10 +317,11 @@ def _run_program(argv, root='/', stdin=None, stdout=None, env_prune=None, log_ou
         else:
             stderr = subprocess.STDOUT
 
-        proc = startProgram(argv, root=root, stdin=stdin, stdout=subprocess.PIPE, stderr=stderr,
-                            env_prune=env_prune)
+        with profile_program(argv):
+            proc = startProgram(argv, root=root, stdin=stdin, stdout=subprocess.PIPE,
+                                stderr=stderr, env_prune=env_prune)
 
-        (output_string, err_string) = proc.communicate()
+            (output_string, err_string) = proc.communicate()
         if not binary_output:
             output_string = output_string.decode("utf-8")
             if output_string and output_string[-1] != "\n":
@@ -329,7 +360,7 @@ def _run_program(argv, root='/', stdin=None, stdout=None, env_prune=None, log_ou
         raise
 
     with program_log_lock:
-        program_log.debug("Return code: %d", proc.returncode)
+        program_log.debug("%sReturn code: %d", _get_program_log_prefix(), proc.returncode)
 
     return (proc.returncode, output_string)
 
@@ -397,6 +428,47 @@ def execWithCaptureBinary(command, argv, stdin=None, root='/', log_output=False,
                         filter_stderr=filter_stderr, binary_output=True)[1]
 
 
+def execWithCallback(command, argv, callback, stdin=None, root='/', env_prune=None):
+    """ Run an external program and pass the lines of its output to the callback
+        in real-time.
+
+        Both new lines and carriage returns are treated as line endings, so
+        the progress reported by the command on a single line is passed line
+        by line. The output is not logged, the callback should log it.
+
+        :param command: The command to run
+        :param argv: The argument list
+        :param callback: a function that accepts a line of the output
+        :param stdin: The file object to read stdin from.
+        :param root: The directory to chroot to before running command.
+        :param env_prune: environment variable to remove before execution
+        :return: The return code of the command
+    """
+    argv = [command] + argv
+
+    try:
+        with profile_program(argv):
+            proc = startProgram(argv, root=root, stdin=stdin, env_prune=env_prune)
+
+            try:
+                output = io.TextIOWrapper(proc.stdout, encoding="utf-8", errors="replace")
+                for line in output:
+                    callback(line.strip())
+            finally:
+                proc.stdout.close()
+                proc.wait()
+
+    except OSError as e:
+        with program_log_lock:
+            program_log.error("Error running %s: %s", argv[0], e.strerror)
+        raise
+
+    with program_log_lock:
+        program_log.debug("%sReturn code: %d", _get_program_log_prefix(), proc.returncode)
+
+    return proc.returncode
+
+
 def execReadlines(command, argv, stdin=None, root='/', env_prune=None, filter_stderr=False):
     """ Execute an external command and return the line output of the command
         in real-time.
@@ -937,6 +1009,95 @@ def chown_dir_tree(root, uid, gid, from_uid_only=None, from_gid_only=None):
                                                           from_gid_only))
 
 
+def _copy_metadata(src, dst, stats):
+    """Copy the owner, the permissions and the timestamps like cp -p."""
+    os.chown(dst, stats.st_uid, stats.st_gid, follow_symlinks=False)
+
+    if not stat.S_ISLNK(stats.st_mode):
+        os.chmod(dst, stat.S_IMODE(stats.st_mode))
+
+    os.utime(dst, ns=(stats.st_atime_ns, stats.st_mtime_ns), follow_symlinks=False)
+
+
+def copy_file(src, dst):
+    """
+    Copy a regular file with its metadata.
+
+    The data are copied in the kernel with copy_file_range if possible,
+    so file systems that support reflinks or server-side copies don't
+    have to move the data at all.
+
+    :param str src: path to the source file
+    :param str dst: path to the destination file
+    """
+    stats = os.stat(src)
+
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        copied = 0
+
+        if hasattr(os, "copy_file_range"):
+            try:
+                while copied < stats.st_size:
+                    count = os.copy_file_range(fsrc.fileno(), fdst.fileno(),
+                                               stats.st_size - copied)
+                    if count == 0:
+                        break
+                    copied += count
+            except OSError:
+                # Not supported between these file systems, start over.
+                copied = 0
+                fsrc.seek(0)
+                fdst.seek(0)
+                fdst.truncate()
+
+        if not copied:
+            shutil.copyfileobj(fsrc, fdst)
+
+    _copy_metadata(src, dst, stats)
+
+
+def copy_tree(src, dst, max_workers=4):
+    """
+    Copy a directory tree with its metadata like cp -r -p.
+
+    The directories and symlinks are created first, then the files are
+    copied concurrently. The destination directory is created if it
+    doesn't exist, otherwise the tree is merged into it.
+
+    :param str src: path to the source directory
+    :param str dst: path to the destination directory
+    :param int max_workers: maximal number of files copied at the same time
+    """
+    directories = []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = []
+
+        for (root, dir_items, file_items) in os.walk(src):
+            dst_root = os.path.join(dst, os.path.relpath(root, src))
+            os.makedirs(dst_root, exist_ok=True)
+            directories.append((root, dst_root))
+
+            for name in dir_items + file_items:
+                src_path = os.path.join(root, name)
+                dst_path = os.path.join(dst_root, name)
+
+                if os.path.islink(src_path):
+                    if os.path.lexists(dst_path):
+                        os.unlink(dst_path)
+                    os.symlink(os.readlink(src_path), dst_path)
+                    _copy_metadata(src_path, dst_path, os.lstat(src_path))
+                elif name in file_items and os.path.isfile(src_path):
+                    futures.append(executor.submit(copy_file, src_path, dst_path))
+
+        for future in futures:
+            future.result()
+
+    # Set the metadata of directories once their content is written.
+    for (src_dir, dst_dir) in reversed(directories):
+        _copy_metadata(src_dir, dst_dir, os.stat(src_dir))
+
+
 def get_kernel_taint(flag):
     """Get a value of a kernel taint.
 
@@ -17,13 +17,15 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 import os
+import threading
 from abc import ABC, abstractmethod
 
 import pydbus
 
 from pyanaconda.core.constants import ANACONDA_BUS_ADDR_FILE
 from pyanaconda.dbus.constants import DBUS_ANACONDA_SESSION_ADDRESS, DBUS_STARTER_ADDRESS
-from pyanaconda.dbus.observer import DBusObjectObserver, DBusCachedObserver
+from pyanaconda.dbus.observer import DBusObserver, DBusObjectObserver, DBusCachedObserver, \
+    PropertiesCache
 
 from pyanaconda.anaconda_loggers import get_module_logger
 log = get_module_logger(__name__)
@@ -40,12 +42,19 @@ class Connection(ABC):
     The property connection represents a connection to the bus. You can
     register a service name with register_service, or publish an object
     with publish_object and get a proxy of a remote object with get_proxy.
+
+    The proxies are cached, so the remote objects are introspected only
+    once. The cached proxies of a service are dropped when the service
+    disappears from the bus.
     """
 
     def __init__(self):
         self._connection = None
         self._service_registrations = []
         self._object_registrations = []
+        self._proxies = {}
+        self._proxies_observers = {}
+        self._proxies_lock = threading.Lock()
 
     @property
     def connection(self):
@@ -110,11 +119,66 @@ class Connection(ABC):
     def get_proxy(self, service_name, object_path):
         """Returns a proxy of a remote DBus object.
 
+        The proxy is created only once and then it is shared
+        until the service disappears from the bus.
+
         :param service_name: a DBus name of a service
         :param object_path: a DBus path an object
         :return: a proxy object
         """
-        return self.connection.get(service_name, object_path)
+        key = (service_name, object_path)
+
+        with self._proxies_lock:
+            proxy = self._proxies.get(key)
+
+        if proxy is not None:
+            return proxy
+
+        # Create the proxy outside of the lock. It introspects
+        # the remote object, so it can take a while.
+        proxy = self.connection.get(service_name, object_path)
+
+        with self._proxies_lock:
+            self._watch_proxies(service_name)
+            return self._proxies.setdefault(key, proxy)
+
+    def _watch_proxies(self, service_name):
+        """Watch the service of the cached proxies.
+
+        The lock of the proxies has to be acquired.
+
+        :param service_name: a DBus name of a service
+        """
+        if service_name in self._proxies_observers:
+            return
+
+        observer = DBusObserver(self, service_name)
+        observer.service_unavailable.connect(self._forget_proxies)
+        observer.connect_once_available()
+
+        self._proxies_observers[service_name] = observer
+
+    def _forget_proxies(self, observer):
+        """Drop the cached proxies of the unavailable service.
+
+        :param observer: an observer of the service
+        """
+        log.debug("Dropping cached proxies of %s.", observer.service_name)
+
+        with self._proxies_lock:
+            for key in list(self._proxies.keys()):
+                if key[0] == observer.service_name:
+                    del self._proxies[key]
+
+    def _clear_proxies(self):
+        """Drop all cached proxies and stop to watch their services."""
+        with self._proxies_lock:
+            observers = list(self._proxies_observers.values())
+            self._proxies_observers.clear()
+            self._proxies.clear()
+
+        for observer in observers:
+            observer.disconnect()
 
     def get_observer(self, service_name, object_path):
         """Returns an observer of a remote DBus object.
@@ -125,6 +189,28 @@ class Connection(ABC):
         """
         return DBusObjectObserver(self, service_name, object_path)
 
+    def get_properties_snapshot(self, service_name, object_path, interface_names):
+        """Returns a one-shot snapshot of properties of a remote DBus object.
+
+        All properties of an interface are fetched with one call
+        of the GetAll method, so it is cheaper than reading the
+        properties of the proxy one by one. The snapshot is never
+        updated, so get a new one every time the properties are
+        read. Use a cached observer to follow the changes.
+
+        :param service_name: a DBus name of a service
+        :param object_path: a DBus path an object
+        :param interface_names: a list of interface names
+        :return: an instance of PropertiesCache
+        """
+        proxy = self.get_proxy(service_name, object_path)
+        cache = PropertiesCache()
+
+        for interface_name in interface_names:
+            cache.update(proxy.GetAll(interface_name))
+
+        return cache
+
     def get_cached_observer(self, service_name, object_path, interface_names):
         """Returns a cached observer of a remote DBus object.
 
@@ -138,6 +224,7 @@ class Connection(ABC):
     def disconnect(self):
         """Disconnect from DBus."""
         log.debug("Disconnecting from the bus.")
+        self._clear_proxies()
 
         while self._object_registrations:
             registration = self._object_registrations.pop()
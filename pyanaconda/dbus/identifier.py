@@ -151,6 +151,9 @@ class DBusServiceIdentifier(DBusObjectIdentifier):
         if object_path is None and interface_names is None:
             return [self.interface_name]
 
+        if isinstance(object_path, DBusObjectIdentifier) and interface_names is None:
+            return [object_path.interface_name]
+
         return interface_names
 
     def get_proxy(self, object_path=None):
@@ -171,6 +174,23 @@ class DBusServiceIdentifier(DBusObjectIdentifier):
         object_path = self._choose_object_path(object_path)
         return self._message_bus.get_observer(self.service_name, object_path)
 
+    def get_properties_snapshot(self, object_path=None, interface_names=None):
+        """Returns a one-shot snapshot of properties of the DBus object.
+
+        The snapshot is never updated. Use a cached observer
+        to follow the changes.
+
+        :param object_path: a DBus path of an object or None
+        :param interface_names: a list of interface names or None
+        :return: an instance of PropertiesCache
+        """
+        interface_names = self._choose_interface_names(object_path, interface_names)
+        object_path = self._choose_object_path(object_path)
+
+        return self._message_bus.get_properties_snapshot(
+            self.service_name, object_path, interface_names
+        )
+
     def get_cached_observer(self, object_path=None, interface_names=None):
         """Returns a cached observer of the DBus object.
 
@@ -25,15 +25,16 @@
 #
 
 import os
-import time
 from subprocess import TimeoutExpired
 
 from pyanaconda.core.configuration.anaconda import conf
+from pyanaconda.core.glib import wait_for_signals
 from pyanaconda.core.util import startProgram
 from pyanaconda.core.constants import ANACONDA_BUS_ADDR_FILE, ANACONDA_CONFIG_TMP,\
     ANACONDA_BUS_CONF_FILE
 from pyanaconda.dbus import DBus
 from pyanaconda.dbus.constants import DBUS_ANACONDA_SESSION_ADDRESS, DBUS_FLAG_NONE
+from pyanaconda.modules.common.constants.interfaces import BOSS_ANACONDA
 from pyanaconda.modules.common.constants.services import BOSS
 
 from pyanaconda.anaconda_loggers import get_anaconda_root_logger
@@ -182,15 +183,19 @@ class AnacondaDBusLauncher(object):
         boss_proxy.StartModules()
 
     def _wait_for_modules(self, timeout):
-        """Wait for the modules to start."""
+        """Wait for the modules to start.
+
+        The availability of the modules is checked again every time
+        the boss emits the ModulesAvailable signal.
+        """
         boss = BOSS.get_proxy()
+        signals = [(BOSS.service_name, BOSS_ANACONDA.interface_name,
+                    "ModulesAvailable", BOSS.object_path)]
 
-        while not boss.AllModulesAvailable and timeout > 0:
-            log.info("Waiting %d sec for modules to be started.", timeout)
-            time.sleep(1)
-            timeout = timeout - 1
+        log.info("Waiting %d sec for modules to be started.", timeout)
 
-        if not timeout:
+        if not wait_for_signals(DBus.connection.con, signals,
+                                lambda: boss.AllModulesAvailable, timeout):
             log.error("Waiting for modules to be started timed out.")
             raise TimeoutError("Anaconda DBus modules failed to start on time.")
 
@@ -19,9 +19,10 @@
 import inspect
 from typing import get_type_hints
 
-from pyanaconda.dbus.typing import get_variant, Structure
+from pyanaconda.dbus.typing import get_dbus_type, Variant, Structure, List
 
-__all__ = ["get_structure", "apply_structure", "dbus_structure", "DBusStructureError"]
+__all__ = ["get_structure", "apply_structure", "get_structures", "apply_structures",
+           "dbus_structure", "DBusStructureError"]
 
 
 # Class attribute for DBus fields.
@@ -39,6 +40,9 @@ class DBusField(object):
     def __init__(self, name, type_hint, description=""):
         """Create a description of the field.
 
+        The DBus type of the field is resolved only once here,
+        so it doesn't have to be computed for every variant.
+
         :param name: a name of the field
         :param type_hint: a type hint
         :param description: a description
@@ -46,6 +50,8 @@ class DBusField(object):
         self._name = name
         self._type_hint = type_hint
         self._description = description
+        self._dbus_type = get_dbus_type(type_hint)
+        self._data_name = name.replace('-', '_')
 
     @property
     def name(self):
@@ -63,6 +69,14 @@ class DBusField(object):
         """
         return self._type_hint
 
+    @property
+    def dbus_type(self):
+        """DBus type of the field.
+
+        :return: a string with DBus representation
+        """
+        return self._dbus_type
+
     @property
     def description(self):
         """Description of the field.
@@ -77,7 +91,7 @@ class DBusField(object):
 
         :return: a data attribute name
         """
-        return self.name.replace('-', '_')
+        return self._data_name
 
     def set_data(self, obj, value):
         """Set the data attribute.
@@ -85,7 +99,7 @@ class DBusField(object):
         :param obj: a data object
         :param value: a value
         """
-        setattr(obj, self.data_name, value)
+        setattr(obj, self._data_name, value)
 
     def get_data(self, obj):
         """Get the data attribute.
@@ -93,7 +107,7 @@ class DBusField(object):
         :param obj: a data object
         :return: a value
         """
-        return getattr(obj, self.data_name)
+        return getattr(obj, self._data_name)
 
     def get_data_variant(self, obj):
         """Get a variant of the data attribute.
@@ -101,7 +115,7 @@ class DBusField(object):
         :param obj: a data object
         :return: a variant
         """
-        return get_variant(self.type_hint, self.get_data(obj))
+        return Variant(self._dbus_type, getattr(obj, self._data_name))
 
 
 def get_fields(obj):
@@ -126,13 +140,8 @@ def get_structure(obj) -> Structure:
     :param obj: a data object
     :return: a DBus structure
     """
-    structure = {}
     fields = get_fields(obj)
-
-    for name, field in fields.items():
-        structure[name] = field.get_data_variant(obj)
-
-    return structure
+    return {name: field.get_data_variant(obj) for name, field in fields.items()}
 
 
 def apply_structure(structure, obj):
@@ -157,6 +166,26 @@ def apply_structure(structure, obj):
     return obj
 
 
+def get_structures(objects) -> List[Structure]:
+    """Return a list of DBus structures.
+
+    :param objects: a list of data objects
+    :return: a list of DBus structures
+    """
+    return [get_structure(obj) for obj in objects]
+
+
+def apply_structures(structures, factory):
+    """Create data objects with data from DBus structures.
+
+    :param structures: a list of unpacked DBus structures
+    :param factory: a function that returns a new data object,
+                    usually a data class
+    :return: a list of data objects
+    """
+    return [apply_structure(structure, factory()) for structure in structures]
+
+
 def generate_fields(cls):
     """Generate DBus fields from properties of a class.
 
@@ -198,7 +227,10 @@ def generate_fields(cls):
             raise DBusStructureError("Field '{}' has unknown type.".format(name))
 
         # Create the field.
-        fields[name] = DBusField(name, type_hint)
+        try:
+            fields[name] = DBusField(name, type_hint)
+        except TypeError as e:
+            raise DBusStructureError("Field '{}' has unsupported type: {}".format(name, e))
 
     if not fields:
         raise DBusStructureError("No fields found.")
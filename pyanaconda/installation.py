@@ -34,6 +34,7 @@ from pyanaconda.progress import progress_message, progress_step, progress_comple
 from pyanaconda.users import Users
 from pyanaconda import flags
 from pyanaconda.core import util
+from pyanaconda.core.profiling import write_profile_report
 from pyanaconda import timezone
 from pyanaconda import network
 from pyanaconda import screen_access
@@ -48,6 +49,9 @@ from pykickstart.constants import SNAPSHOT_WHEN_POST_INSTALL
 from pyanaconda.anaconda_loggers import get_module_logger
 log = get_module_logger(__name__)
 
+# Maximal number of independent tasks of a task queue running at the same time.
+MAX_TASK_WORKERS = 4
+
 class WriteResolvConfTask(Task):
     """Custom task subclass for handling the resolv.conf copy task.
 
@@ -83,6 +87,16 @@ def _writeKS(ksdata):
     with util.open_with_perm(path, "w", 0o600) as f:
         f.write(str(ksdata))
 
+def _writeProfileReport():
+    directories = ["/tmp"]
+
+    # don't store the report to the installed system with other logs
+    # if this has been disabled by the nosave option
+    if not flags.flags.nosave_logs:
+        directories.append(util.getSysroot() + "/var/log/anaconda")
+
+    write_profile_report(directories)
+
 def doConfiguration(storage, payload, ksdata):
     """Configure the installed system."""
 
@@ -92,16 +106,28 @@ def doConfiguration(storage, payload, ksdata):
     configuration_queue.task_completed.connect(lambda x: progress_step(x.name))
 
     # schedule the execute methods of ksdata that require an installed system to be present
-    os_config = TaskQueue("Installed system configuration", N_("Configuring installed system"))
-    os_config.append(Task("Configure authselect", ksdata.authselect.execute, (storage, ksdata)))
-    os_config.append(Task("Configure SELinux", ksdata.selinux.execute, (storage, ksdata)))
-    os_config.append(Task("Configure first boot tasks", ksdata.firstboot.execute, (storage, ksdata)))
-    os_config.append(Task("Configure services", ksdata.services.execute, (storage, ksdata)))
-    os_config.append(Task("Configure keyboard", ksdata.keyboard.execute, (storage, ksdata)))
-    os_config.append(Task("Configure timezone", ksdata.timezone.execute, (storage, ksdata)))
-    os_config.append(Task("Configure language", ksdata.lang.execute, (storage, ksdata)))
-    os_config.append(Task("Configure firewall", ksdata.firewall.execute, (storage, ksdata)))
-    os_config.append(Task("Configure X", ksdata.xconfig.execute, (storage, ksdata)))
+    # - the tasks don't depend on each other, but the tasks that change the
+    #   same configuration in the target system can't run at the same time
+    os_config = TaskQueue("Installed system configuration", N_("Configuring installed system"),
+                          max_workers=MAX_TASK_WORKERS)
+    os_config.append(Task("Configure authselect", ksdata.authselect.execute, (storage, ksdata),
+                          requires=()))
+    os_config.append(Task("Configure SELinux", ksdata.selinux.execute, (storage, ksdata),
+                          requires=()))
+    os_config.append(Task("Configure first boot tasks", ksdata.firstboot.execute, (storage, ksdata),
+                          requires=(), resources=("systemd-units",)))
+    os_config.append(Task("Configure services", ksdata.services.execute, (storage, ksdata),
+                          requires=(), resources=("systemd-units",)))
+    os_config.append(Task("Configure keyboard", ksdata.keyboard.execute, (storage, ksdata),
+                          requires=(), resources=("localization",)))
+    os_config.append(Task("Configure timezone", ksdata.timezone.execute, (storage, ksdata),
+                          requires=()))
+    os_config.append(Task("Configure language", ksdata.lang.execute, (storage, ksdata),
+                          requires=(), resources=("localization",)))
+    os_config.append(Task("Configure firewall", ksdata.firewall.execute, (storage, ksdata),
+                          requires=(), resources=("systemd-units",)))
+    os_config.append(Task("Configure X", ksdata.xconfig.execute, (storage, ksdata),
+                          requires=(), resources=("systemd-units",)))
     configuration_queue.append(os_config)
 
     # schedule network configuration (if required)
@@ -209,6 +235,8 @@ def doConfiguration(storage, payload, ksdata):
                                                                    x.elapsed_time))
     # start the task queue
     configuration_queue.start()
+    # write the timeline of the installation
+    _writeProfileReport()
     # done
     progress_complete()
 
@@ -297,25 +325,29 @@ def doInstall(storage, payload, ksdata):
 
     # Do packaging.
 
+    # Check for other possibly needed additional packages.
+    # - the setup tasks don't depend on each other, so the realm discovery
+    #   can wait for the network while the other tasks are running
+    pre_install = TaskQueue("Pre install tasks", N_("Running pre-installation tasks"),
+                            max_workers=MAX_TASK_WORKERS)
     # Discover information about realms to join to determine the need for additional packages.
-    realm_discover = TaskQueue("Realm discover", N_("Discovering realm to join"))
+    # - a nested queue reports its own status message when it is started
+    realm_discover = TaskQueue("Realm discover", N_("Discovering realm to join"),
+                               requires=(), resources=("network",))
     realm_discover.append(Task("Discover realm to join", ksdata.realm.setup))
-    installation_queue.append(realm_discover)
-
-    # Check for other possibly needed additional packages.
-    pre_install = TaskQueue("Pre install tasks", N_("Running pre-installation tasks"))
-    pre_install.append(Task("Setup authselect", ksdata.authselect.setup))
-    pre_install.append(Task("Setup firewall", ksdata.firewall.setup))
-    pre_install.append(Task("Setup network", ksdata.network.setup))
+    pre_install.append(realm_discover)
+    pre_install.append(Task("Setup authselect", ksdata.authselect.setup, requires=()))
+    pre_install.append(Task("Setup firewall", ksdata.firewall.setup, requires=()))
+    pre_install.append(Task("Setup network", ksdata.network.setup, requires=()))
     # Setup timezone and add chrony as package if timezone was set in KS
     # and "-chrony" wasn't in packages section and/or --nontp wasn't set.
-    pre_install.append(Task("Setup timezone", ksdata.timezone.setup, (ksdata,)))
+    pre_install.append(Task("Setup timezone", ksdata.timezone.setup, (ksdata,), requires=()))
 
     # make name resolution work for rpm scripts in chroot
     if conf.system.provides_resolver_config:
         # we use a custom Task subclass as the sysroot path has to be resolved
         # only when the task is actually started, not at task creation time
-        pre_install.append(WriteResolvConfTask("Copy /resolv.conf to sysroot"))
+        pre_install.append(WriteResolvConfTask("Copy /resolv.conf to sysroot", requires=()))
 
     def run_pre_install():
         """This means to gather what additional packages (if any) are needed & executing payload.preInstall()."""
@@ -335,6 +367,7 @@ def doInstall(storage, payload, ksdata):
         payload.requirements.add_packages(payload.langpacks(), reason="langpacks", strong=False)
         payload.preInstall()
 
+    # the task has no declared dependencies, so it waits for all the tasks above
     pre_install.append(Task("Find additional packages & run preInstall()", run_pre_install))
     installation_queue.append(pre_install)
 
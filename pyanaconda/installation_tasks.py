@@ -17,22 +17,31 @@
 # License and may only be used or replicated with the express permission of
 # Red Hat, Inc.
 #
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from threading import RLock
 from pyanaconda.core.signal import Signal
+from pyanaconda.core.profiling import profile_task
 from pyanaconda.core.util import synchronized
 import time
 
 from pyanaconda.anaconda_loggers import get_module_logger
 log = get_module_logger(__name__)
 
+# Tasks of a concurrent task queue run in different threads, but the handlers
+# connected to the started/completed signals (progress reporting, logging with
+# counters) expect to be called one at a time.
+_signal_lock = RLock()
+
 class BaseTask(object):
     """A base class for Task and TaskQueue.
 
     It holds shared methods, properties and signals.
     """
 
-    def __init__(self, name):
+    def __init__(self, name, requires=None, resources=None):
         self._name = name
+        self._requires = tuple(requires) if requires is not None else None
+        self._resources = frozenset(resources or ())
         self._done = False
         self._running = False
         self._lock = RLock()
@@ -51,6 +60,32 @@ class BaseTask(object):
         """
         return self._name
 
+    @property
+    def requires(self):
+        """Names of items of the parent queue this item depends on.
+
+        The dependencies are used only by task queues that run their items
+        concurrently. None means that the dependencies were not declared and
+        the item has to wait for all items that precede it in the queue and
+        all items that follow it have to wait for this item.
+
+        :returns: names of the required items or None
+        :rtype: tuple of str or None
+        """
+        return self._requires
+
+    @property
+    def resources(self):
+        """Resources used by the item.
+
+        Items that share a resource (for example "sysroot-rpmdb" or "network")
+        never run at the same time.
+
+        :returns: resource tags
+        :rtype: frozenset of str
+        """
+        return self._resources
+
     @property
     @synchronized
     def running(self):
@@ -97,11 +132,18 @@ class TaskQueue(BaseTask):
     """TaskQueue represents a queue of TaskQueues or Tasks.
 
     TaskQueues and Tasks can be mixed in a single TaskQueue.
+
+    By default the items of the queue are processed one by one in order.
+    If max_workers is bigger than one, items that declared their dependencies
+    are started as soon as the required items are done and no running item
+    uses the same resources. Items that didn't declare their dependencies
+    still run strictly in order.
     """
 
-    def __init__(self, name, status_message=None):
-        super().__init__(name=name)
+    def __init__(self, name, status_message=None, max_workers=1, requires=None, resources=None):
+        super().__init__(name=name, requires=requires, resources=resources)
         self._status_message = status_message
+        self._max_workers = max_workers
         self._current_task_number = None
         self._current_queue_number = None
         # the list backing this TaskQueue instance
@@ -140,6 +182,15 @@ class TaskQueue(BaseTask):
         """
         return self._status_message
 
+    @property
+    def max_workers(self):
+        """Maximal number of items of this queue running at the same time.
+
+        :returns: number of workers
+        :rtype: int
+        """
+        return self._max_workers
+
     @property
     @synchronized
     def queue_count(self):
@@ -295,13 +346,18 @@ class TaskQueue(BaseTask):
                     log.warning("Attempting to start an empty task queue (%s).", self.name)
 
         if do_start:
-            # go over all task groups and their tasks in order
-            self.started.emit(self)
+            with _signal_lock:
+                self.started.emit(self)
             if len(self) == 0:
                 log.warning("The task group %s is empty.", self.name)
-            for item in self:
-                # start the item (TaskQueue/Task)
-                item.start()
+
+            if self.max_workers > 1 and len(self) > 1:
+                self._start_concurrently(list(self))
+            else:
+                # go over all task groups and their tasks in order
+                for item in self:
+                    # start the item (TaskQueue/Task)
+                    item.start()
 
             # we are done, set the task queue state accordingly
             with self._lock:
@@ -312,7 +368,99 @@ class TaskQueue(BaseTask):
                 self._current_queue_number = None
 
             # trigger the "completed" signals
-            self.completed.emit(self)
+            with _signal_lock:
+                self.completed.emit(self)
+
+    def _get_dependencies(self, items):
+        """Get indexes of items each of the given items depends on.
+
+        Only dependencies on the preceding items are possible, so the
+        resulting graph never contains a cycle.
+
+        :param items: a list of items of this queue
+        :return: a list of sets of indexes
+        """
+        dependencies = []
+        barrier = None
+
+        for index, item in enumerate(items):
+            if item.requires is None:
+                # Preserve the order of items without declared dependencies.
+                dependencies.append(set(range(index)))
+                barrier = index
+                continue
+
+            required = set()
+
+            if barrier is not None:
+                required.add(barrier)
+
+            for name in item.requires:
+                preceding = [i for i in range(index) if items[i].name == name]
+
+                if not preceding:
+                    log.error("Task %s requires unknown task %s.", item.name, name)
+                    required.update(range(index))
+                    continue
+
+                required.add(preceding[-1])
+
+            dependencies.append(required)
+
+        return dependencies
+
+    def _start_concurrently(self, items):
+        """Start the given items on a thread pool.
+
+        The items are started in order as soon as their dependencies are
+        done and their resources are free. If an item fails, no other items
+        are started and the error is raised once the running items finish.
+
+        :param items: a list of items of this queue
+        """
+        dependencies = self._get_dependencies(items)
+        pending = list(range(len(items)))
+        finished = set()
+        running = {}
+        error = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers,
+                                thread_name_prefix="AnaTaskWorker") as executor:
+            while pending or running:
+                used_resources = set()
+
+                for index in running.values():
+                    used_resources.update(items[index].resources)
+
+                for index in list(pending):
+                    if error or len(running) >= self.max_workers:
+                        break
+
+                    if not dependencies[index] <= finished:
+                        continue
+
+                    if items[index].resources & used_resources:
+                        continue
+
+                    pending.remove(index)
+                    used_resources.update(items[index].resources)
+                    running[executor.submit(items[index].start)] = index
+
+                if not running:
+                    break
+
+                done, _not_done = wait(running, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    index = running.pop(future)
+                    finished.add(index)
+
+                    if future.exception() and not error:
+                        log.error("Task %s of queue %s failed.", items[index].name, self.name)
+                        error = future.exception()
+
+        if error:
+            raise error
 
     # implement the Python list "interface" and make sure parent is always
     # set to a correct value
@@ -382,10 +530,14 @@ class Task(BaseTask):
     only once, further attempts will result in an error being logged.
     If you want to run a task multiple times, just schedule multiple
     Task instances to run.
+
+    The requires and resources options are used to schedule the task in
+    a task queue that runs its items concurrently.
     """
 
-    def __init__(self, name, task=None, task_args=None, task_kwargs=None):
-        super().__init__(name=name)
+    def __init__(self, name, task=None, task_args=None, task_kwargs=None,
+                 requires=None, resources=None):
+        super().__init__(name=name, requires=requires, resources=resources)
         self._task = task
         if task_args is None:
             task_args = []
@@ -467,11 +619,14 @@ class Task(BaseTask):
 
         if do_start:
             # trigger the "started" signal
-            self.started.emit(self)
+            with _signal_lock:
+                self.started.emit(self)
             # run the task
-            self.run_task()
+            with profile_task(self.name):
+                self.run_task()
             # trigger the "completed" signal
-            self.completed.emit(self)
+            with _signal_lock:
+                self.completed.emit(self)
             # the task should be done, set the task state accordingly
             with self._lock:
                 self._running = False
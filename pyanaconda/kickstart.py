@@ -509,13 +509,15 @@ class Firstboot(RemovedCommand):
 
 class Group(COMMANDS.Group):
     def execute(self, storage, ksdata, users):
+        groups = []
+
         for grp in self.groupList:
             kwargs = grp.__dict__
             kwargs.update({"root": util.getSysroot()})
-            try:
-                users.createGroup(grp.name, **kwargs)
-            except ValueError as e:
-                group_log.warning(str(e))
+            groups.append((grp.name, kwargs))
+
+        for e in users.createGroups(groups, util.getSysroot()):
+            group_log.warning(str(e))
 
 class Iscsi(COMMANDS.Iscsi):
     def parse(self, args):
@@ -899,6 +901,7 @@ class Timezone(RemovedCommand):
 
 class User(COMMANDS.User):
     def execute(self, storage, ksdata, users):
+        user_list = []
 
         for usr in self.userList:
             kwargs = usr.__dict__
@@ -909,10 +912,11 @@ class User(COMMANDS.User):
             # empty password.
             if ksdata.user.seen and kwargs.get("password", "") == "":
                 kwargs["password"] = None
-            try:
-                users.createUser(usr.name, **kwargs)
-            except ValueError as e:
-                user_log.warning(str(e))
+
+            user_list.append((usr.name, kwargs))
+
+        for e in users.createUsers(user_list, util.getSysroot()):
+            user_log.warning(str(e))
 
 class VolGroup(COMMANDS.VolGroup):
     pass
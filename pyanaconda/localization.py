@@ -50,6 +50,42 @@ class InvalidLocaleSpec(LocalizationConfigError):
 
     pass
 
+# (langtable function name, arguments) -> result
+_langtable_results = {}
+
+def _query_langtable(function, *args, **kwargs):
+    """
+    Call the langtable function and remember the result.
+
+    The queries are repeated many times for the same locales when the
+    language and locale lists are populated, and the data of langtable
+    don't change at runtime. The lists are returned as new lists, so
+    the callers can modify them.
+
+    :param function: a langtable function
+    :param args: positional arguments of the function
+    :param kwargs: keyword arguments of the function
+    :return: a result of the function
+
+    """
+
+    key = (function.__name__, args, tuple(sorted(kwargs.items())))
+
+    try:
+        result = _langtable_results[key]
+    except KeyError:
+        result = function(*args, **kwargs)
+
+        if isinstance(result, list):
+            result = tuple(result)
+
+        _langtable_results[key] = result
+
+    if isinstance(result, tuple):
+        return list(result)
+
+    return result
+
 def parse_langcode(langcode):
     """
     For a given langcode (e.g. 'SR_RS.UTF-8@latin') returns a dictionary
@@ -295,10 +331,11 @@ def get_english_name(locale):
     if "language" not in parts:
         raise InvalidLocaleSpec("'%s' is not a valid locale" % locale)
 
-    name = langtable.language_name(languageId=parts["language"],
-                                   territoryId=parts.get("territory", ""),
-                                   scriptId=parts.get("script", ""),
-                                   languageIdQuery="en")
+    name = _query_langtable(langtable.language_name,
+                            languageId=parts["language"],
+                            territoryId=parts.get("territory", ""),
+                            scriptId=parts.get("script", ""),
+                            languageIdQuery="en")
 
     return upcase_first_letter(name)
 
@@ -318,12 +355,13 @@ def get_native_name(locale):
     if "language" not in parts:
         raise InvalidLocaleSpec("'%s' is not a valid locale" % locale)
 
-    name = langtable.language_name(languageId=parts["language"],
-                                   territoryId=parts.get("territory", ""),
-                                   scriptId=parts.get("script", ""),
-                                   languageIdQuery=parts["language"],
-                                   territoryIdQuery=parts.get("territory", ""),
-                                   scriptIdQuery=parts.get("script", ""))
+    name = _query_langtable(langtable.language_name,
+                            languageId=parts["language"],
+                            territoryId=parts.get("territory", ""),
+                            scriptId=parts.get("script", ""),
+                            languageIdQuery=parts["language"],
+                            territoryIdQuery=parts.get("territory", ""),
+                            scriptIdQuery=parts.get("script", ""))
 
     return upcase_first_letter(name)
 
@@ -375,9 +413,10 @@ def get_language_locales(lang):
     if "language" not in parts:
         raise InvalidLocaleSpec("'%s' is not a valid language" % lang)
 
-    return langtable.list_locales(languageId=parts["language"],
-                                  territoryId=parts.get("territory", ""),
-                                  scriptId=parts.get("script", ""))
+    return _query_langtable(langtable.list_locales,
+                            languageId=parts["language"],
+                            territoryId=parts.get("territory", ""),
+                            scriptId=parts.get("script", ""))
 
 def get_territory_locales(territory):
     """
@@ -392,7 +431,7 @@ def get_territory_locales(territory):
 
     """
 
-    return langtable.list_locales(territoryId=territory)
+    return _query_langtable(langtable.list_locales, territoryId=territory)
 
 def get_locale_keyboards(locale):
     """
@@ -410,9 +449,10 @@ def get_locale_keyboards(locale):
     if "language" not in parts:
         raise InvalidLocaleSpec("'%s' is not a valid locale" % locale)
 
-    return langtable.list_keyboards(languageId=parts["language"],
-                                    territoryId=parts.get("territory", ""),
-                                    scriptId=parts.get("script", ""))
+    return _query_langtable(langtable.list_keyboards,
+                            languageId=parts["language"],
+                            territoryId=parts.get("territory", ""),
+                            scriptId=parts.get("script", ""))
 
 def get_locale_timezones(locale):
     """
@@ -430,9 +470,10 @@ def get_locale_timezones(locale):
     if "language" not in parts:
         raise InvalidLocaleSpec("'%s' is not a valid locale" % locale)
 
-    return langtable.list_timezones(languageId=parts["language"],
-                                    territoryId=parts.get("territory", ""),
-                                    scriptId=parts.get("script", ""))
+    return _query_langtable(langtable.list_timezones,
+                            languageId=parts["language"],
+                            territoryId=parts.get("territory", ""),
+                            scriptId=parts.get("script", ""))
 
 def get_locale_console_fonts(locale):
     """
@@ -449,9 +490,10 @@ def get_locale_console_fonts(locale):
     if "language" not in parts:
         raise InvalidLocaleSpec("'%s' is not a valid locale" % locale)
 
-    return langtable.list_consolefonts(languageId=parts["language"],
-                                       territoryId=parts.get("territory", ""),
-                                       scriptId=parts.get("script", ""))
+    return _query_langtable(langtable.list_consolefonts,
+                            languageId=parts["language"],
+                            territoryId=parts.get("territory", ""),
+                            scriptId=parts.get("script", ""))
 
 def get_locale_scripts(locale):
     """
@@ -469,9 +511,10 @@ def get_locale_scripts(locale):
     if "language" not in parts:
         raise InvalidLocaleSpec("'%s' is not a valid locale" % locale)
 
-    return langtable.list_scripts(languageId=parts["language"],
-                                  territoryId=parts.get("territory", ""),
-                                  scriptId=parts.get("script", ""))
+    return _query_langtable(langtable.list_scripts,
+                            languageId=parts["language"],
+                            territoryId=parts.get("territory", ""),
+                            scriptId=parts.get("script", ""))
 
 def get_xlated_timezone(tz_spec_part):
     """
@@ -490,9 +533,10 @@ def get_xlated_timezone(tz_spec_part):
     if "language" not in parts:
         raise InvalidLocaleSpec("'%s' is not a valid locale" % locale)
 
-    xlated = langtable.timezone_name(tz_spec_part, languageIdQuery=parts["language"],
-                                     territoryIdQuery=parts.get("territory", ""),
-                                     scriptIdQuery=parts.get("script", ""))
+    xlated = _query_langtable(langtable.timezone_name, tz_spec_part,
+                              languageIdQuery=parts["language"],
+                              territoryIdQuery=parts.get("territory", ""),
+                              scriptIdQuery=parts.get("script", ""))
     return xlated
 
 def get_firmware_language(text_mode=False):
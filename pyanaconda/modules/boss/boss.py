@@ -88,6 +88,11 @@ class Boss(MainModule):
         self._module_manager.stop_modules()
         super().stop()
 
+    @property
+    def modules_available(self):
+        """Signal that emits when all modules are available."""
+        return self._module_manager.modules_available
+
     @property
     def all_modules_available(self):
         """Are all modules available?
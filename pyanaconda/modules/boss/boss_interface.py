@@ -18,7 +18,7 @@
 # Red Hat, Inc.
 #
 
-from pyanaconda.dbus.interface import dbus_interface
+from pyanaconda.dbus.interface import dbus_interface, dbus_signal
 from pyanaconda.modules.common.constants.interfaces import BOSS_ANACONDA
 from pyanaconda.modules.common.constants.services import BOSS
 from pyanaconda.dbus.template import InterfaceTemplate
@@ -48,6 +48,10 @@ class AnacondaBossInterface(BossInterface):
     Used for synchronization with anaconda during transition.
     """
 
+    def connect_signals(self):
+        super().connect_signals()
+        self.implementation.modules_available.connect(self.ModulesAvailable)
+
     def StartModules(self):
         """Start the kickstart modules."""
         self.implementation.start_modules()
@@ -57,6 +61,11 @@ class AnacondaBossInterface(BossInterface):
         """Returns true if all modules are available."""
         return self.implementation.all_modules_available
 
+    @dbus_signal
+    def ModulesAvailable(self):
+        """Signal that all modules are available."""
+        pass
+
     @property
     def UnprocessedKickstart(self) -> Str:
         """Returns kickstart containing parts that are not handled by any module."""
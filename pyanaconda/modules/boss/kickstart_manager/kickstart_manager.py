@@ -16,6 +16,8 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
+from concurrent.futures import ThreadPoolExecutor
+
 from pyanaconda.modules.common.errors.kickstart import SplitKickstartSectionParsingError, \
     SplitKickstartMissingIncludeError
 from pyanaconda.modules.boss.kickstart_manager.parser import SplitKickstartParser,\
@@ -28,6 +30,9 @@ log = get_module_logger(__name__)
 
 __all__ = ['KickstartManager']
 
+# The maximal number of modules that read the kickstart at the same time.
+MAX_DISTRIBUTE_WORKERS = 16
+
 
 class KickstartManager(object):
     """Distributes kickstart to modules and collects it back."""
@@ -36,6 +41,7 @@ class KickstartManager(object):
         self._kickstart_path = None
         self._elements = None
         self._module_observers = []
+        self._module_kickstart_specifications = {}
 
     @property
     def module_observers(self):
@@ -50,6 +56,7 @@ class KickstartManager(object):
         :type modules: list(DBusObjectObserver)
         """
         self._module_observers = modules
+        self._module_kickstart_specifications = {}
 
     @property
     def elements(self):
@@ -75,14 +82,39 @@ class KickstartManager(object):
             raise SplitKickstartMissingIncludeError(e)
         self._elements = result
 
+    def _get_kickstart_specification(self, observer):
+        """Get the kickstart commands, sections and addons of a module.
+
+        The specification of a module doesn't change, so it is
+        read from the module only once.
+
+        :param observer: an observer of the module
+        :return: a tuple of commands, sections and addons
+        """
+        specification = self._module_kickstart_specifications.get(observer.service_name)
+
+        if specification is None:
+            specification = (observer.proxy.KickstartCommands,
+                             observer.proxy.KickstartSections,
+                             observer.proxy.KickstartAddons)
+            self._module_kickstart_specifications[observer.service_name] = specification
+
+        return specification
+
     def distribute(self):
-        """Distribute split kickstart to modules synchronously.
+        """Distribute split kickstart to modules.
+
+        The kickstart is split for the modules one by one, so every
+        element is processed by the first module that handles it. Then
+        the modules read their kickstarts at the same time and the method
+        waits for all of them.
 
         :returns: list of (Line number, Message) errors reported by modules when
                   distributing kickstart
         :rtype: list((int, str))
         """
         errors = []
+        requests = []
 
         for observer in self._module_observers:
 
@@ -90,9 +122,7 @@ class KickstartManager(object):
                 log.warning("distribute kickstart: module %s not available", observer.service_name)
                 continue
 
-            commands = observer.proxy.KickstartCommands
-            sections = observer.proxy.KickstartSections
-            addons = observer.proxy.KickstartAddons
+            commands, sections, addons = self._get_kickstart_specification(observer)
             log.info("distribute kickstart: %s handles commands %s sections %s addons %s",
                      observer.service_name, commands, sections, addons)
 
@@ -105,7 +135,18 @@ class KickstartManager(object):
                 log.info("distribute kickstart: there are no data for %s", observer.service_name)
                 continue
 
-            result = observer.proxy.ReadKickstart(kickstart)
+            requests.append((observer, elements, kickstart))
+
+        if not requests:
+            return errors
+
+        with ThreadPoolExecutor(max_workers=min(len(requests), MAX_DISTRIBUTE_WORKERS),
+                                thread_name_prefix="AnaKickstartWorker") as executor:
+            futures = [executor.submit(observer.proxy.ReadKickstart, kickstart)
+                       for observer, _elements, kickstart in requests]
+
+        for (observer, elements, _kickstart), future in zip(requests, futures):
+            result = future.result()
 
             if not result["success"]:
                 line_references = self._elements.get_references_from_elements(elements)
@@ -16,6 +16,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
+from pyanaconda.core.signal import Signal
 from pyanaconda.dbus import DBus
 from pyanaconda.dbus.constants import DBUS_START_REPLY_SUCCESS, DBUS_FLAG_NONE
 from pyanaconda.dbus.namespace import get_dbus_name, get_namespace_from_name, get_dbus_path
@@ -30,12 +31,18 @@ class ModuleManager(object):
 
     def __init__(self):
         self._module_observers = []
+        self._modules_available = Signal()
 
     @property
     def module_observers(self):
         """Return the modules observers."""
         return self._module_observers
 
+    @property
+    def modules_available(self):
+        """Signal that emits when all modules are available."""
+        return self._modules_available
+
     def add_module(self, service_name):
         """Add a modules with the given service name."""
         # Get the object path.
@@ -92,6 +99,10 @@ class ModuleManager(object):
         log.debug("%s is available", observer)
         observer.proxy.Ping()
 
+        if self.check_modules_availability():
+            log.info("All modules are available now.")
+            self._modules_available.emit()
+
     def _process_module_is_unavailable(self, observer):
         """Process the service_unavailable signal."""
         log.debug("%s is unavailable", observer)
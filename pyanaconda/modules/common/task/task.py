@@ -24,6 +24,7 @@ import traceback
 from abc import abstractmethod
 
 from pyanaconda.core.constants import THREAD_DBUS_TASK
+from pyanaconda.core.profiling import profile_task, PROFILE_DBUS_TASK
 from pyanaconda.modules.common.task.cancellable import Cancellable
 from pyanaconda.modules.common.task.progress import ProgressReporter
 from pyanaconda.modules.common.task.result import ResultProvider
@@ -86,7 +87,10 @@ class Task(AbstractTask):
     def _task_run_callback(self):
         """Report the first step and run the task."""
         self.report_progress(self.name, step_number=1)
-        self._set_result(self.run())
+
+        with profile_task(self.name, PROFILE_DBUS_TASK):
+            self._set_result(self.run())
+
         self._task_succeeded_callback()
 
     def _task_succeeded_callback(self):
@@ -19,6 +19,8 @@
 #
 
 import os
+import copy
+from threading import RLock
 
 # TODO move to anaconda.core
 from pyanaconda.simpleconfig import SimpleConfigFile
@@ -36,6 +38,10 @@ log = get_module_logger(__name__)
 
 IFCFG_DIR = "/etc/sysconfig/network-scripts"
 
+# Settings used to look up ifcfg files in the index.
+IFCFG_INDEXED_KEYS = ("DEVICE", "HWADDR", "UUID", "ESSID", "NAME",
+                      "MASTER", "TEAM_MASTER", "BRIDGE")
+
 
 class IfcfgFile(SimpleConfigFile):
     """Stores settings of ifcfg configuration file."""
@@ -77,6 +83,7 @@ class IfcfgFile(SimpleConfigFile):
             # temporary file for new configuration
             super().write(filename, use_tmp=use_tmp)
             self._dirty = False
+            invalidate_ifcfg_index(filename or self.path)
 
     def set(self, *args):
         """Set values of given settings of the ifcfg file.
@@ -123,6 +130,212 @@ def _ifcfg_files(directory):
     return rv
 
 
+def _ifcfg_file_matches(ifcfg, values):
+    """Does the ifcfg file have the required values of settings?"""
+    for key, value in values:
+        if callable(value):
+            if not value(ifcfg.get(key)):
+                return False
+        else:
+            if ifcfg.get(key) != value:
+                return False
+    return True
+
+
+class IfcfgIndex(object):
+    """Index of ifcfg files in a directory.
+
+    The ifcfg files are parsed only when they are added or modified.
+    Before each look up, the index is checked against the modification
+    times of the directory and of the files, so it is up to date also
+    with the files written by other processes (NetworkManager, other
+    Anaconda modules).
+    """
+
+    def __init__(self, directory):
+        """Create the index.
+
+        :param directory: path to the directory with ifcfg files
+        :type directory: str
+        """
+        self._directory = directory
+        self._lock = RLock()
+        self._directory_stamp = None
+        # Paths of the ifcfg files in the order of the directory listing.
+        self._paths = []
+        # Parsed ifcfg files and their stamps.
+        self._files = {}
+        self._stamps = {}
+        # Paths of the files indexed by settings keys and values.
+        self._index = {}
+
+    @property
+    def directory(self):
+        """The path to the indexed directory."""
+        return self._directory
+
+    @staticmethod
+    def _get_stamp(path):
+        """Get a stamp of the file that changes when the file is modified."""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def invalidate(self, path=None):
+        """Invalidate the index.
+
+        :param path: path to the modified file or None for all files
+        :type path: str
+        """
+        with self._lock:
+            if path:
+                self._stamps.pop(path, None)
+            else:
+                self._directory_stamp = None
+                self._stamps = {}
+
+    def _update(self):
+        """Update the index with the added, modified and removed files."""
+        directory_stamp = self._get_stamp(self._directory)
+        if directory_stamp is None or directory_stamp != self._directory_stamp:
+            self._paths = _ifcfg_files(self._directory)
+            self._directory_stamp = directory_stamp
+
+        changed = False
+
+        for path in self._paths:
+            stamp = self._get_stamp(path)
+            if path in self._files and self._stamps.get(path) == stamp:
+                continue
+
+            self._files.pop(path, None)
+            self._stamps.pop(path, None)
+            changed = True
+
+            if stamp is None:
+                continue
+
+            ifcfg = IfcfgFile(path)
+            try:
+                ifcfg.read()
+            except FileNotFoundError:
+                continue
+
+            self._files[path] = ifcfg
+            self._stamps[path] = stamp
+
+        for path in self._files.keys() - set(self._paths):
+            del self._files[path]
+            del self._stamps[path]
+            changed = True
+
+        if changed:
+            self._build_index()
+
+    def _build_index(self):
+        """Build the index of the parsed files."""
+        self._index = {key: {} for key in IFCFG_INDEXED_KEYS}
+
+        for path in self._paths:
+            ifcfg = self._files.get(path)
+            if not ifcfg:
+                continue
+            for key in IFCFG_INDEXED_KEYS:
+                self._index[key].setdefault(ifcfg.get(key), []).append(path)
+
+    def _get_candidates(self, values):
+        """Get paths of files that can have the required values."""
+        candidates = self._paths
+
+        for key, value in values:
+            if callable(value) or key.upper() not in self._index:
+                continue
+            paths = self._index[key.upper()].get(value, [])
+            if len(paths) < len(candidates):
+                candidates = paths
+
+        return candidates
+
+    def find(self, values):
+        """Find the first ifcfg file specified by values.
+
+        :param values: list required values of settings (KEY, VALUE)
+                       of the looked for file, the VALUE can be also
+                       a function checking the value
+        :type values: list(tuple(str, str))
+        :returns: path to the ifcfg file or None
+        :rtype: str
+        """
+        with self._lock:
+            self._update()
+            for path in self._get_candidates(values):
+                ifcfg = self._files.get(path)
+                if ifcfg and _ifcfg_file_matches(ifcfg, values):
+                    return path
+        return None
+
+    def get_file(self, path):
+        """Get a copy of the parsed ifcfg file.
+
+        :param path: path to the ifcfg file
+        :type path: str
+        :returns: ifcfg file object or None
+        :rtype: IfcfgFile
+        """
+        with self._lock:
+            self._update()
+            ifcfg = self._files.get(path)
+            return copy.deepcopy(ifcfg) if ifcfg else None
+
+    def get_files(self):
+        """Get copies of all parsed ifcfg files.
+
+        :returns: ifcfg file objects in the order of the directory listing
+        :rtype: list(IfcfgFile)
+        """
+        with self._lock:
+            self._update()
+            return [copy.deepcopy(self._files[path]) for path in self._paths
+                    if path in self._files]
+
+
+_ifcfg_indexes = {}
+_ifcfg_indexes_lock = RLock()
+
+
+def get_ifcfg_index(root_path=""):
+    """Get the index of ifcfg files.
+
+    :param root_path: index the filesystem specified by root path
+    :type root_path: str
+    :returns: the index of ifcfg files
+    :rtype: IfcfgIndex
+    """
+    directory = os.path.normpath(root_path + IFCFG_DIR)
+
+    with _ifcfg_indexes_lock:
+        if directory not in _ifcfg_indexes:
+            _ifcfg_indexes[directory] = IfcfgIndex(directory)
+        return _ifcfg_indexes[directory]
+
+
+def invalidate_ifcfg_index(path):
+    """Invalidate the indexed ifcfg file.
+
+    :param path: path to the modified ifcfg file
+    :type path: str
+    """
+    path = os.path.normpath(path)
+
+    with _ifcfg_indexes_lock:
+        index = _ifcfg_indexes.get(os.path.dirname(path))
+
+    if index:
+        index.invalidate(path)
+
+
 def get_ifcfg_file(values, root_path=""):
     """Get ifcfg file specified by values.
 
@@ -132,18 +345,10 @@ def get_ifcfg_file(values, root_path=""):
     :param root_path: search in the filesystem specified by root path
     :type root_path: str
     """
-    for file_path in _ifcfg_files(os.path.normpath(root_path + IFCFG_DIR)):
-        ifcfg = IfcfgFile(file_path)
-        ifcfg.read()
-        for key, value in values:
-            if callable(value):
-                if not value(ifcfg.get(key)):
-                    break
-            else:
-                if ifcfg.get(key) != value:
-                    break
-        else:
-            return ifcfg
+    index = get_ifcfg_index(root_path)
+    file_path = index.find(values)
+    if file_path:
+        return index.get_file(file_path)
     return None
 
 
@@ -184,9 +389,7 @@ def get_ifcfg_file_of_device(nm_client, device_name, device_hwaddr=None, root_pa
     """
     # hwaddr is supplementary (--bindto=mac)
     ifcfgs = []
-    for file_path in _ifcfg_files(os.path.normpath(root_path + IFCFG_DIR)):
-        ifcfg = IfcfgFile(file_path)
-        ifcfg.read()
+    for ifcfg in get_ifcfg_index(root_path).get_files():
         device_type = ifcfg.get("TYPE") or ifcfg.get("DEVICETYPE")
         if device_type == "Wireless":
             # TODO check ESSID against active ssid of the device
@@ -257,9 +460,7 @@ def get_slaves_from_ifcfgs(nm_client, master_option, master_specs, root_path="")
     """
     slaves = []
 
-    for file_path in _ifcfg_files(os.path.normpath(root_path + IFCFG_DIR)):
-        ifcfg = IfcfgFile(file_path)
-        ifcfg.read()
+    for ifcfg in get_ifcfg_index(root_path).get_files():
         master = ifcfg.get(master_option)
         if master in master_specs:
             iface = ifcfg.get("DEVICE")
@@ -473,9 +674,7 @@ def update_slaves_onboot_value(nm_client, master_devname, onboot, root_path="",
     # Master can be identified by devname or uuid, try to find master uuid
     if not uuid:
         uuid = find_ifcfg_uuid_of_device(nm_client, master_devname, root_path=root_path)
-    for ifcfg_path in _ifcfg_files(os.path.normpath(root_path + IFCFG_DIR)):
-        ifcfg = IfcfgFile(ifcfg_path)
-        ifcfg.read()
+    for ifcfg in get_ifcfg_index(root_path).get_files():
         master = ifcfg.get("MASTER") or ifcfg.get("TEAM_MASTER") or ifcfg.get("BRIDGE")
         if master in (master_devname, uuid):
             old_value = ifcfg.get('ONBOOT')
@@ -18,9 +18,10 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import gi
+gi.require_version("Gio", "2.0")
 gi.require_version("NM", "1.0")
 
-from gi.repository import NM
+from gi.repository import Gio, NM
 
 import shutil
 from pyanaconda.core import util, constants
@@ -43,8 +44,11 @@ from pyanaconda.flags import flags
 from pyanaconda.core.i18n import _
 from pyanaconda.core.regexes import HOSTNAME_PATTERN_WITHOUT_ANCHORS, IBFT_CONFIGURED_DEVICE_NAME
 from pyanaconda.core.configuration.anaconda import conf
+from pyanaconda.core.glib import wait_for_signals, GError
+from pyanaconda.dbus import DBus
 from pykickstart.constants import BIND_TO_MAC
 from pyanaconda.modules.common.constants.services import NETWORK, TIMEZONE
+from pyanaconda.modules.network.ifcfg import get_ifcfg_index, invalidate_ifcfg_index
 from pyanaconda.payload.livepayload import LiveImagePayload
 
 from pyanaconda.anaconda_loggers import get_module_logger, get_ifcfg_logger
@@ -244,6 +248,7 @@ class IfcfgFile(SimpleConfigFile):
             ifcfglog.debug("IfcfgFile.write %s:\n%s", self.filename, self.__str__())
             SimpleConfigFile.write(self, filename, use_tmp=use_tmp)
             self._dirty = False
+            invalidate_ifcfg_index(filename or self.filename)
 
     def set(self, *args):
         for (key, data) in args:
@@ -632,19 +637,7 @@ def find_ifcfg_uuid_of_device(devname):
     return uuid
 
 def find_ifcfg_file(values, root_path=""):
-    for filepath in _ifcfg_files(os.path.normpath(root_path + netscriptsDir)):
-        ifcfg = IfcfgFile(filepath)
-        ifcfg.read()
-        for key, value in values:
-            if callable(value):
-                if not value(ifcfg.get(key)):
-                    break
-            else:
-                if ifcfg.get(key) != value:
-                    break
-        else:
-            return filepath
-    return None
+    return get_ifcfg_index(root_path).find(values)
 
 def get_slaves_from_ifcfgs(master_option, master_specs):
     """List of slaves of master specified by master_specs in master_option.
@@ -655,9 +648,7 @@ def get_slaves_from_ifcfgs(master_option, master_specs):
     """
     slaves = []
 
-    for filepath in _ifcfg_files(netscriptsDir):
-        ifcfg = IfcfgFile(filepath)
-        ifcfg.read()
+    for ifcfg in get_ifcfg_index().get_files():
         master = ifcfg.get(master_option)
         if master in master_specs:
             device = ifcfg.get("DEVICE")
@@ -881,6 +872,9 @@ def wait_for_connected_NM(timeout=constants.NETWORK_CONNECTION_TIMEOUT, only_con
     return immediately after leaving this state (regardless of the new state).
     Used to wait for dhcp configuration in progress.
 
+    The Connected property is checked again every time the Network module
+    reports changed properties.
+
     :param timeout: timeout in seconds
     :type timeout: int
     :parm only_connecting: wait only for the result of NM being connecting
@@ -901,30 +895,60 @@ def wait_for_connected_NM(timeout=constants.NETWORK_CONNECTION_TIMEOUT, only_con
     else:
         log.debug("waiting for connected NM, timeout=%d", timeout)
 
-    i = 0
-    while i < timeout:
-        i += constants.NETWORK_CONNECTED_CHECK_INTERVAL
-        time.sleep(constants.NETWORK_CONNECTED_CHECK_INTERVAL)
-        if network_proxy.Connected:
-            log.debug("NM connected, waited %d seconds", i)
+    state = {"connected": False}
+
+    def check():
+        state["connected"] = network_proxy.Connected
+        if state["connected"]:
             return True
-        elif only_connecting:
-            if not network_proxy.IsConnecting():
-                break
+        return only_connecting and not network_proxy.IsConnecting()
+
+    start = time.monotonic()
+    wait_for_signals(
+        DBus.connection.con,
+        [(NETWORK.service_name, "org.freedesktop.DBus.Properties", "PropertiesChanged",
+          NETWORK.object_path)],
+        check,
+        timeout
+    )
+    waited = time.monotonic() - start
+
+    if state["connected"]:
+        log.debug("NM connected, waited %d seconds", waited)
+        return True
 
-    log.debug("NM not connected, waited %d seconds", i)
+    log.debug("NM not connected, waited %d seconds", waited)
     return False
 
 def wait_for_network_devices(devices, timeout=constants.NETWORK_CONNECTION_TIMEOUT):
+    """Wait for activation of network devices.
+
+    The activated devices are checked again every time NetworkManager
+    reports a changed state of a device or of an active connection.
+
+    :param devices: names of the network devices
+    :type devices: list(str)
+    :param timeout: timeout in seconds
+    :type timeout: int
+    :return: all devices are activated
+    :rtype: bool
+    """
     devices = set(devices)
-    i = 0
     log.debug("waiting for connection of devices %s for iscsi", devices)
-    while i < timeout:
-        if not devices - set(nm.nm_activated_devices()):
-            return True
-        i += 1
-        time.sleep(1)
-    return False
+
+    try:
+        connection = Gio.bus_get_sync(Gio.BusType.SYSTEM, None)
+    except GError as e:
+        log.error("Can't wait for connection of devices: %s", e)
+        return not devices - set(nm.nm_activated_devices())
+
+    return wait_for_signals(
+        connection,
+        [(nm.NM_SERVICE, "org.freedesktop.NetworkManager.Device", "StateChanged", None),
+         (nm.NM_SERVICE, "org.freedesktop.NetworkManager.Connection.Active", "StateChanged", None)],
+        lambda: not devices - set(nm.nm_activated_devices()),
+        timeout
+    )
 
 def wait_for_connecting_NM_thread():
     """Wait for connecting NM in thread, do some work and signal connectivity.
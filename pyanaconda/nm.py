@@ -23,9 +23,13 @@ gi.require_version("NM", "1.0")
 
 from gi.repository import Gio
 from gi.repository import NM
-from pyanaconda.core.glib import GError, Variant, VariantType
+from pyanaconda.core.glib import GError, Variant, VariantType, MainLoop, PRIORITY_LOW, \
+    create_new_context
+from collections import OrderedDict
+import copy
 import struct
 import socket
+import threading
 
 from pyanaconda.anaconda_loggers import get_module_logger
 log = get_module_logger(__name__)
@@ -46,6 +50,19 @@ supported_device_types = [
 DEFAULT_PROXY_FLAGS = \
     Gio.DBusProxyFlags.DO_NOT_CONNECT_SIGNALS | Gio.DBusProxyFlags.DO_NOT_LOAD_PROPERTIES
 
+NM_SERVICE = "org.freedesktop.NetworkManager"
+NM_SETTINGS_PATH = "/org/freedesktop/NetworkManager/Settings"
+NM_SETTINGS_IFACE = "org.freedesktop.NetworkManager.Settings"
+NM_CONNECTION_IFACE = "org.freedesktop.NetworkManager.Settings.Connection"
+DBUS_PEER_IFACE = "org.freedesktop.DBus.Peer"
+
+# Maximal time in seconds to wait for the signals about changed settings.
+SETTINGS_SIGNALS_TIMEOUT = 5
+
+# Proxies created with the default flags are shared.
+_proxy_pool = {}
+_proxy_pool_lock = threading.Lock()
+
 class UnknownDeviceError(ValueError):
     """Device of specified name was not found by NM"""
     def __str__(self):
@@ -94,10 +111,18 @@ class BondOptionsError(AddConnectionError):
 def _get_proxy(bus_type=Gio.BusType.SYSTEM,
                proxy_flags=DEFAULT_PROXY_FLAGS,
                info=None,
-               name="org.freedesktop.NetworkManager",
+               name=NM_SERVICE,
                object_path="/org/freedesktop/NetworkManager",
                interface_name="org.freedesktop.NetworkManager",
                cancellable=None):
+    shared = proxy_flags == DEFAULT_PROXY_FLAGS and info is None and cancellable is None
+    key = (bus_type, name, object_path, interface_name)
+
+    if shared:
+        with _proxy_pool_lock:
+            if key in _proxy_pool:
+                return _proxy_pool[key]
+
     try:
         proxy = Gio.DBusProxy.new_for_bus_sync(bus_type,
                                                proxy_flags,
@@ -111,10 +136,20 @@ def _get_proxy(bus_type=Gio.BusType.SYSTEM,
             raise
 
         log.error("_get_proxy failed: %s", e)
-        proxy = None
+        return None
+
+    if shared:
+        with _proxy_pool_lock:
+            proxy = _proxy_pool.setdefault(key, proxy)
 
     return proxy
 
+def _drop_proxies(object_path):
+    """Remove shared proxies of the given object from the pool."""
+    with _proxy_pool_lock:
+        for key in [k for k in _proxy_pool if k[2] == object_path]:
+            del _proxy_pool[key]
+
 def _get_property(object_path, prop, interface_name_suffix=""):
     interface_name = "org.freedesktop.NetworkManager" + interface_name_suffix
     proxy = _get_proxy(object_path=object_path, interface_name="org.freedesktop.DBus.Properties")
@@ -625,6 +660,211 @@ def nm_ntp_servers_from_dhcp():
         # NetworkManager does not request NTP/SNTP options for DHCP6
     return ntp_servers
 
+def _no_format(value):
+    return value
+
+def _format_hwaddr(value):
+    return ":".join("%02X" % b for b in value)
+
+class _SettingsCache(object):
+    """Cache of the settings of NetworkManager connections.
+
+    The settings are loaded once and kept fresh by the NewConnection,
+    ConnectionRemoved, Updated and Removed signals of NetworkManager.
+    The signals are dispatched by a loop in a dedicated thread, so they
+    are delivered even if the main thread is blocked. Every lookup waits
+    for the signals emitted before it, so the changes made by other clients
+    are visible right away. The lookups by a value of a setting are answered
+    from indexes that are built on demand and dropped when the settings change.
+
+    If the signals can't be subscribed, the settings are loaded again
+    for every lookup.
+
+    The returned settings are copies, so the callers can't modify
+    the cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # object path -> settings or None if not loaded yet
+        self._settings = None
+        # (key1, key2, format function) -> ({formatted value: [object paths]},
+        #                                    [(unhashable value, object path)])
+        self._indexes = {}
+        self._subscribed = False
+        self._context = None
+
+    def _subscribe(self):
+        """Subscribe to the signals about changed settings."""
+        try:
+            connection = Gio.bus_get_sync(Gio.BusType.SYSTEM, None)
+        except GError as e:
+            log.debug("Can't subscribe to changes of settings: %s", e)
+            return
+
+        subscribed = threading.Event()
+        thread = threading.Thread(name="AnaNMSettingsSignalsThread",
+                                  target=self._run_signal_loop,
+                                  args=(connection, subscribed),
+                                  daemon=True)
+        thread.start()
+
+        # Don't trust the cache before the signals are subscribed.
+        subscribed.wait()
+        self._subscribed = True
+
+    def _run_signal_loop(self, connection, subscribed):
+        """Subscribe to the signals and dispatch them.
+
+        The signals are delivered in the thread-default main context
+        of the subscribing thread, so they are subscribed and dispatched
+        in a private context of this thread.
+        """
+        context = create_new_context()
+        context.push_thread_default()
+        self._context = context
+
+        for interface_name, signal_name, object_path in (
+                (NM_SETTINGS_IFACE, "NewConnection", NM_SETTINGS_PATH),
+                (NM_SETTINGS_IFACE, "ConnectionRemoved", NM_SETTINGS_PATH),
+                (NM_CONNECTION_IFACE, "Updated", None),
+                (NM_CONNECTION_IFACE, "Removed", None)):
+            connection.signal_subscribe(NM_SERVICE, interface_name, signal_name, object_path,
+                                        None, Gio.DBusSignalFlags.NONE, self._signal_cb)
+
+        subscribed.set()
+        MainLoop(context).run()
+
+    def _flush_signals(self):
+        """Wait until the signals emitted so far are processed.
+
+        NetworkManager replies to a call after the signals it emitted
+        before, so their callbacks are queued in the context of the signal
+        loop once the call returns. A callback with a lower priority is
+        dispatched after them.
+
+        It can't be called with the lock held.
+        """
+        if not self._subscribed:
+            return
+
+        proxy = _get_proxy(object_path=NM_SETTINGS_PATH, interface_name=DBUS_PEER_IFACE)
+        try:
+            proxy.Ping()
+        except GError as e:
+            log.debug("Failed to ping NetworkManager: %s", e)
+            return
+
+        flushed = threading.Event()
+        self._context.invoke_full(PRIORITY_LOW, flushed.set)
+
+        if not flushed.wait(SETTINGS_SIGNALS_TIMEOUT):
+            log.debug("Timed out waiting for the signals about changed settings.")
+
+    def _signal_cb(self, connection, sender_name, object_path, interface_name,
+                   signal_name, parameters):
+        if signal_name in ("NewConnection", "ConnectionRemoved"):
+            object_path = parameters.unpack()[0]
+
+        with self._lock:
+            self._indexes.clear()
+
+            if self._settings is None:
+                return
+
+            if signal_name in ("ConnectionRemoved", "Removed"):
+                self._settings.pop(object_path, None)
+                _drop_proxies(object_path)
+            else:
+                self._settings[object_path] = None
+
+    def invalidate(self, object_path=None):
+        """Reload the settings of the connection or all settings."""
+        with self._lock:
+            self._indexes.clear()
+
+            if object_path is None:
+                self._settings = None
+            elif self._settings is not None and object_path in self._settings:
+                self._settings[object_path] = None
+
+    def _load(self):
+        """Load the settings that are not in the cache."""
+        if not self._subscribed:
+            self._subscribe()
+            self._settings = None
+
+        if self._settings is None:
+            proxy = _get_proxy(object_path=NM_SETTINGS_PATH, interface_name=NM_SETTINGS_IFACE)
+            self._settings = OrderedDict((path, None) for path in proxy.ListConnections())
+
+        for path, settings in self._settings.items():
+            if settings is not None:
+                continue
+
+            proxy = _get_proxy(object_path=path, interface_name=NM_CONNECTION_IFACE)
+            try:
+                self._settings[path] = proxy.GetSettings()
+            except GError as e:
+                # The connection may be deleted asynchronously by NM
+                log.debug("Failed to get settings of %s: %s", path, e)
+
+    def get(self, object_path):
+        """Return the settings of the connection or None."""
+        self._flush_signals()
+
+        with self._lock:
+            self._load()
+            return copy.deepcopy(self._settings.get(object_path))
+
+    def get_all(self):
+        """Return a list of tuples with object paths and settings."""
+        self._flush_signals()
+
+        with self._lock:
+            self._load()
+            return [(path, copy.deepcopy(settings)) for path, settings in self._settings.items()
+                    if settings is not None]
+
+    def find(self, value, key1, key2, format_value=_no_format):
+        """Return a list of object paths of settings with the given value."""
+        self._flush_signals()
+
+        with self._lock:
+            self._load()
+            index_key = (key1, key2, format_value)
+
+            if index_key not in self._indexes:
+                index = {}
+                unhashable = []
+
+                for path, settings in self._settings.items():
+                    try:
+                        v = format_value(settings[key1][key2])
+                    except (KeyError, TypeError):
+                        continue
+
+                    try:
+                        index.setdefault(v, []).append(path)
+                    except TypeError:
+                        unhashable.append((v, path))
+
+                self._indexes[index_key] = (index, unhashable)
+
+            index, unhashable = self._indexes[index_key]
+
+            try:
+                paths = list(index.get(value, []))
+            except TypeError:
+                paths = []
+
+            # Keep the order of the connections.
+            paths.extend(path for v, path in unhashable if v == value)
+            found = set(paths)
+            return [path for path in self._settings if path in found]
+
+_settings_cache = _SettingsCache()
+
 def _is_s390_setting(path):
     """Check if setting of given object path is an s390 setting
 
@@ -634,9 +874,8 @@ def _is_s390_setting(path):
        :rtype: bool
     """
 
-    proxy = _get_proxy(object_path=path, interface_name="org.freedesktop.NetworkManager.Settings.Connection")
-    settings = proxy.GetSettings()
-    return "s390-subchannels" in settings["802-3-ethernet"]
+    settings = _settings_cache.get(path)
+    return bool(settings) and "s390-subchannels" in settings["802-3-ethernet"]
 
 def _device_settings(name):
     """Return list of object paths of device settings
@@ -697,11 +936,13 @@ def _settings_for_hwaddr(hwaddr):
        :rtype: list
     """
     return _find_settings(hwaddr, '802-3-ethernet', 'mac-address',
-                          format_value=lambda ba: ":".join("%02X" % b for b in ba))
+                          format_value=_format_hwaddr)
 
-def _find_settings(value, key1, key2, format_value=lambda x: x):
+def _find_settings(value, key1, key2, format_value=_no_format):
     """Return list of object paths of settings having given value of key1, key2 setting
 
+       The settings are looked up in the cache of settings.
+
        :param value: required value of setting
        :type value: corresponds to dbus type of setting
        :param key1: first-level key of setting (eg "connection")
@@ -709,33 +950,15 @@ def _find_settings(value, key1, key2, format_value=lambda x: x):
        :param key2: second-level key of setting (eg "uuid")
        :type key2: str
        :param format_value: function to be called on setting value before
-                            comparing
+                            comparing; use a module-level function, the
+                            lookups are indexed by it
        :type format_value: function taking one argument (setting value)
        :return: list of paths of settings
        :rtype: list
     """
-    retval = []
-
-    proxy = _get_proxy(object_path="/org/freedesktop/NetworkManager/Settings", interface_name="org.freedesktop.NetworkManager.Settings")
-
-    connections = proxy.ListConnections()
-    for con in connections:
-        proxy = _get_proxy(object_path=con, interface_name="org.freedesktop.NetworkManager.Settings.Connection")
-        try:
-            settings = proxy.GetSettings()
-        except GError as e:
-            log.debug("Exception raised in _find_settings: %s", e)
-            continue
-        try:
-            v = settings[key1][key2]
-        except KeyError:
-            continue
-        if format_value(v) == value:
-            retval.append(con)
+    return _settings_cache.find(value, key1, key2, format_value)
 
-    return retval
-
-def nm_get_settings(value, key1, key2, format_value=lambda x: x):
+def nm_get_settings(value, key1, key2, format_value=_no_format):
     """Return settings having given value of key1, key2 setting
 
        Returns list of settings(dicts) , None if settings were not found.
@@ -743,30 +966,15 @@ def nm_get_settings(value, key1, key2, format_value=lambda x: x):
     retval = []
     settings_paths = _find_settings(value, key1, key2, format_value)
     for settings_path in settings_paths:
-        proxy = _get_proxy(object_path=settings_path, interface_name="org.freedesktop.NetworkManager.Settings.Connection")
-        settings = proxy.GetSettings()
-        retval.append(settings)
+        settings = _settings_cache.get(settings_path)
+        if settings is not None:
+            retval.append(settings)
 
     return retval
 
 def nm_get_all_settings():
     """Return all settings for logging."""
-    retval = []
-
-    proxy = _get_proxy(object_path="/org/freedesktop/NetworkManager/Settings", interface_name="org.freedesktop.NetworkManager.Settings")
-
-    connections = proxy.ListConnections()
-    for con in connections:
-        proxy = _get_proxy(object_path=con, interface_name="org.freedesktop.NetworkManager.Settings.Connection")
-        try:
-            settings = proxy.GetSettings()
-        except GError as e:
-            # The connection may be deleted asynchronously by NM
-            log.debug("Exception raised in nm_get_all_settings: %s", e)
-            continue
-        retval.append(settings)
-
-    return retval
+    return [settings for _path, settings in _settings_cache.get_all()]
 
 def nm_device_setting_value(name, key1, key2):
     """Return value of device's setting specified by key1 and key2.
@@ -792,11 +1000,9 @@ def nm_device_setting_value(name, key1, key2):
         raise MultipleSettingsFoundError(name)
     else:
         settings_path = settings_paths[0]
-    proxy = _get_proxy(object_path=settings_path, interface_name="org.freedesktop.NetworkManager.Settings.Connection")
-    try:
-        settings = proxy.GetSettings()
-    except GError as e:
-        log.debug("nm_device_setting_value: %s", e)
+    settings = _settings_cache.get(settings_path)
+    if settings is None:
+        log.debug("nm_device_setting_value: settings %s not found", settings_path)
         raise SettingsNotFoundError(name)
     try:
         value = settings[key1][key2]
@@ -959,6 +1165,9 @@ def _update_settings(settings_path, new_values):
                     DEFAULT_DBUS_TIMEOUT,
                     None)
 
+    # Don't wait for the Updated signal.
+    _settings_cache.invalidate(settings_path)
+
 def _gvariant_settings(settings, updated_key1, updated_key2, value, default_type_str=None):
     """Update setting of updated_key1, updated_key2 of settings object with value.
 
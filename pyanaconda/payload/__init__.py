@@ -32,6 +32,7 @@ import threading
 import re
 import functools
 from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
 from blivet.size import Size, ROUND_HALF_UP
 from pyanaconda.core.configuration.anaconda import conf
@@ -41,6 +42,7 @@ from pyanaconda.core.constants import DRACUT_ISODIR, DRACUT_REPODIR, DD_ALL, DD_
 from pyanaconda.modules.common.constants.services import SERVICES
 from pykickstart.constants import GROUP_ALL, GROUP_DEFAULT, GROUP_REQUIRED
 from pyanaconda.flags import flags
+from pyanaconda.errors import errorHandler, ERROR_RAISE
 from pyanaconda.core.i18n import _, N_
 
 from pyanaconda.core import util
@@ -69,6 +71,10 @@ USER_AGENT = "%s (anaconda)/%s" % (productName, productVersion)
 from distutils.version import LooseVersion
 
 
+# Memory reserved for one process generating an initramfs.
+INITRAMFS_MEMORY = Size("512 MiB")
+
+
 def versionCmp(v1, v2):
     """Compare two version number strings."""
     firstVersion = LooseVersion(v1)
@@ -76,6 +82,65 @@ def versionCmp(v1, v2):
     return (firstVersion > secondVersion) - (firstVersion < secondVersion)
 
 
+def get_kernel_workers(kernel_count):
+    """Get a number of kernels that can be processed at the same time.
+
+    The number is limited by the number of CPUs and by the memory
+    available for the processes generating initramfs images.
+
+    :param kernel_count: a number of kernels
+    :return: a number of workers
+    """
+    memory = Size("{} KiB".format(isys.total_memory()))
+    workers = min(kernel_count, os.cpu_count() or 1, int(memory // INITRAMFS_MEMORY))
+    return max(1, workers)
+
+
+def run_for_kernels(kernels, function, max_workers=None):
+    """Run the function for every kernel in a bounded pool of threads.
+
+    The function is expected to run external programs and return their
+    return code. The messages about the programs are prefixed with the
+    kernel version. The failures are collected and reported at the end
+    to the error handler.
+
+    :param kernels: a list of kernel versions
+    :param function: a function that accepts a kernel version
+    :param max_workers: a maximal number of workers or None
+    :return: a list of kernel versions that failed
+    :raise PayloadInstallError: if the error handler decides so
+    """
+    if not kernels:
+        return []
+
+    workers = get_kernel_workers(len(kernels))
+    if max_workers:
+        workers = min(workers, max_workers)
+
+    def run(kernel):
+        try:
+            with util.program_log_prefix(kernel):
+                return function(kernel)
+        except (OSError, RuntimeError) as e:
+            log.error("Processing of the kernel %s has failed: %s", kernel, e)
+            return -1
+
+    log.debug("Processing %d kernels with %d workers.", len(kernels), workers)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="AnaKernelWorker") as executor:
+        results = list(executor.map(run, kernels))
+
+    failed = [kernel for kernel, rc in zip(kernels, results) if rc]
+    if failed:
+        exn = PayloadInstallError("Processing of the kernels has failed: {}"
+                                  .format(", ".join(failed)))
+        log.error(str(exn))
+
+        if errorHandler.cb(exn) == ERROR_RAISE:
+            raise exn
+
+    return failed
+
+
 ###
 ### ERROR HANDLING
 ###
@@ -821,38 +886,45 @@ class Payload(object):
             log.warning("new-kernel-pkg does not exist - grubby wasn't installed?  using dracut instead.")
             useDracut = True
 
-        for kernel in self.kernelVersionList:
+        def recreate_initrd(kernel):
             log.info("recreating initrd for %s", kernel)
             if not conf.target.is_image:
                 if useDracut:
-                    util.execInSysroot("depmod", ["-a", kernel])
-                    util.execInSysroot("dracut",
-                                       ["-H", "--persistent-policy", "by-uuid",
-                                        "-f",
-                                        "/boot/initramfs-%s.img" % kernel,
-                                        kernel])
+                    rc = util.execInSysroot("depmod", ["-a", kernel])
+                    if rc:
+                        raise RuntimeError("depmod exited with code %d" % rc)
+
+                    return util.execInSysroot("dracut",
+                                              ["-H", "--persistent-policy", "by-uuid",
+                                               "-f",
+                                               "/boot/initramfs-%s.img" % kernel,
+                                               kernel])
                 else:
-                    util.execInSysroot("new-kernel-pkg",
-                                       ["--mkinitrd", "--dracut", "--depmod",
-                                        "--update", kernel])
-
-                # if the installation is running in fips mode then make sure
-                # fips is also correctly enabled in the installed system
-                if flags.cmdline.get("fips") == "1":
-                    # We use the --no-bootcfg option as we don't want fips-mode-setup to
-                    # modify the bootloader configuration.
-                    # Anaconda already does everything needed & it would require gruby to
-                    # be available on the system.
-                    util.execInSysroot("fips-mode-setup", ["--enable", "--no-bootcfg"])
-
+                    return util.execInSysroot("new-kernel-pkg",
+                                              ["--mkinitrd", "--dracut", "--depmod",
+                                               "--update", kernel])
             else:
                 # hostonly is not sensible for disk image installations
                 # using /dev/disk/by-uuid/ is necessary due to disk image naming
-                util.execInSysroot("dracut",
-                                   ["-N",
-                                     "--persistent-policy", "by-uuid",
-                                     "-f", "/boot/initramfs-%s.img" % kernel,
-                                    kernel])
+                return util.execInSysroot("dracut",
+                                          ["-N",
+                                           "--persistent-policy", "by-uuid",
+                                           "-f", "/boot/initramfs-%s.img" % kernel,
+                                           kernel])
+
+        # The kernels are processed concurrently only with dracut. The
+        # new-kernel-pkg tool updates the shared bootloader configuration.
+        run_for_kernels(self.kernelVersionList, recreate_initrd,
+                        max_workers=None if useDracut or conf.target.is_image else 1)
+
+        # if the installation is running in fips mode then make sure
+        # fips is also correctly enabled in the installed system
+        if not conf.target.is_image and self.kernelVersionList and flags.cmdline.get("fips") == "1":
+            # We use the --no-bootcfg option as we don't want fips-mode-setup to
+            # modify the bootloader configuration.
+            # Anaconda already does everything needed & it would require gruby to
+            # be available on the system.
+            util.execInSysroot("fips-mode-setup", ["--enable", "--no-bootcfg"])
 
 
     def _setDefaultBootTarget(self):
@@ -20,6 +20,7 @@
 import os
 
 from blivet.size import Size
+import blivet.util
 from pykickstart.constants import GROUP_ALL, GROUP_DEFAULT, KS_MISSING_IGNORE
 from pyanaconda.flags import flags
 from pyanaconda.core.i18n import _, N_
@@ -31,6 +32,7 @@ from pyanaconda.core.configuration.anaconda import conf
 from pyanaconda.modules.common.constants.services import LOCALIZATION
 from pyanaconda.simpleconfig import SimpleConfigFile
 from pyanaconda.kickstart import RepoData
+from pyanaconda.payload.package_cache import PackageCache
 
 import pyanaconda.errors as errors
 import pyanaconda.localization
@@ -38,13 +40,17 @@ import pyanaconda.payload as payload
 
 import configparser
 import collections
+import re
 import multiprocessing
 import operator
+import functools
 import hashlib
 import shutil
 import sys
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException
 
 
@@ -67,6 +73,7 @@ DNF_CACHE_DIR = '/tmp/dnf.cache'
 DNF_PLUGINCONF_DIR = '/tmp/dnf.pluginconf'
 DNF_PACKAGE_CACHE_DIR_SUFFIX = 'dnf.package.cache'
 DNF_LIBREPO_LOG = '/tmp/dnf.librepo.log'
+PACKAGE_CACHE_MOUNT_DIR = constants.MOUNT_DIR + "/package-cache"
 DOWNLOAD_MPOINTS = {'/tmp',
                     '/',
                     '/var/tmp',
@@ -90,6 +97,21 @@ USER_AGENT = "%s (anaconda)/%s" % (productName, productVersion)
 # 6KiB = 4K(max default fragment size) + 2K(rpm db could be taken for a header file)
 BONUS_SIZE_ON_FILE = Size("6 KiB")
 
+# Maximal number of repositories that are accessed at the same time.
+MAX_REPO_WORKERS = 8
+
+# Interval in seconds between two batches of the transaction progress messages.
+TRANSACTION_PROGRESS_INTERVAL = 0.2
+
+# Messages of the transaction process that end the processing of the transaction.
+TRANSACTION_FINAL_MESSAGES = ('done', 'error', 'quit')
+
+# Names of the cached metadata of repositories: the directories named by the repository
+# id and a hash of its URLs, and the solv files named by the repository id. The solv
+# files of the system repository start with @.
+DNF_REPO_CACHE_DIR_RE = re.compile(r"^.+-[0-9a-f]{16}$")
+DNF_REPO_SOLV_FILE_RE = re.compile(r"^[^@].*\.solvx?$")
+
 
 def _failure_limbo():
     progressQ.send_quit(1)
@@ -118,6 +140,34 @@ def _df_map():
     return structured
 
 
+def _run_in_parallel(function, items, max_workers=MAX_REPO_WORKERS):
+    """Call the function for every item in a bounded pool of threads.
+
+    :param function: a function that accepts an item
+    :param items: a list of items
+    :param max_workers: a maximal number of threads
+    :return: a list of results in the order of the items
+    """
+    if not items:
+        return []
+
+    workers = min(max_workers, len(items))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="AnaRepoWorker") as executor:
+        return list(executor.map(function, items))
+
+
+def _create_repo_session(max_workers=MAX_REPO_WORKERS):
+    """Create a requests session shared by the repository workers.
+
+    The session keeps enough pooled connections for all workers.
+    """
+    session = util.requests_session()
+    adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
 def _paced(fn):
     """Execute `fn` no more often then every 2 seconds."""
     def paced_fn(self, *args):
@@ -168,14 +218,202 @@ def _pick_mpoint(df, download_size, install_size, download_only):
         return sorted_mpoints[0][0]
 
 
+def _get_required_packages(query, pkg, packages):
+    """Get packages of the query that provide the requirements of the package.
+
+    File requirements are matched with the files of the packages. Rich
+    dependencies that can't be resolved are treated as requirements
+    of all packages, so the package is never installed before them.
+
+    :param query: a query of the packages to install
+    :param pkg: a package
+    :param packages: a list of all packages to install
+    :return: a list of packages
+    """
+    required = set()
+    provides = []
+    files = []
+
+    for reldep in pkg.requires:
+        name = str(reldep)
+
+        if name.startswith("("):
+            providers = query.filter(provides=reldep)
+
+            if not providers:
+                return list(packages)
+
+            required.update(providers)
+        elif name.startswith("/"):
+            files.append(name)
+            provides.append(reldep)
+        else:
+            provides.append(reldep)
+
+    if provides:
+        required.update(query.filter(provides=provides))
+
+    if files:
+        required.update(query.filter(file=files))
+
+    return [p for p in packages if p in required]
+
+
+def _split_into_batches(packages, get_requirements, get_download_size, batch_size):
+    """Split packages into dependency-ordered batches.
+
+    Every package is placed into the same or a later batch than the packages
+    it requires, so the batches can be installed one after another. Packages
+    with cyclic dependencies are always placed into the same batch.
+
+    :param packages: a list of packages
+    :param get_requirements: a function that returns the packages required by a package
+    :param get_download_size: a function that returns the download size of a package
+    :param batch_size: a maximal download size of a batch
+    :return: a list of batches of packages
+    """
+    # Find strongly connected components of the dependency graph with the
+    # Tarjan's algorithm. The components are found in the reversed topological
+    # order, so the required packages always come first.
+    index = {}
+    lowlink = {}
+    stack = []
+    on_stack = set()
+    components = []
+
+    for root in packages:
+        if root in index:
+            continue
+
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(get_requirements(root)))]
+
+        while work:
+            node, requirements = work[-1]
+
+            for requirement in requirements:
+                if requirement not in index:
+                    index[requirement] = lowlink[requirement] = len(index)
+                    stack.append(requirement)
+                    on_stack.add(requirement)
+                    work.append((requirement, iter(get_requirements(requirement))))
+                    break
+                elif requirement in on_stack:
+                    lowlink[node] = min(lowlink[node], index[requirement])
+            else:
+                work.pop()
+
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+                if lowlink[node] == index[node]:
+                    component = []
+
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+
+                        if member == node:
+                            break
+
+                    components.append(component)
+
+    # Fill the batches with the components.
+    batches = []
+    batch = []
+    size = 0
+
+    for component in components:
+        component_size = sum(get_download_size(pkg) for pkg in component)
+
+        if batch and size + component_size > batch_size:
+            batches.append(batch)
+            batch = []
+            size = 0
+
+        batch.extend(component)
+        size += component_size
+
+    if batch:
+        batches.append(batch)
+
+    return batches
+
+
+class TransactionProgressQueue(object):
+    """Send the progress messages of the transaction process in batches.
+
+    The messages are buffered and a background thread sends them to the
+    queue as a single list every TRANSACTION_PROGRESS_INTERVAL seconds,
+    so the transaction is not slowed down by a message for every package.
+    The messages that end the transaction are sent immediately.
+    """
+
+    def __init__(self, queue_instance, interval=TRANSACTION_PROGRESS_INTERVAL):
+        self._queue = queue_instance
+        self._interval = interval
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._flush_periodically, daemon=True)
+
+    def start(self):
+        """Start to send the messages periodically."""
+        self._thread.start()
+
+    def put(self, message):
+        """Add a (token, msg) tuple to the next batch."""
+        with self._lock:
+            self._buffer.append(message)
+
+        if message[0] in TRANSACTION_FINAL_MESSAGES:
+            self.flush()
+
+    def flush(self):
+        """Send the buffered messages."""
+        with self._lock:
+            if self._buffer:
+                self._queue.put(self._buffer)
+                self._buffer = []
+
+    def stop(self):
+        """Stop the periodical sending and send the remaining messages."""
+        self._stopped.set()
+
+        if self._thread.is_alive():
+            self._thread.join()
+
+        self.flush()
+
+    def _flush_periodically(self):
+        while not self._stopped.wait(self._interval):
+            self.flush()
+
+
 class PayloadRPMDisplay(dnf.callback.TransactionProgress):
-    def __init__(self, queue_instance):
+    def __init__(self, queue_instance, offset=0, total=None):
+        """Create the display of the transaction progress.
+
+        :param queue_instance: a queue for the progress messages
+        :param offset: a number of packages installed by previous transactions
+        :param total: a total number of packages to install or None
+        """
         super().__init__()
         self._queue = queue_instance
         self._last_ts = None
         self._postinst_phase = False
+        self._offset = offset
+        self._total = total
         self.cnt = 0
 
+    def _format_counts(self, ts_done, ts_total):
+        """Format the counts of processed packages."""
+        return '(%d/%d)' % (ts_done + self._offset, self._total or ts_total)
+
     def progress(self, package, action, ti_done, ti_total, ts_done, ts_total):
         # Process DNF actions, communicating with anaconda via the queue
         # A normal installation consists of 'install' messages followed by
@@ -186,8 +424,8 @@ class PayloadRPMDisplay(dnf.callback.TransactionProgress):
                 return
             self._last_ts = ts_done
 
-            msg = '%s.%s (%d/%d)' % \
-                (package.name, package.arch, ts_done, ts_total)
+            msg = '%s.%s %s' % \
+                (package.name, package.arch, self._format_counts(ts_done, ts_total))
             self.cnt += 1
             self._queue.put(('install', msg))
 
@@ -215,7 +453,8 @@ class PayloadRPMDisplay(dnf.callback.TransactionProgress):
                 self._queue.put(('configure', msg))
 
         elif action == dnf.transaction.PKG_VERIFY:
-            msg = '%s.%s (%d/%d)' % (package.name, package.arch, ts_done, ts_total)
+            msg = '%s.%s %s' % \
+                (package.name, package.arch, self._format_counts(ts_done, ts_total))
             self._queue.put(('verify', msg))
 
             # Log the exact package nevra, build time and checksum
@@ -274,12 +513,96 @@ class DownloadProgress(dnf.callback.DownloadProgress):
         self.total_size = Size(total_size)
 
 
-def do_transaction(base, queue_instance):
+class PipelinedDownloadProgress(DownloadProgress):
+    """Download progress of all batches of the pipelined installation.
+
+    The progress is not reported while it is muted, so it doesn't
+    mix with the progress of the running transaction.
+    """
+
+    def __init__(self, total_files, total_size):
+        super().__init__()
+        self.total_files = total_files
+        self.total_size = Size(total_size)
+        self.muted = False
+
+    def _update(self):
+        if not self.muted:
+            super()._update()
+
+    def start(self, total_files, total_size, total_drpms=0): # pylint: disable=arguments-differ
+        # Keep the totals of all batches.
+        pass
+
+
+def _select_batch(base, batch, group_specs=None, exclude_specs=None):
+    """Replace the transaction of the DNF base with a batch of packages.
+
+    The system repository is loaded, so the packages installed by
+    the previous batches are taken into account. The metadata of
+    the other repositories are reused from the sack of the base.
+
+    The reset of the goal drops also the selected groups and
+    environments, so they are selected again in the last batch
+    to be recorded in the DNF history of the installed system.
+
+    :param base: a DNF base without the system repository
+    :param batch: a list of (nevra, repo id, reason) tuples
+    :param group_specs: a list of group and environment specs or None
+    :param exclude_specs: a list of excluded package specs or None
+    :raise PayloadInstallError: if the batch requires packages that are not downloaded
+    """
+    base.conf.install_weak_deps = False
+    base.reset(goal=True)
+    base.sack.load_system_repo(build_cache=False)
+
+    reasons = {}
+    query = base.sack.query().available()
+    for nevra, repo_id, reason in batch:
+        for pkg in query.filter(nevra=nevra, reponame=repo_id):
+            base.package_install(pkg, strict=True)
+            reasons[(nevra, repo_id)] = reason
+
+    if group_specs:
+        try:
+            base.install_specs(install=group_specs, exclude=exclude_specs)
+        except dnf.exceptions.MarkingErrors as e:
+            # The missing specs were already handled before the installation.
+            log.debug("Failed to select some groups again: %s", e)
+
+    base.resolve()
+
+    # Record the reasons from the whole transaction, so the
+    # dependencies are not recorded as installed by the user.
+    for tsi in base.transaction:
+        reason = reasons.get((str(tsi.pkg), tsi.pkg.reponame))
+        if reason is not None:
+            tsi.reason = reason
+
+    # The next batch is being downloaded to the same location,
+    # so nothing else can be downloaded here.
+    missing = [str(pkg) for pkg in base.transaction.install_set
+               if (str(pkg), pkg.reponame) not in reasons]
+
+    if missing:
+        raise payload.PayloadInstallError(
+            "The batch requires packages that are not downloaded: %s" % ", ".join(missing)
+        )
+
+
+def do_transaction(base, queue_instance, batch=None, offset=0, total=None,
+                   group_specs=None, exclude_specs=None):
     # Execute the DNF transaction and catch any errors. An error doesn't
     # always raise a BaseException, so presence of 'quit' without a preceeding
     # 'post' message also indicates a problem.
+    progress_queue = TransactionProgressQueue(queue_instance)
+    progress_queue.start()
+
     try:
-        display = PayloadRPMDisplay(queue_instance)
+        if batch is not None:
+            _select_batch(base, batch, group_specs, exclude_specs)
+
+        display = PayloadRPMDisplay(progress_queue, offset, total)
         base.do_transaction(display=display)
         exit_reason = "DNF quit"
     except BaseException as e:
@@ -289,7 +612,8 @@ def do_transaction(base, queue_instance):
         exit_reason = str(e) + traceback.format_exc()
     finally:
         base.close() # Always close this base.
-        queue_instance.put(('quit', str(exit_reason)))
+        progress_queue.put(('quit', str(exit_reason)))
+        progress_queue.stop()
 
 
 class DNFPayload(payload.PackagePayload):
@@ -298,6 +622,9 @@ class DNFPayload(payload.PackagePayload):
 
         self._base = None
         self._download_location = None
+        self._package_cache = None
+        self._group_specs = []
+        self._exclude_specs = []
         self._updates_enabled = True
         self._configure()
 
@@ -309,6 +636,7 @@ class DNFPayload(payload.PackagePayload):
 
         # save repomd metadata
         self._repoMD_list = []
+        self._repo_session = _create_repo_session()
 
         self._req_groups = set()
         self._req_packages = set()
@@ -562,6 +890,8 @@ class DNFPayload(payload.PackagePayload):
         try:
             # install_specs() returns a list of specs that appear to be missing
             self._base.install_specs(install=include_list, exclude=exclude_list)
+            self._group_specs = [spec for spec in include_list if spec.startswith("@")]
+            self._exclude_specs = exclude_list
         except dnf.exceptions.MarkingErrors as e:
             log.debug("install_specs(): some packages, groups or modules are missing or broken:\n%s", e)
             # if no errors were reported and --ignoremissing was used we can continue
@@ -655,6 +985,12 @@ class DNFPayload(payload.PackagePayload):
         config.cachedir = DNF_CACHE_DIR
         config.pluginconfpath = DNF_PLUGINCONF_DIR
         config.logdir = '/tmp/'
+
+        # Revalidate the cached metadata every time they are loaded. They
+        # are reused if the repomd.xml file of the repository hasn't changed.
+        if conf.payload.cache_repo_metadata:
+            config.metadata_expire = 0
+
         # enable depsolver debugging if in debug mode
         self._base.conf.debug_solver = flags.debug
         # set the platform id based on the /os/release
@@ -712,9 +1048,18 @@ class DNFPayload(payload.PackagePayload):
         if transaction is None:
             return Size(0)
 
-        size = sum(tsi.pkg.downloadsize for tsi in transaction)
+        if conf.payload.pipelined_install:
+            # Only two consecutive batches are stored at the same time
+            # in the pipelined mode. A batch can be bigger than the batch
+            # size if it contains a big dependency cycle.
+            sizes = [sum(pkg.downloadsize for pkg in batch)
+                     for batch in self._get_install_batches()]
+            size = Size(max(map(sum, zip(sizes, sizes[1:] + [0])), default=0))
+        else:
+            size = Size(sum(tsi.pkg.downloadsize for tsi in transaction))
+
         # reserve extra
-        return Size(size) + Size("150 MB")
+        return size + Size("150 MB")
 
     def _payload_setup_error(self, exn):
         log.error('Payload setup error: %r', exn)
@@ -781,15 +1126,53 @@ class DNFPayload(payload.PackagePayload):
         return langpacks
 
     def _sync_metadata(self, dnf_repo):
+        """Load the metadata of the repository.
+
+        The method is called from the repository workers, so it doesn't
+        modify the payload. The failed repositories are handled by the
+        caller.
+
+        :param dnf_repo: a DNF repository
+        :return: an error message or None
+        """
+        start_time = time.time()
         try:
             dnf_repo.load()
         except dnf.exceptions.RepoError as e:
-            id_ = dnf_repo.id
             log.info('_sync_metadata: addon repo error: %s', e)
-            self.disableRepo(id_)
-            self.verbose_errors.append(str(e))
-        log.debug('repo %s: _sync_metadata success from %s', dnf_repo.id,
-                 dnf_repo.baseurl or dnf_repo.mirrorlist or dnf_repo.metalink)
+            return str(e)
+
+        log.debug('repo %s: _sync_metadata success from %s (%1.1f s)', dnf_repo.id,
+                  dnf_repo.baseurl or dnf_repo.mirrorlist or dnf_repo.metalink,
+                  time.time() - start_time)
+        return None
+
+    def _prune_metadata_cache(self):
+        """Remove cached metadata of repositories that are not known anymore.
+
+        DNF stores the metadata of a repository in a directory named by
+        the repository id and a hash of its URLs and the solv files named
+        by the repository id, so the metadata of a repository with changed
+        URLs are stored separately.
+        """
+        if not os.path.isdir(DNF_CACHE_DIR):
+            return
+
+        prefixes = tuple(prefix for repo_id in self._base.repos
+                         for prefix in (repo_id + "-", repo_id + "."))
+
+        for name in os.listdir(DNF_CACHE_DIR):
+            if name.startswith(prefixes):
+                continue
+
+            path = os.path.join(DNF_CACHE_DIR, name)
+
+            if os.path.isdir(path) and DNF_REPO_CACHE_DIR_RE.match(name):
+                log.debug("Removing unused cached metadata %s.", path)
+                shutil.rmtree(path, ignore_errors=True)
+            elif os.path.isfile(path) and DNF_REPO_SOLV_FILE_RE.match(name):
+                log.debug("Removing unused cached metadata %s.", path)
+                os.remove(path)
 
     @property
     def baseRepo(self):
@@ -981,8 +1364,17 @@ class DNFPayload(payload.PackagePayload):
 
     def gatherRepoMetadata(self):
         with self._repos_lock:
-            for repo in self._base.repos.iter_enabled():
-                self._sync_metadata(repo)
+            repos = list(self._base.repos.iter_enabled())
+            results = _run_in_parallel(self._sync_metadata, repos)
+
+            for dnf_repo, error in zip(repos, results):
+                if error is None:
+                    continue
+
+                self.disableRepo(dnf_repo.id)
+                self.verbose_errors.append(error)
+
+            self._prune_metadata_cache()
         self._base.fill_sack(load_system_repo=False)
         self._base.read_comps()
         self._refreshEnvironmentAddons()
@@ -1007,70 +1399,366 @@ class DNFPayload(payload.PackagePayload):
         if os.path.exists(self._download_location):
             log.info("Removing existing package download location: %s", self._download_location)
             shutil.rmtree(self._download_location)
+
+        if conf.payload.pipelined_install:
+            self._install_pipelined()
+        else:
+            self._install_all()
+
+        self._release_package_cache()
+
+        # Don't close the mother base here, because we still need it.
+        if os.path.exists(self._download_location):
+            log.info("Cleaning up downloaded packages: %s", self._download_location)
+            shutil.rmtree(self._download_location)
+        else:
+            # Some installation sources, such as NFS, don't need to download packages to
+            # local storage, so the download location might not always exist. So for now
+            # warn about this, at least until the RFE in bug 1193121 is implemented and
+            # we don't have to care about clearing the download location ourselves.
+            log.warning("Can't delete nonexistent download location: %s", self._download_location)
+
+    def _install_all(self):
+        """Download all packages and install them in one transaction."""
         pkgs_to_download = self._base.transaction.install_set
         log.info('Downloading packages to %s.', self._download_location)
         progressQ.send_message(_('Downloading packages'))
         progress = DownloadProgress()
+        restored = self._restore_from_cache(pkgs_to_download)
         try:
             self._base.download_packages(pkgs_to_download, progress)
         except dnf.exceptions.DownloadError as e:
-            msg = 'Failed to download the following packages: %s' % str(e)
-            exc = payload.PayloadInstallError(msg)
-            if errors.errorHandler.cb(exc) == errors.ERROR_RAISE:
-                log.error("Installation failed: %r", exc)
-                _failure_limbo()
+            self._handle_download_error(e)
 
         log.info('Downloading packages finished.')
+        self._store_to_cache(pkgs_to_download, restored)
 
         pre_msg = (N_("Preparing transaction from installation source"))
         progress_message(pre_msg)
+        self._run_transaction()
+
+    def _install_pipelined(self):
+        """Download and install packages in dependency-ordered batches.
+
+        The next batch is downloaded in a separate thread while the
+        current batch is installed. The transaction process is forked
+        only after the previous download has finished, so it never
+        inherits a thread running in librepo.
+        """
+        batches = self._get_install_batches()
+
+        if not batches:
+            log.info("There are no packages to install.")
+            return
+
+        reasons = self._get_install_reasons()
+        packages = [pkg for batch in batches for pkg in batch]
+
+        progressQ.send_message(_('Downloading packages'))
+        progress = PipelinedDownloadProgress(len(packages),
+                                             sum(pkg.downloadsize for pkg in packages))
+        downloads = []
+        offset = 0
+
+        try:
+            self._start_batch_download(batches[0], progress, downloads)
+
+            for number, batch in enumerate(batches, start=1):
+                # Report the download progress only if the installation waits for it.
+                progress.muted = False
+                self._finish_batch_download(downloads.pop())
+
+                concurrent_task = None
+                group_specs = None
+                if number < len(batches):
+                    concurrent_task = functools.partial(
+                        self._start_batch_download, batches[number], progress, downloads
+                    )
+                else:
+                    # Record the groups and environments with the last batch.
+                    group_specs = self._group_specs
+
+                log.info('Installing batch %d/%d (%d packages).', number, len(batches), len(batch))
+                progress_message(N_("Preparing transaction from installation source"))
+                progress.muted = True
+                self._run_transaction(
+                    batch=[(str(pkg), pkg.reponame, reasons.get(pkg)) for pkg in batch],
+                    offset=offset,
+                    total=len(packages),
+                    concurrent_task=concurrent_task,
+                    group_specs=group_specs
+                )
+
+                offset += len(batch)
+                self._remove_downloaded_packages(batch)
+        finally:
+            # Never leave a download running behind.
+            for thread, _error in downloads:
+                thread.join()
+
+    def _start_batch_download(self, batch, progress, downloads):
+        """Start to download a batch of packages in a separate thread.
+
+        :param batch: a list of packages
+        :param progress: a download progress
+        :param downloads: a list for the started download
+        """
+        log.info('Downloading %d packages to %s.', len(batch), self._download_location)
+        error = []
+
+        def download():
+            try:
+                restored = self._restore_from_cache(batch)
+                self._base.download_packages(batch, progress)
+                self._store_to_cache(batch, restored)
+            except BaseException as e:  # pylint: disable=broad-except
+                error.append(e)
+
+        thread = threading.Thread(name="AnaDownloadBatchThread", target=download, daemon=True)
+        thread.start()
+        downloads.append((thread, error))
+
+    def _finish_batch_download(self, download):
+        """Wait for the download of a batch of packages.
+
+        :param download: a tuple of the download thread and a list for its error
+        :raise: the error of the download
+        """
+        thread, error = download
+        thread.join()
+
+        if not error:
+            return
+
+        if isinstance(error[0], dnf.exceptions.DownloadError):
+            # The batch is not complete, so the installation cannot continue.
+            raise payload.PayloadInstallError(
+                'Failed to download the following packages: %s' % str(error[0])
+            )
+
+        raise error[0]
+
+    def _get_install_reasons(self):
+        """Get the reasons of the packages of the transaction.
+
+        :return: a dictionary of packages and their reasons
+        """
+        return {tsi.pkg: tsi.reason for tsi in self._base.transaction}
+
+    def _get_install_batches(self):
+        """Split the packages of the transaction into batches.
+
+        :return: a list of batches of packages
+        """
+        packages = list(self._base.transaction.install_set)
+        query = self._base.sack.query().filterm(pkg=packages)
+
+        def get_requirements(pkg):
+            return [p for p in _get_required_packages(query, pkg, packages) if p != pkg]
+
+        def get_download_size(pkg):
+            return pkg.downloadsize
+
+        batch_size = Size("{} MiB".format(conf.payload.pipelined_batch_size))
+        batches = _split_into_batches(packages, get_requirements, get_download_size, batch_size)
+        log.info("%d packages split into %d batches.", len(packages), len(batches))
+        return batches
+
+    def _get_package_cache(self):
+        """Get the persistent package cache.
+
+        :return: an instance of PackageCache or None if disabled
+        """
+        if self._package_cache or not conf.payload.package_cache:
+            return self._package_cache
+
+        path = conf.payload.package_cache
+
+        if path.startswith("nfs://"):
+            (server, nfs_path) = path[6:].split(":", 1)
+            try:
+                self._setupNFS(PACKAGE_CACHE_MOUNT_DIR, server, nfs_path, None)
+            except payload.PayloadSetupError as e:
+                log.error("Failed to mount the package cache %s: %s", path, e)
+                return None
+
+            path = PACKAGE_CACHE_MOUNT_DIR
+
+        log.info("Using the package cache at %s.", path)
+        max_size = Size("{} MiB".format(conf.payload.package_cache_size))
+        self._package_cache = PackageCache(path, int(max_size))
+        return self._package_cache
+
+    def _get_cacheable_packages(self, packages):
+        """Get packages that are downloaded to the download location.
+
+        :param packages: a list of packages
+        :return: a list of tuples (package, checksum type, checksum, path)
+        """
+        cacheable = []
+
+        for pkg in packages:
+            path = pkg.localPkg()
+
+            if not path.startswith(self._download_location):
+                continue
 
+            checksum_type, checksum = pkg.returnIdSum()
+            cacheable.append((pkg, checksum_type, checksum, path))
+
+        return cacheable
+
+    @staticmethod
+    def _get_file_identity(path):
+        """Get a tuple that changes if the file is replaced or modified."""
+        stat = os.stat(path)
+        return stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def _restore_from_cache(self, packages):
+        """Restore the packages from the persistent package cache.
+
+        The restored packages are verified by DNF when they are downloaded.
+
+        :param packages: a list of packages
+        :return: a dictionary of paths to the restored packages and their identities
+        """
+        cache = self._get_package_cache()
+        restored = {}
+
+        if not cache:
+            return restored
+
+        for _pkg, checksum_type, checksum, path in self._get_cacheable_packages(packages):
+            if cache.restore(checksum_type, checksum, path):
+                restored[path] = self._get_file_identity(path)
+
+        log.info("Restored %d packages from the package cache.", len(restored))
+        return restored
+
+    def _store_to_cache(self, packages, restored=None):
+        """Store the downloaded packages in the persistent package cache.
+
+        The restored packages that were not downloaded again are skipped.
+
+        :param packages: a list of packages
+        :param restored: a result of _restore_from_cache or None
+        """
+        cache = self._get_package_cache()
+        restored = restored or {}
+
+        if not cache:
+            return
+
+        for _pkg, checksum_type, checksum, path in self._get_cacheable_packages(packages):
+            if not os.path.exists(path):
+                continue
+
+            if path in restored and restored[path] == self._get_file_identity(path):
+                continue
+
+            cache.store(checksum_type, checksum, path)
+
+        cache.evict()
+
+    def _release_package_cache(self):
+        """Release the persistent package cache and unmount it if needed."""
+        self._package_cache = None
+
+        if not os.path.ismount(PACKAGE_CACHE_MOUNT_DIR):
+            return
+
+        try:
+            blivet.util.umount(PACKAGE_CACHE_MOUNT_DIR)
+        except OSError as e:
+            log.error("Failed to unmount the package cache: %s", e)
+
+    def _remove_downloaded_packages(self, packages):
+        """Remove the downloaded packages from the download location.
+
+        :param packages: a list of packages
+        """
+        for pkg in packages:
+            path = pkg.localPkg()
+
+            if path.startswith(self._download_location) and os.path.exists(path):
+                os.remove(path)
+
+    def _handle_download_error(self, error):
+        msg = 'Failed to download the following packages: %s' % str(error)
+        exc = payload.PayloadInstallError(msg)
+        if errors.errorHandler.cb(exc) == errors.ERROR_RAISE:
+            log.error("Installation failed: %r", exc)
+            _failure_limbo()
+
+    def _run_transaction(self, batch=None, offset=0, total=None, concurrent_task=None,
+                         group_specs=None):
+        """Run the DNF transaction in a separate process.
+
+        :param batch: a list of (nevra, repo id, reason) tuples to install
+                      or None to install the whole transaction
+        :param offset: a number of packages installed by previous transactions
+        :param total: a total number of packages to install or None
+        :param concurrent_task: a function to call once the process is started
+        :param group_specs: a list of group and environment specs to select
+                            with the batch or None
+        """
         queue_instance = multiprocessing.Queue()
         process = multiprocessing.Process(target=do_transaction,
-                                          args=(self._base, queue_instance))
+                                          args=(self._base, queue_instance, batch, offset, total,
+                                                group_specs, self._exclude_specs))
         process.start()
-        (token, msg) = queue_instance.get()
+
+        if concurrent_task:
+            concurrent_task()
+
         # When the installation works correctly it will get 'install' updates
-        # followed by a 'post' message and then a 'quit' message.
+        # followed by a 'post' message and then a 'done' message.
         # If the installation fails it will send 'quit' without 'post'
-        while token:
+        while not self._process_transaction_messages(queue_instance.get()):
+            pass
+
+        process.join()
+
+    def _process_transaction_messages(self, messages):
+        """Process a batch of messages from the transaction process.
+
+        Only the last message of the batch is shown in the UI, so the UI
+        is updated at most once per batch.
+
+        :param messages: a list of (token, msg) tuples
+        :return: True if the transaction has finished, otherwise False
+        """
+        ui_message = None
+
+        for (token, msg) in messages:
             if token == 'install':
-                msg = _("Installing %s") % msg
-                progressQ.send_message(msg)
+                ui_message = _("Installing %s") % msg
             elif token == 'configure':
-                msg = _("Configuring %s") % msg
-                progressQ.send_message(msg)
+                ui_message = _("Configuring %s") % msg
             elif token == 'verify':
-                msg = _("Verifying %s") % msg
-                progressQ.send_message(msg)
+                ui_message = _("Verifying %s") % msg
             elif token == 'log':
                 log.info(msg)
             elif token == 'post':
-                msg = (N_("Performing post-installation setup tasks"))
-                progressQ.send_message(msg)
-            elif token == 'done':
-                break  # Installation finished successfully
-            elif token == 'quit':
-                msg = ("Payload error - DNF installation has ended up abruptly: %s" % msg)
-                raise payload.PayloadError(msg)
-            elif token == 'error':
-                exc = payload.PayloadInstallError("DNF error: %s" % msg)
-                if errors.errorHandler.cb(exc) == errors.ERROR_RAISE:
-                    log.error("Installation failed: %r", exc)
-                    _failure_limbo()
-            (token, msg) = queue_instance.get()
+                ui_message = (N_("Performing post-installation setup tasks"))
+            elif token in TRANSACTION_FINAL_MESSAGES:
+                break
 
-        process.join()
-        # Don't close the mother base here, because we still need it.
-        if os.path.exists(self._download_location):
-            log.info("Cleaning up downloaded packages: %s", self._download_location)
-            shutil.rmtree(self._download_location)
-        else:
-            # Some installation sources, such as NFS, don't need to download packages to
-            # local storage, so the download location might not always exist. So for now
-            # warn about this, at least until the RFE in bug 1193121 is implemented and
-            # we don't have to care about clearing the download location ourselves.
-            log.warning("Can't delete nonexistent download location: %s", self._download_location)
+        if ui_message:
+            progressQ.send_message(ui_message)
+
+        if token == 'done':
+            return True  # Installation finished successfully
+        elif token == 'quit':
+            msg = ("Payload error - DNF installation has ended up abruptly: %s" % msg)
+            raise payload.PayloadError(msg)
+        elif token == 'error':
+            exc = payload.PayloadInstallError("DNF error: %s" % msg)
+            if errors.errorHandler.cb(exc) == errors.ERROR_RAISE:
+                log.error("Installation failed: %r", exc)
+                _failure_limbo()
+
+        return False
 
     def getRepo(self, repo_id):
         """Return the yum repo object."""
@@ -1087,8 +1775,10 @@ class DNFPayload(payload.PackagePayload):
         if not self._repoMD_list:
             return False
 
-        for repo in self._repoMD_list:
-            if not repo.verify_repoMD():
+        results = _run_in_parallel(RepoMDMetaHash.verify_repoMD, self._repoMD_list)
+
+        for repo, available in zip(self._repoMD_list, results):
+            if not available:
                 log.debug("Can't reach repo %s", repo.id)
                 return False
         return True
@@ -1107,9 +1797,11 @@ class DNFPayload(payload.PackagePayload):
 
     def reset(self):
         super().reset()
-        shutil.rmtree(DNF_CACHE_DIR, ignore_errors=True)
+        if not conf.payload.cache_repo_metadata:
+            shutil.rmtree(DNF_CACHE_DIR, ignore_errors=True)
         shutil.rmtree(DNF_PLUGINCONF_DIR, ignore_errors=True)
         self.txID = None
+        self._release_package_cache()
         self._base.reset(sack=True, repos=True)
         self._configure_proxy()
         self._repoMD_list = []
@@ -1352,11 +2044,9 @@ class DNFPayload(payload.PackagePayload):
         Save repomd hash to test if the repositories can be reached.
         """
         super().postSetup()
-        self._repoMD_list = []
-        for repo in self._base.repos.iter_enabled():
-            repoMD = RepoMDMetaHash(self, repo)
-            repoMD.store_repoMD_hash()
-            self._repoMD_list.append(repoMD)
+        self._repoMD_list = [RepoMDMetaHash(self, repo, self._repo_session)
+                             for repo in self._base.repos.iter_enabled()]
+        _run_in_parallel(RepoMDMetaHash.store_repoMD_hash, self._repoMD_list)
 
     def postInstall(self):
         """Perform post-installation tasks."""
@@ -1391,11 +2081,12 @@ class RepoMDMetaHash(object):
     """Class that holds hash of a repomd.xml file content from a repository.
     This class can test availability of this repository by comparing hashes.
     """
-    def __init__(self, dnf_payload, repo):
+    def __init__(self, dnf_payload, repo, session=None):
         self._repoId = repo.id
         self._method = dnf_payload.data.method
         self._urls = repo.baseurl
         self._repomd_hash = ""
+        self._session = session
 
     @property
     def repoMD_hash(self):
@@ -1439,7 +2130,8 @@ class RepoMDMetaHash(object):
                 log.info("Failed to parse proxy for test if repo available %s: %s",
                          proxy_url, e)
 
-        session = util.requests_session()
+        session = self._session or util.requests_session()
+        start_time = time.time()
 
         # Test all urls for this repo. If any of these is working it is enough.
         for url in self._urls:
@@ -1448,6 +2140,8 @@ class RepoMDMetaHash(object):
                                      proxies=proxies, verify=sslverify)
                 if result.ok:
                     repomd = result.text
+                    log.debug("repo %s: repomd.xml downloaded from %s (%1.1f s)",
+                              self._repoId, url, time.time() - start_time)
                     break
                 else:
                     log.debug("Server returned %i code when downloading repomd", result.status_code)
@@ -28,9 +28,11 @@
 
 """
 import os
+import re
 import stat
-from time import sleep
-from threading import Lock
+import subprocess
+import time
+from threading import Thread
 import requests
 
 from pyanaconda.core.configuration.anaconda import conf
@@ -38,33 +40,207 @@ from pyanaconda.core.util import ProxyString, ProxyStringError
 import hashlib
 import glob
 import functools
+import itertools
 
 from pyanaconda.payload import ImagePayload, PayloadSetupError, PayloadInstallError
 
-from pyanaconda.core.constants import INSTALL_TREE, THREAD_LIVE_PROGRESS
+from pyanaconda.core.constants import INSTALL_TREE
 from pyanaconda.core.constants import IMAGE_DIR, TAR_SUFFIX
 
 from pyanaconda.core import util
 
-from pyanaconda.anaconda_loggers import get_packaging_logger
+from pyanaconda.anaconda_loggers import get_packaging_logger, get_program_logger
 log = get_packaging_logger()
+program_log = get_program_logger()
 
 from pyanaconda.errors import errorHandler, ERROR_RAISE
 from pyanaconda.progress import progressQ
 from blivet.size import Size
 import blivet.util
-from pyanaconda.threading import threadMgr, AnacondaThread
 from pyanaconda.core.i18n import _
-from pyanaconda.payload import versionCmp
+from pyanaconda.payload import versionCmp, run_for_kernels
+
+# Size of the chunks used to download and check the live image.
+IMAGE_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Options of tar used to extract the live image.
+# Preserve ACL's, xattrs, and SELinux context.
+TAR_EXTRACT_OPTIONS = [
+    "--selinux", "--acls", "--xattrs", "--xattrs-include", "*",
+    "--exclude", "/dev/", "--exclude", "/proc/",
+    "--exclude", "/sys/", "--exclude", "/run/", "--exclude", "/boot/*rescue*",
+    "--exclude", "/etc/machine-id"
+]
+
+# Options of tar required to read archives with the given magic bytes from a pipe.
+TAR_MAGIC_DECOMPRESS_OPTIONS = {
+    b"\x1f\x8b": "--gzip",
+    b"BZh": "--bzip2",
+    b"\xfd7zXZ\x00": "--xz",
+}
+
+# Number of the first bytes of the archive enough to recognize its magic bytes.
+TAR_MAGIC_SIZE = 8
+
+# Output of rsync --info=progress2, for example:
+#   1,238,099,968  45%  118.09MB/s    0:00:10 (xfr#12345, ir-chk=1000/20000)
+RSYNC_PROGRESS_RE = re.compile(r"^([\d,.']+)\s+\d+%")
+
+
+def _parse_rsync_progress(line):
+    """ Parse a line of the rsync progress output.
+
+        :param line: a line of the output
+        :return: a number of transferred bytes or None
+    """
+    match = RSYNC_PROGRESS_RE.match(line)
+    if not match:
+        return None
+
+    return int(re.sub(r"\D", "", match.group(1)))
+
+
+def _get_tar_magic_decompress_option(header):
+    """ Get the option of tar required to read the archive from a pipe.
+
+        :param header: the first bytes of the archive
+        :return: a decompression option of tar or None
+    """
+    return next((option for magic, option in TAR_MAGIC_DECOMPRESS_OPTIONS.items()
+                 if header.startswith(magic)), None)
+
+
+def _get_tar_decompress_option(path):
+    """ Get the option of tar required to read the archive from a pipe.
+
+        :param path: a path to the archive
+        :return: a decompression option of tar or None
+    """
+    with open(path, "rb") as f:
+        header = f.read(TAR_MAGIC_SIZE)
+
+    return _get_tar_magic_decompress_option(header)
+
+
+def _read_chunks(path):
+    """ Read the file in chunks.
+
+        :param path: a path to the file
+        :return: a generator of chunks of the file
+    """
+    with open(path, "rb") as f:
+        for buf in iter(functools.partial(f.read, IMAGE_CHUNK_SIZE), b""):
+            yield buf
+
+
+def _format_time(seconds):
+    """ Format the time in seconds as [h:]mm:ss. """
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+
+    if hours:
+        return "%d:%02d:%02d" % (hours, minutes, seconds)
+
+    return "%d:%02d" % (minutes, seconds)
+
+
+class InstallProgress(object):
+    """ Provide methods for installation progress reporting.
+
+        The progress is based on the number of bytes copied by rsync
+        or tar. The throughput and the estimated remaining time are
+        reported with the percentage, so a stalled installation can
+        be detected.
+    """
+
+    # Minimal time between two reports of the same percentage in seconds.
+    REPORT_INTERVAL = 1
+
+    def __init__(self, total_size=None):
+        """ Create a new progress.
+
+            :param total_size: expected number of bytes to copy or None if unknown
+        """
+        self.total_size = total_size
+        self.bytes_copied = 0
+        self._start_time = time.monotonic()
+        self._last_time = 0
+        self._last_pct = -1
+
+    @property
+    def pct(self):
+        """ Percentage of the copied bytes or None if unknown. """
+        if not self.total_size:
+            return None
+
+        return min(100, int(100 * self.bytes_copied / self.total_size))
+
+    @property
+    def throughput(self):
+        """ Average throughput in bytes per second. """
+        elapsed = time.monotonic() - self._start_time
+        if elapsed <= 0:
+            return 0
+
+        return self.bytes_copied / elapsed
+
+    @property
+    def eta(self):
+        """ Estimated remaining time in seconds or None if unknown. """
+        throughput = self.throughput
+        if not self.total_size or not throughput:
+            return None
+
+        return max(0, self.total_size - self.bytes_copied) / throughput
+
+    def update(self, bytes_copied):
+        """ Update the number of copied bytes.
+
+            :param bytes_copied: bytes copied so far
+            :type bytes_copied: int
+        """
+        self.bytes_copied = bytes_copied
+        now = time.monotonic()
+        pct = self.pct
+
+        if pct == self._last_pct and now - self._last_time < self.REPORT_INTERVAL:
+            return
+
+        self._last_pct = pct
+        self._last_time = now
+        self._report()
+
+    def _report(self):
+        msg = _("Installing software")
+
+        if self.pct is not None:
+            msg += " %d%%" % self.pct
+
+        vals = {
+            "copied": Size(self.bytes_copied),
+            "throughput": Size(int(self.throughput)),
+            "eta": _format_time(self.eta or 0)
+        }
+
+        if self.eta is not None:
+            msg += " " + _("(%(throughput)s/s, %(eta)s remaining)") % vals
+        else:
+            msg += " " + _("(%(copied)s, %(throughput)s/s)") % vals
+
+        progressQ.send_message(msg)
+
+    def end(self):
+        """ Installation complete """
+        elapsed = time.monotonic() - self._start_time
+        log.info("Copied %s in %s (%s/s)", Size(self.bytes_copied),
+                 _format_time(elapsed), Size(int(self.throughput)))
+        progressQ.send_message(_("Installing software") + (" %d%%") % (100,))
+
 
 class LiveImagePayload(ImagePayload):
     """ A LivePayload copies the source image onto the target system. """
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # Used to adjust size of sysroot when files are already present
-        self._adj_size = 0
-        self.pct = 0
-        self.pct_lock = None
         self.source_size = 1
 
         self._kernelVersionList = []
@@ -105,27 +281,30 @@ class LiveImagePayload(ImagePayload):
         super().preInstall()
         progressQ.send_message(_("Installing software") + (" %d%%") % (0,))
 
-    def progress(self):
-        """Monitor the amount of disk space used on the target and source and
-           update the hub's progress bar.
+    def _run_with_progress(self, cmd, args, parse_line, progress):
+        """ Run the command and report the progress parsed from its output.
+
+            The output is read in real time. Both new lines and carriage
+            returns are treated as line endings. Lines that don't contain
+            any progress information are logged.
+
+            :param cmd: the command to run
+            :param args: the argument list
+            :param parse_line: a function that returns number of copied bytes or None
+            :param progress: an instance of InstallProgress
+            :return: the return code of the command
         """
-        mountpoints = self.storage.mountpoints.copy()
-        last_pct = -1
-        while self.pct < 100:
-            dest_size = 0
-            for mnt in mountpoints:
-                mnt_stat = os.statvfs(util.getSysroot() + mnt)
-                dest_size += mnt_stat.f_frsize * (mnt_stat.f_blocks - mnt_stat.f_bfree)
-            if dest_size >= self._adj_size:
-                dest_size -= self._adj_size
-
-            pct = int(100 * dest_size / self.source_size)
-            if pct != last_pct:
-                with self.pct_lock:
-                    self.pct = pct
-                last_pct = pct
-                progressQ.send_message(_("Installing software") + (" %d%%") % (min(100, self.pct),))
-            sleep(0.777)
+        def process_line(line):
+            if not line:
+                return
+
+            bytes_copied = parse_line(line)
+            if bytes_copied is None:
+                program_log.info(line)
+            else:
+                progress.update(bytes_copied)
+
+        return util.execWithCallback(cmd, args, process_line)
 
     def install(self):
         """ Install the payload. """
@@ -133,22 +312,21 @@ class LiveImagePayload(ImagePayload):
         if self.source_size <= 0:
             raise PayloadInstallError("Nothing to install")
 
-        self.pct_lock = Lock()
-        self.pct = 0
-        threadMgr.add(AnacondaThread(name=THREAD_LIVE_PROGRESS,
-                                     target=self.progress))
+        progress = InstallProgress(self.source_size)
 
         cmd = "rsync"
         # preserve: permissions, owners, groups, ACL's, xattrs, times,
         #           symlinks, hardlinks
         # go recursively, include devices and special files, don't cross
         # file system boundaries
-        args = ["-pogAXtlHrDx", "--exclude", "/dev/", "--exclude", "/proc/",
+        # report the total progress of the transfer
+        args = ["-pogAXtlHrDx", "--info=progress2",
+                "--exclude", "/dev/", "--exclude", "/proc/",
                 "--exclude", "/sys/", "--exclude", "/run/", "--exclude", "/boot/*rescue*",
                 "--exclude", "/boot/loader/", "--exclude", "/boot/efi/loader/",
                 "--exclude", "/etc/machine-id", INSTALL_TREE + "/", util.getSysroot()]
         try:
-            rc = util.execWithRedirect(cmd, args)
+            rc = self._run_with_progress(cmd, args, _parse_rsync_progress, progress)
         except (OSError, RuntimeError) as e:
             msg = None
             err = str(e)
@@ -163,10 +341,7 @@ class LiveImagePayload(ImagePayload):
             if errorHandler.cb(exn) == ERROR_RAISE:
                 raise exn
 
-        # Wait for progress thread to finish
-        with self.pct_lock:
-            self.pct = 100
-        threadMgr.wait(THREAD_LIVE_PROGRESS)
+        progress.end()
 
         # Live needs to create the rescue image before bootloader is written
         if os.path.exists(util.getSysroot() + "/usr/sbin/new-kernel-pkg"):
@@ -175,19 +350,25 @@ class LiveImagePayload(ImagePayload):
             log.warning("new-kernel-pkg does not exist - grubby wasn't installed?")
             useNKP = False
 
-        for kernel in self.kernelVersionList:
+        def generate_rescue_image(kernel):
             log.info("Generating rescue image for %s", kernel)
             if useNKP:
-                util.execInSysroot("new-kernel-pkg",
-                                   ["--rpmposttrans", kernel])
+                return util.execInSysroot("new-kernel-pkg",
+                                          ["--rpmposttrans", kernel])
             else:
                 files = glob.glob(util.getSysroot() + "/etc/kernel/postinst.d/*")
                 srlen = len(util.getSysroot())
                 files = sorted([f[srlen:] for f in files
                                 if os.access(f, os.X_OK)])
+                rc = 0
                 for file in files:
-                    util.execInSysroot(file,
-                                       [kernel, "/boot/vmlinuz-%s" % kernel])
+                    rc = util.execInSysroot(file,
+                                            [kernel, "/boot/vmlinuz-%s" % kernel]) or rc
+                return rc
+
+        # There is only one rescue image and one bootloader configuration,
+        # so the kernels have to be processed one by one.
+        run_for_kernels(self.kernelVersionList, generate_rescue_image, max_workers=1)
 
     def postInstall(self):
         """ Perform post-installation tasks. """
@@ -269,6 +450,7 @@ class LiveImageKSPayload(LiveImagePayload):
         super().__init__(*args, **kwargs)
         self._min_size = 0
         self._proxies = {}
+        self._image_checksum = None
         self.image_path = util.getSysroot() + "/disk.img"
 
     @property
@@ -276,6 +458,13 @@ class LiveImageKSPayload(LiveImagePayload):
         """ Return True if the url ends with a tar suffix """
         return any(self.data.method.url.endswith(suffix) for suffix in TAR_SUFFIX)
 
+    @property
+    def is_streamed(self):
+        """ Return True if the tar archive should be extracted while downloaded """
+        return conf.payload.stream_tar_image \
+            and self.is_tarfile \
+            and not self.data.method.url.startswith("file://")
+
     def _setup_url_image(self):
         """ Check to make sure the url is available and estimate the space
             needed to download and install it.
@@ -297,8 +486,10 @@ class LiveImageKSPayload(LiveImagePayload):
             # At this point we know we can get the image and what its size is
             # Make a guess as to minimum size needed:
             # Enough space for image and image * 3
+            # The streamed image is not stored, so image * 3 is enough.
             if response.headers.get('content-length'):
-                self._min_size = int(response.headers.get('content-length')) * 4
+                factor = 3 if self.is_streamed else 4
+                self._min_size = int(response.headers.get('content-length')) * factor
         except IOError as e:
             log.error("Error opening liveimg: %s", e)
             error = e
@@ -341,10 +532,17 @@ class LiveImageKSPayload(LiveImagePayload):
         ImagePayload.unsetup(self)
 
     def _preInstall_url_image(self):
-        """ Download the image using Requests with progress reporting"""
+        """ Download the image using Requests with progress reporting
+
+            If the checksum of the image is required, it is calculated
+            from the downloaded data, so the image doesn't have to be
+            read again.
+        """
 
         error = None
         progress = DownloadProgress()
+        sha256 = hashlib.sha256() if self.data.method.checksum else None
+        self._image_checksum = None
         try:
             log.info("Starting image download")
             with open(self.image_path, "wb") as f:
@@ -352,10 +550,13 @@ class LiveImageKSPayload(LiveImagePayload):
                 response = self._session.get(self.data.method.url, proxies=self._proxies, verify=ssl_verify, stream=True)
                 total_length = response.headers.get('content-length')
                 if total_length is None:  # no content length header
-                    # just download the file in one go and fake the progress reporting once done
+                    # download the file without the progress reporting and fake it once done
                     log.warning("content-length header is missing for the installation image, "
                                 "download progress reporting will not be available")
-                    f.write(response.content)
+                    for buf in response.iter_content(IMAGE_CHUNK_SIZE):
+                        f.write(buf)
+                        if sha256:
+                            sha256.update(buf)
                     size = f.tell()
                     progress.start(self.data.method.url, size)
                     progress.end(size)
@@ -363,10 +564,11 @@ class LiveImageKSPayload(LiveImagePayload):
                     # requests return headers as strings, so convert total_length to int
                     progress.start(self.data.method.url, int(total_length))
                     bytes_read = 0
-                    for buf in response.iter_content(1024 * 1024):  # 1 MB chunks
+                    for buf in response.iter_content(IMAGE_CHUNK_SIZE):
                         if buf:
                             f.write(buf)
-                            f.flush()
+                            if sha256:
+                                sha256.update(buf)
                             bytes_read += len(buf)
                             progress.update(bytes_read)
                     progress.end(bytes_read)
@@ -378,9 +580,22 @@ class LiveImageKSPayload(LiveImagePayload):
             if not os.path.exists(self.image_path):
                 error = "Failed to download %s, file doesn't exist" % self.data.method.url
                 log.error(error)
+            elif sha256:
+                self._image_checksum = sha256.hexdigest()
 
         return error
 
+    def _calculate_image_checksum(self):
+        """ Calculate the sha256 checksum of the image file."""
+        sha256 = hashlib.sha256()
+        with open(self.image_path, "rb") as f:
+            while True:
+                data = f.read(IMAGE_CHUNK_SIZE)
+                if not data:
+                    break
+                sha256.update(data)
+        return sha256.hexdigest()
+
     def preInstall(self):
         """ Get image and loopback mount it.
 
@@ -392,7 +607,11 @@ class LiveImageKSPayload(LiveImagePayload):
             If it is a file:// source then use the file directly.
         """
         error = None
-        if self.data.method.url.startswith("file://"):
+        self._image_checksum = None
+        if self.is_streamed:
+            # The image is downloaded and extracted in install().
+            return
+        elif self.data.method.url.startswith("file://"):
             self.image_path = self.data.method.url[7:]
         else:
             error = self._preInstall_url_image()
@@ -402,19 +621,9 @@ class LiveImageKSPayload(LiveImagePayload):
             if errorHandler.cb(exn) == ERROR_RAISE:
                 raise exn
 
-        # Used to make install progress % look correct
-        self._adj_size = os.stat(self.image_path)[stat.ST_SIZE]
-
         if self.data.method.checksum:
             progressQ.send_message(_("Checking image checksum"))
-            sha256 = hashlib.sha256()
-            with open(self.image_path, "rb") as f:
-                while True:
-                    data = f.read(1024 * 1024)
-                    if not data:
-                        break
-                    sha256.update(data)
-            filesum = sha256.hexdigest()
+            filesum = self._image_checksum or self._calculate_image_checksum()
             log.debug("sha256 of %s is %s", self.data.method.url, filesum)
 
             if util.lowerASCII(self.data.method.checksum) != filesum:
@@ -481,47 +690,160 @@ class LiveImageKSPayload(LiveImagePayload):
             super().install()
             return
 
-        # Use 2x the archive's size to estimate the size of the install
-        # This is used to drive the progress display
-        self.source_size = os.stat(self.image_path)[stat.ST_SIZE] * 2
+        if self.is_streamed:
+            err = self._install_streamed_tar()
+        else:
+            err = self._install_tar()
 
-        self.pct_lock = Lock()
-        self.pct = 0
-        threadMgr.add(AnacondaThread(name=THREAD_LIVE_PROGRESS,
-                                     target=self.progress))
+        if err:
+            exn = PayloadInstallError(err)
+            if errorHandler.cb(exn) == ERROR_RAISE:
+                raise exn
 
-        cmd = "tar"
-        # preserve: ACL's, xattrs, and SELinux context
-        args = ["--selinux", "--acls", "--xattrs", "--xattrs-include", "*",
-                "--exclude", "/dev/", "--exclude", "/proc/",
-                "--exclude", "/sys/", "--exclude", "/run/", "--exclude", "/boot/*rescue*",
-                "--exclude", "/etc/machine-id", "-xaf", self.image_path, "-C", util.getSysroot()]
+        # Live needs to create the rescue image before bootloader is written
+        def generate_rescue_image(kernel):
+            log.info("Generating rescue image for %s", kernel)
+            return util.execInSysroot("new-kernel-pkg",
+                                      ["--rpmposttrans", kernel])
+
+        run_for_kernels(self.kernelVersionList, generate_rescue_image, max_workers=1)
+
+    def _extract_tar(self, chunks, decompress, progress):
+        """ Extract the tar archive from the chunks of data.
+
+            The data are piped to tar and the progress is based on
+            the number of bytes of the archive written to the pipe.
+
+            :param chunks: an iterable of chunks of the archive
+            :param decompress: a decompression option of tar or None
+            :param progress: an instance of InstallProgress
+            :return: the return code of tar
+            :raise BrokenPipeError: if tar exited before the archive was read
+        """
+        args = TAR_EXTRACT_OPTIONS + ["-x", "-f", "-", "-C", util.getSysroot()]
+        if decompress:
+            args.append(decompress)
+
+        proc = util.startProgram(["tar"] + args, stdin=subprocess.PIPE)
+
+        # Log the output of tar, so the pipe never fills up.
+        def log_output():
+            for line in proc.stdout:
+                program_log.info(line.decode("utf-8", "replace").strip())
+
+        reader = Thread(name="AnaTarOutputThread", target=log_output)
+        reader.start()
+
+        bytes_read = 0
         try:
-            rc = util.execWithRedirect(cmd, args)
-        except (OSError, RuntimeError) as e:
-            msg = None
+            for buf in chunks:
+                proc.stdin.write(buf)
+                bytes_read += len(buf)
+                progress.update(bytes_read)
+        finally:
+            try:
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+
+            rc = proc.wait()
+            reader.join()
+            log.info("tar exited with code %d", rc)
+
+        return rc
+
+    def _install_tar(self):
+        """ Extract the downloaded tar archive.
+
+            :return: an error message or None
+        """
+        # The progress is based on the size of the compressed archive.
+        self.source_size = os.stat(self.image_path)[stat.ST_SIZE]
+        progress = InstallProgress(self.source_size)
+
+        try:
+            decompress = _get_tar_decompress_option(self.image_path)
+            rc = self._extract_tar(_read_chunks(self.image_path), decompress, progress)
+        except BrokenPipeError:
+            err = "tar exited before the liveimg was extracted"
+            log.error(err)
+        except OSError as e:
             err = str(e)
             log.error(err)
         else:
-            err = None
-            msg = "%s exited with code %d" % (cmd, rc)
-            log.info(msg)
+            err = "tar exited with code %d" % rc if rc != 0 else None
+
+        progress.end()
+        return err
+
+    def _install_streamed_tar(self):
+        """ Download the tar archive and extract it at the same time.
+
+            The downloaded data are piped to tar and the checksum of
+            the archive is calculated on the fly.
+
+            :return: an error message or None
+        """
+        url = self.data.method.url
+        ssl_verify = not self.data.method.noverifyssl
+        sha256 = hashlib.sha256() if self.data.method.checksum else None
+
+        try:
+            log.info("Starting image download and extraction")
+            response = self._session.get(url, proxies=self._proxies, verify=ssl_verify, stream=True)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            log.error("Error extracting liveimg: %s", e)
+            return str(e)
+
+        # The progress is based on the size of the downloaded archive
+        total_length = response.headers.get('content-length')
+        progress = InstallProgress(int(total_length) if total_length else None)
+
+        def download():
+            for buf in response.iter_content(IMAGE_CHUNK_SIZE):
+                if sha256:
+                    sha256.update(buf)
+                yield buf
+
+        err = None
+        rc = 0
+        try:
+            # The compression is detected from the first bytes of the archive.
+            chunks = download()
+            head = []
+            for buf in chunks:
+                head.append(buf)
+                if sum(map(len, head)) >= TAR_MAGIC_SIZE:
+                    break
+
+            decompress = _get_tar_magic_decompress_option(b"".join(head))
+            rc = self._extract_tar(itertools.chain(head, chunks), decompress, progress)
+        except requests.exceptions.RequestException as e:
+            err = "Error downloading liveimg: %s" % e
+        except BrokenPipeError:
+            err = "tar exited before the liveimg was extracted"
+        except OSError as e:
+            err = "Error extracting liveimg: %s" % e
+
+        progress.end()
 
         if err:
-            exn = PayloadInstallError(err or msg)
-            if errorHandler.cb(exn) == ERROR_RAISE:
-                raise exn
+            log.error(err)
+            return err
 
-        # Wait for progress thread to finish
-        with self.pct_lock:
-            self.pct = 100
-        threadMgr.wait(THREAD_LIVE_PROGRESS)
+        if rc != 0:
+            return "tar exited with code %d" % rc
 
-        # Live needs to create the rescue image before bootloader is written
-        for kernel in self.kernelVersionList:
-            log.info("Generating rescue image for %s", kernel)
-            util.execInSysroot("new-kernel-pkg",
-                               ["--rpmposttrans", kernel])
+        if sha256:
+            filesum = sha256.hexdigest()
+            log.debug("sha256 of %s is %s", url, filesum)
+
+            if util.lowerASCII(self.data.method.checksum) != filesum:
+                log.error("%s does not match checksum.", self.data.method.checksum)
+                return "Checksum of image does not match"
+
+        return None
 
     def postInstall(self):
         """ Unmount and remove image
@@ -554,6 +876,13 @@ class LiveImageKSPayload(LiveImagePayload):
         if not self.is_tarfile:
             return super().kernelVersionList
 
+        # The streamed archive is not stored, look at the extracted files
+        if self.is_streamed:
+            files = glob.glob(util.getSysroot() + "/boot/vmlinuz-*")
+            return sorted((f.split("/")[-1][8:] for f in files
+                           if os.path.isfile(f) and "-rescue-" not in f),
+                          key=functools.cmp_to_key(versionCmp))
+
         import tarfile
         with tarfile.open(self.image_path) as archive:
             names = archive.getnames()
@@ -0,0 +1,182 @@
+# Persistent content-addressed cache of downloaded packages.
+#
+# Copyright (C) 2019  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import os
+import shutil
+import tempfile
+
+from pyanaconda.anaconda_loggers import get_packaging_logger
+log = get_packaging_logger()
+
+__all__ = ["PackageCache"]
+
+
+class PackageCache(object):
+    """Persistent cache of packages keyed by their checksums.
+
+    The cache is a directory that can be shared by several installations,
+    for example a local disk, an NFS export or a bind-mounted directory.
+    The packages are stored as <checksum type>/<prefix>/<checksum>.rpm.
+
+    The access time of a package is tracked by the modification time of
+    its file, so the least recently used packages can be evicted without
+    any additional index that would have to be locked.
+    """
+
+    def __init__(self, path, max_size):
+        """Create a new package cache.
+
+        :param path: a path to the cache directory
+        :param max_size: a maximal size of the cache in bytes
+        """
+        self._path = path
+        self._max_size = max_size
+
+    @property
+    def path(self):
+        """The path to the cache directory."""
+        return self._path
+
+    def _get_cache_path(self, checksum_type, checksum):
+        """Get a path to the cached package."""
+        return os.path.join(self._path, checksum_type, checksum[:2], checksum + ".rpm")
+
+    def restore(self, checksum_type, checksum, destination):
+        """Restore a package from the cache.
+
+        The cached package is not verified here. DNF verifies the checksum
+        of every local package before it is used and downloads a corrupted
+        package again, so it can replace the corrupted one in the cache.
+
+        :param checksum_type: a type of the checksum, for example sha256
+        :param checksum: a hex digest of the package
+        :param destination: a path to the restored package
+        :return: True if the package was restored, otherwise False
+        """
+        cache_path = self._get_cache_path(checksum_type, checksum)
+
+        if not os.path.exists(cache_path):
+            return False
+
+        try:
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            self._link_or_copy(cache_path, destination)
+
+            # Mark the package as recently used.
+            os.utime(cache_path)
+        except OSError as e:
+            log.warning("Failed to restore %s from the cache: %s", cache_path, e)
+            return False
+
+        return True
+
+    def store(self, checksum_type, checksum, source):
+        """Store a package in the cache.
+
+        The package should be verified by DNF. A different package
+        with the same checksum in the cache is replaced, because it
+        is corrupted.
+
+        :param checksum_type: a type of the checksum, for example sha256
+        :param checksum: a hex digest of the package
+        :param source: a path to the package
+        :return: True if the package was stored, otherwise False
+        """
+        cache_path = self._get_cache_path(checksum_type, checksum)
+
+        try:
+            if os.path.exists(cache_path) and os.path.samefile(source, cache_path):
+                return True
+
+            cache_dir = os.path.dirname(cache_path)
+            os.makedirs(cache_dir, exist_ok=True)
+
+            # Create the package in a temporary file first, so other
+            # installations never see an incomplete package.
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix=".", suffix=".part")
+            os.close(fd)
+
+            try:
+                self._link_or_copy(source, tmp_path)
+                os.rename(tmp_path, cache_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+        except OSError as e:
+            log.warning("Failed to store %s in the cache: %s", source, e)
+            return False
+
+        return True
+
+    def evict(self):
+        """Remove the least recently used packages from the cache.
+
+        The packages are removed until the size of the cache
+        is not bigger than the maximal size.
+
+        :return: a number of removed packages
+        """
+        packages = []
+        total_size = 0
+
+        for root, _dirs, files in os.walk(self._path):
+            for name in files:
+                if not name.endswith(".rpm"):
+                    continue
+
+                path = os.path.join(root, name)
+
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+
+                packages.append((stat.st_mtime, stat.st_size, path))
+                total_size += stat.st_size
+
+        removed = 0
+
+        for _mtime, size, path in sorted(packages):
+            if total_size <= self._max_size:
+                break
+
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # The package was removed by another installation.
+                pass
+
+            total_size -= size
+            removed += 1
+
+        if removed:
+            log.info("Removed %d packages from the package cache %s.", removed, self._path)
+
+        return removed
+
+    @staticmethod
+    def _link_or_copy(source, destination):
+        """Hard link the file if possible, otherwise copy it."""
+        if os.path.exists(destination):
+            os.remove(destination)
+
+        try:
+            os.link(source, destination)
+        except OSError:
+            shutil.copyfile(source, destination)
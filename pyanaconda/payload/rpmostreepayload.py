@@ -20,9 +20,11 @@
 
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from subprocess import CalledProcessError
 
 from pyanaconda.core import util
+from pyanaconda.core.constants import MOUNT_DIR
 from pyanaconda.flags import flags
 from pyanaconda.core.i18n import _
 from pyanaconda.localization import get_locale_map_from_ostree, strip_codeset_and_modifier
@@ -39,18 +41,22 @@ from blivet.util import umount
 from pyanaconda.anaconda_loggers import get_module_logger
 log = get_module_logger(__name__)
 
-from pyanaconda.payload import ArchivePayload, PayloadInstallError
+from pyanaconda.payload import ArchivePayload, PayloadInstallError, PayloadSetupError
 from pyanaconda.bootloader.efi import EFIBase
 from pyanaconda.core.configuration.anaconda import conf
 from pyanaconda.core.glib import format_size_full, create_new_context, Variant, GError
 import pyanaconda.errors as errors
 
+# Mount points of local repositories on NFS.
+OSTREE_REPO_MOUNT_DIR = MOUNT_DIR + "/ostree-repo-%d"
+
 class RPMOSTreePayload(ArchivePayload):
     """ A RPMOSTreePayload deploys a tree (possibly with layered packages) onto the target system. """
     def __init__(self, data):
         super().__init__(data)
         self._remoteOptions = None
         self._internal_mounts = []
+        self._local_repo_mounts = []
         self._locale_map = None
 
     @property
@@ -145,6 +151,8 @@ class RPMOSTreePayload(ArchivePayload):
         ostree_boot_source = util.getSysroot() + '/usr/lib/ostree-boot'
         if not os.path.isdir(ostree_boot_source):
             ostree_boot_source = util.getSysroot() + '/boot'
+        copies = []
+
         for fname in os.listdir(ostree_boot_source):
             srcpath = os.path.join(ostree_boot_source, fname)
             destpath = os.path.join(physboot, fname)
@@ -156,23 +164,99 @@ class RPMOSTreePayload(ArchivePayload):
             # Special handling for EFI; first, we only want to copy
             # the data if the system is actually EFI (simulating grub2-efi
             # being installed).  Second, as it's a mount point that's
-            # expected to already exist (so if we used copytree, we'd
-            # traceback).  If it doesn't, we're not on a UEFI system,
-            # so we don't want to copy the data.
+            # expected to already exist, we copy only its content.
+            # If it doesn't, we're not on a UEFI system, so we don't
+            # want to copy the data.
             if fname == 'efi':
                 if is_efi:
                     for subname in os.listdir(srcpath):
                         sub_srcpath = os.path.join(srcpath, subname)
                         sub_destpath = os.path.join(destpath, subname)
-                        self._safeExecWithRedirect('cp', ['-r', '-p', sub_srcpath, sub_destpath])
+                        copies.append((sub_srcpath, sub_destpath))
             else:
-                log.info("Copying bootloader data: %s", fname)
-                self._safeExecWithRedirect('cp', ['-r', '-p', srcpath, destpath])
+                copies.append((srcpath, destpath))
+
+        # Copy the trees at the same time, the targets are often slow devices
+        # where the latency of the individual writes dominates.
+        if copies:
+            with ThreadPoolExecutor(max_workers=len(copies)) as executor:
+                futures = [executor.submit(self._copyBootloaderPath, src, dest)
+                           for src, dest in copies]
+                for future in futures:
+                    future.result()
+
+        # Unfortunate hack, see https://github.com/rhinstaller/anaconda/issues/1188
+        efi_grubenv_link = physboot + '/grub2/grubenv'
+        if not is_efi and os.path.islink(efi_grubenv_link):
+            os.unlink(efi_grubenv_link)
+
+    @staticmethod
+    def _copyBootloaderPath(src, dest):
+        """Copy a file or a directory tree of the bootloader data."""
+        log.info("Copying bootloader data: %s", src)
+
+        if os.path.isdir(src) and not os.path.islink(src):
+            util.copy_tree(src, dest)
+        elif os.path.islink(src):
+            if os.path.lexists(dest):
+                os.unlink(dest)
+            os.symlink(os.readlink(src), dest)
+        else:
+            util.copy_file(src, dest)
+
+    def _getLocalRepos(self):
+        """Get paths to the local repositories with objects.
+
+        Repositories on NFS are mounted first.
+
+        :return: a list of paths
+        """
+        local_repos = []
+
+        for path in conf.payload.ostree_local_repos:
+            if path.startswith("nfs://"):
+                (server, nfs_path) = path[6:].split(":", 1)
+                mountpoint = OSTREE_REPO_MOUNT_DIR % len(self._local_repo_mounts)
+
+                try:
+                    self._setupNFS(mountpoint, server, nfs_path, None)
+                except PayloadSetupError as e:
+                    log.error("Failed to mount the OSTree repository %s: %s", path, e)
+                    continue
+
+                self._local_repo_mounts.append(mountpoint)
+                path = mountpoint
+
+            if os.path.isdir(path + '/objects'):
+                local_repos.append(path)
+
+        return local_repos
+
+    def _getPullOptions(self, ref):
+        """Get the options of the pull of the ref.
+
+        The objects found in the local repositories are not downloaded.
+
+        :param ref: a name of the ref
+        :return: a dictionary of the pull options
+        """
+        from gi.repository import OSTree
+        pull_opts = {'refs': Variant('as', [ref])}
+
+        # If we're doing a kickstart, we can at least use the content as a reference:
+        # See <https://github.com/rhinstaller/anaconda/issues/1117>
+        # The default local repositories are used by <https://pagure.io/fedora-lorax-templates>
+        # and <https://github.com/projectatomic/rpm-ostree-toolbox/>
+        local_repos = self._getLocalRepos()
+
+        if local_repos and OSTree.check_version(2017, 8):
+            log.info("Using local OSTree repositories: %s", ", ".join(local_repos))
+            pull_opts['localcache-repos'] = Variant('as', local_repos)
+
+        if not conf.payload.ostree_static_deltas:
+            pull_opts['disable-static-deltas'] = Variant('b', True)
 
-            # Unfortunate hack, see https://github.com/rhinstaller/anaconda/issues/1188
-            efi_grubenv_link = physboot + '/grub2/grubenv'
-            if not is_efi and os.path.islink(efi_grubenv_link):
-                os.unlink(efi_grubenv_link)
+        return pull_opts
 
     def install(self):
         mainctx = create_new_context()
@@ -207,9 +291,15 @@ class RPMOSTreePayload(ArchivePayload):
         if flags.noverifyssl:
             self._remoteOptions['tls-permissive'] = Variant('b', True)
 
+        # Download the objects from the mirror only during the installation.
+        remote_options = dict(self._remoteOptions)
+
+        if conf.payload.ostree_content_url:
+            remote_options['contenturl'] = Variant('s', conf.payload.ostree_content_url)
+
         repo.remote_change(None, OSTree.RepoRemoteChange.ADD_IF_NOT_EXISTS,
                            ostreesetup.remote, ostreesetup.url,
-                           Variant('a{sv}', self._remoteOptions),
+                           Variant('a{sv}', remote_options),
                            cancellable)
 
         # Variable substitute the ref: https://pagure.io/atomic-wg/issue/299
@@ -221,16 +311,7 @@ class RPMOSTreePayload(ArchivePayload):
         progress = OSTree.AsyncProgress.new()
         progress.connect('changed', self._pullProgressCb)
 
-        pull_opts = {'refs': Variant('as', [ref])}
-        # If we're doing a kickstart, we can at least use the content as a reference:
-        # See <https://github.com/rhinstaller/anaconda/issues/1117>
-        # The first path here is used by <https://pagure.io/fedora-lorax-templates>
-        # and the second by <https://github.com/projectatomic/rpm-ostree-toolbox/>
-        if OSTree.check_version(2017, 8):
-            for path in ['/ostree/repo', '/install/ostree/repo']:
-                if os.path.isdir(path + '/objects'):
-                    pull_opts['localcache-repos'] = Variant('as', [path])
-                    break
+        pull_opts = self._getPullOptions(ref)
 
         try:
             repo.pull_with_options(ostreesetup.remote,
@@ -394,12 +475,14 @@ class RPMOSTreePayload(ArchivePayload):
     def unsetup(self):
         super().unsetup()
 
-        for mount in reversed(self._internal_mounts):
+        for mount in reversed(self._internal_mounts + self._local_repo_mounts):
             try:
                 umount(mount)
             except CalledProcessError as e:
                 log.debug("unmounting %s failed: %s", mount, str(e))
 
+        self._local_repo_mounts = []
+
     def recreateInitrds(self):
         # For rpmostree payloads, we're replicating an initramfs from
         # a compose server, and should never be regenerating them
@@ -193,9 +193,9 @@ def update_storage_config(config):
 
     :param config: an instance of StorageDiscoveryConfig
     """
-    disk_init_proxy = STORAGE.get_proxy(DISK_INITIALIZATION)
-    config.clear_part_type = disk_init_proxy.InitializationMode
-    config.clear_part_disks = disk_init_proxy.DrivesToClear
-    config.clear_part_devices = disk_init_proxy.DevicesToClear
-    config.initialize_disks = disk_init_proxy.InitializeLabelsEnabled
-    config.zero_mbr = disk_init_proxy.FormatUnrecognizedEnabled
+    disk_init = STORAGE.get_properties_snapshot(DISK_INITIALIZATION)
+    config.clear_part_type = disk_init.InitializationMode
+    config.clear_part_disks = disk_init.DrivesToClear
+    config.clear_part_devices = disk_init.DevicesToClear
+    config.initialize_disks = disk_init.InitializeLabelsEnabled
+    config.zero_mbr = disk_init.FormatUnrecognizedEnabled
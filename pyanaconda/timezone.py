@@ -180,26 +180,50 @@ def get_preferred_timezone(territory):
 
     return timezones[0]
 
-def get_all_regions_and_timezones():
+# The catalog of timezones is created on the first use.
+_regions_and_timezones = None
+_valid_timezones = None
+
+def _get_regions_and_timezones():
     """
-    Get a dictionary mapping the regions to the list of their timezones.
+    Get the cached mapping of the regions to the sets of their timezones.
 
-    :rtype: dict
+    :rtype: OrderedDict
+
+    """
+
+    global _regions_and_timezones
+
+    if _regions_and_timezones is None:
+        result = OrderedDict()
+
+        for tz in pytz.common_timezones:
+            parts = tz.split("/", 1)
 
+            if len(parts) > 1:
+                if parts[0] not in result:
+                    result[parts[0]] = set()
+                result[parts[0]].add(parts[1])
+
+        result["Etc"] = set(ETC_ZONES)
+
+        _regions_and_timezones = OrderedDict(
+            (region, frozenset(zones)) for region, zones in result.items()
+        )
+
+    return _regions_and_timezones
+
+def get_all_regions_and_timezones():
     """
+    Get a dictionary mapping the regions to the list of their timezones.
 
-    result = OrderedDict()
+    The timezones of the regions are frozen sets shared by all callers.
 
-    for tz in pytz.common_timezones:
-        parts = tz.split("/", 1)
+    :rtype: dict
 
-        if len(parts) > 1:
-            if parts[0] not in result:
-                result[parts[0]] = set()
-            result[parts[0]].add(parts[1])
+    """
 
-    result["Etc"] = set(ETC_ZONES)
-    return result
+    return OrderedDict(_get_regions_and_timezones())
 
 def is_valid_timezone(timezone):
     """
@@ -210,9 +234,13 @@ def is_valid_timezone(timezone):
 
     """
 
-    etc_zones = ["Etc/" + zone for zone in ETC_ZONES]
+    global _valid_timezones
+
+    if _valid_timezones is None:
+        etc_zones = ["Etc/" + zone for zone in ETC_ZONES]
+        _valid_timezones = frozenset(list(pytz.common_timezones) + etc_zones)
 
-    return timezone in pytz.common_timezones + etc_zones
+    return timezone in _valid_timezones
 
 def get_timezone(timezone):
     """
@@ -664,14 +664,15 @@ class StorageSpoke(NormalSpoke, StorageCheckHandler):
         # empty (because of all child devices hidden)
         self._unhide_disks()
 
-        self.autopart = self._auto_part_observer.proxy.Enabled
+        auto_part = STORAGE.get_properties_snapshot(AUTO_PARTITIONING)
+        self.autopart = auto_part.Enabled
 
-        self.autoPartType = self._auto_part_observer.proxy.Type
+        self.autoPartType = auto_part.Type
         if self.autoPartType == AUTOPART_TYPE_DEFAULT:
             self.autoPartType = AUTOPART_TYPE_LVM
 
-        self.encrypted = self._auto_part_observer.proxy.Encrypted
-        self.passphrase = self._auto_part_observer.proxy.Passphrase
+        self.encrypted = auto_part.Encrypted
+        self.passphrase = auto_part.Passphrase
 
         self._previous_autopart = self.autopart
 
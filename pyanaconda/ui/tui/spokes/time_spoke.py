@@ -283,11 +283,10 @@ class TimeZoneSpoke(NormalTUISpoke):
 
         self.title = N_("Timezone settings")
         self._container = None
-        # it's stupid to call get_all_regions_and_timezones twice, but regions
-        # needs to be unsorted in order to display in the same order as the GUI
-        # so whatever
-        self._regions = list(timezone.get_all_regions_and_timezones().keys())
-        self._timezones = dict((k, sorted(v)) for k, v in timezone.get_all_regions_and_timezones().items())
+        # regions needs to be unsorted in order to display in the same order as the GUI
+        regions_and_timezones = timezone.get_all_regions_and_timezones()
+        self._regions = list(regions_and_timezones.keys())
+        self._timezones = dict((k, sorted(v)) for k, v in regions_and_timezones.items())
         self._lower_regions = [r.lower() for r in self._regions]
 
         self._zones = ["%s/%s" % (region, z) for region in self._timezones for z in self._timezones[region]]
@@ -128,32 +128,69 @@ def guess_username(fullname):
     username = strip_accents(username)
     return username
 
+class _AccountDatabase(object):
+    """Entries of the passwd or group file indexed by names and IDs.
+
+       The entries are returned as lists of fields, the same way as they
+       would be found by reading the file line by line.
+    """
+
+    def __init__(self, path):
+        self.by_name = {}
+        self.by_id = {}
+
+        with open(path, "r") as f:
+            for line in f:
+                fields = line.split(":")
+
+                # The first matching line wins, like in a linear scan.
+                self.by_name.setdefault(fields[0], fields)
+
+                if len(fields) > 2:
+                    self.by_id.setdefault(fields[2], fields)
+
 class Users(object):
+    def __init__(self):
+        # path -> (stamp, database)
+        self._databases = {}
+
+    def _getDatabase(self, path):
+        """Get the parsed passwd or group file.
+
+           The file is parsed again only if it was modified since
+           the last call.
+        """
+        stat = os.stat(path)
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        cached = self._databases.get(path)
+
+        if cached and cached[0] == stamp:
+            return cached[1]
+
+        database = _AccountDatabase(path)
+        self._databases[path] = (stamp, database)
+        return database
+
     def _getpwnam(self, user_name, root):
         """Like pwd.getpwnam, but is able to use a different root.
 
            Also just returns the pwd structure as a list, because of laziness.
         """
-        with open(root + "/etc/passwd", "r") as f:
-            for line in f:
-                fields = line.split(":")
-                if fields[0] == user_name:
-                    return fields
+        return self._getDatabase(root + "/etc/passwd").by_name.get(user_name)
 
-        return None
+    def _getpwuid(self, uid, root):
+        """Like pwd.getpwuid, but is able to use a different root.
+
+           Just returns the fields as a list of strings.
+        """
+        return self._getDatabase(root + "/etc/passwd").by_id.get(str(uid))
 
     def _getgrnam(self, group_name, root):
         """Like grp.getgrnam, but able to use a different root.
 
             Just returns the grp structure as a list, same reason as above.
         """
-        with open(root + "/etc/group", "r") as f:
-            for line in f:
-                fields = line.split(":")
-                if fields[0] == group_name:
-                    return fields
-
-        return None
+        return self._getDatabase(root + "/etc/group").by_name.get(group_name)
 
     def _getgrgid(self, gid, root):
         """Like grp.getgrgid, but able to use a different root.
@@ -161,15 +198,7 @@ class Users(object):
            Just returns the fields as a list of strings.
         """
         # Conver the probably-int GID to a string
-        gid = str(gid)
-
-        with open(root + "/etc/group", "r") as f:
-            for line in f:
-                fields = line.split(":")
-                if fields[2] == gid:
-                    return fields
-
-        return None
+        return self._getDatabase(root + "/etc/group").by_id.get(str(gid))
 
     @contextmanager
     def _ensureLoginDefs(self, root):
@@ -252,6 +281,14 @@ class Users(object):
                              available one is used.
         """
 
+        self._createUser(user_name, kwargs)
+
+    def _createUser(self, user_name, kwargs, passwords=None):
+        """Create a new user on the system.
+
+           If passwords is a list, the password of the user is not set,
+           but appended to the list instead.
+        """
         root = kwargs.get("root", util.getSysroot())
 
         if self.checkUserExists(user_name, root):
@@ -368,7 +405,109 @@ class Users(object):
         algo = kwargs.get("algo", None)
         lock = kwargs.get("lock", False)
 
-        self.setUserPassword(user_name, pw, crypted, lock, algo, root)
+        if passwords is None:
+            self.setUserPassword(user_name, pw, crypted, lock, algo, root)
+        else:
+            passwords.append((user_name, pw, crypted, lock, algo))
+
+    def createGroups(self, groups, root=None):
+        """Create new groups on the system.
+
+           All requests are checked against the group file and against
+           each other before any group is created.
+
+           :param groups: a list of tuples with a group name and a dictionary
+                          of the keyword arguments of createGroup
+           :param str root: The directory of the system to create the new groups in.
+                            Defaults to util.getSysroot().
+           :return: a list of ValueError exceptions of groups that were not created
+        """
+        root = root or util.getSysroot()
+        errors = []
+        names = set()
+        gids = set()
+
+        with self._ensureLoginDefs(root):
+            for group_name, kwargs in groups:
+                gid = kwargs.get("gid")
+
+                if group_name in names or self._getgrnam(group_name, root):
+                    errors.append(ValueError("Group %s already exists" % group_name))
+                    continue
+
+                if gid is not None and (str(gid) in gids or self._getgrgid(gid, root)):
+                    errors.append(ValueError("GID %s already exists" % gid))
+                    continue
+
+                names.add(group_name)
+                if gid is not None:
+                    gids.add(str(gid))
+
+            for group_name, kwargs in groups:
+                if group_name not in names:
+                    continue
+
+                # Create each group only once.
+                names.remove(group_name)
+
+                try:
+                    self.createGroup(group_name, **dict(kwargs, root=root))
+                except ValueError as e:
+                    errors.append(e)
+
+        return errors
+
+    def createUsers(self, users, root=None):
+        """Create new users on the system.
+
+           All requests are checked against the passwd file and against
+           each other before any user is created. The passwords of the
+           created users are set at once at the end.
+
+           :param users: a list of tuples with a user name and a dictionary
+                         of the keyword arguments of createUser
+           :param str root: The directory of the system to create the new users in.
+                            Defaults to util.getSysroot().
+           :return: a list of ValueError exceptions of users that were not created
+        """
+        root = root or util.getSysroot()
+        errors = []
+        names = set()
+        uids = set()
+        passwords = []
+
+        for user_name, kwargs in users:
+            uid = kwargs.get("uid")
+
+            if user_name in names or self._getpwnam(user_name, root):
+                errors.append(ValueError("User %s already exists" % user_name))
+                continue
+
+            if uid and (str(uid) in uids or self._getpwuid(uid, root)):
+                errors.append(ValueError("UID %s already exists" % uid))
+                continue
+
+            names.add(user_name)
+            if uid:
+                uids.add(str(uid))
+
+        with self._ensureLoginDefs(root):
+            try:
+                for user_name, kwargs in users:
+                    if user_name not in names:
+                        continue
+
+                    # Create each user only once.
+                    names.remove(user_name)
+
+                    try:
+                        self._createUser(user_name, dict(kwargs, root=root), passwords)
+                    except ValueError as e:
+                        errors.append(e)
+            finally:
+                self.setUserPasswords(passwords, root)
+
+        return errors
 
     def checkUserExists(self, username, root=None):
         if self._getpwnam(username, root):
@@ -377,9 +516,27 @@ class Users(object):
         return False
 
     def setUserPassword(self, username, password, isCrypted, lock, algo=None, root="/"):
-        # Only set the password if it is a string, including the empty string.
-        # Otherwise leave it alone (defaults to locked for new users) and reset sp_lstchg
-        if password or password == "":
+        self.setUserPasswords([(username, password, isCrypted, lock, algo)], root)
+
+    def setUserPasswords(self, passwords, root="/"):
+        """Set passwords of users.
+
+           The passwords are set by one call of chpasswd. The last password
+           change of every user is reset by its own call of chage, which
+           doesn't accept more users, so N users need N + 1 processes.
+
+           :param passwords: a list of tuples with a user name, a password,
+                             isCrypted, lock and algo, see setUserPassword
+           :param str root: The directory of the system with the users.
+        """
+        entries = []
+
+        for username, password, isCrypted, lock, algo in passwords:
+            # Only set the password if it is a string, including the empty string.
+            # Otherwise leave it alone (defaults to locked for new users) and reset sp_lstchg
+            if not password and password != "":
+                continue
+
             if password == "":
                 log.info("user account %s setup with no password", username)
             elif not isCrypted:
@@ -389,15 +546,20 @@ class Users(object):
                 password = "!" + password
                 log.info("user account %s locked", username)
 
+            entries.append("%s:%s\n" % (username, password))
+
+        if entries:
             proc = util.startProgram(["chpasswd", "-R", root, "-e"], stdin=subprocess.PIPE)
-            proc.communicate(("%s:%s\n" % (username, password)).encode("utf-8"))
+            proc.communicate("".join(entries).encode("utf-8"))
             if proc.returncode != 0:
                 raise OSError("Unable to set password for new user: status=%s" % proc.returncode)
 
         # Reset sp_lstchg to an empty string. On systems with no rtc, this
         # field can be set to 0, which has a special meaning that the password
-        # must be reset on the next login.
-        util.execWithRedirect("chage", ["-R", root, "-d", "", username])
+        # must be reset on the next login. The shadow file is not modified
+        # directly, so the locking and the auditing of chage are kept.
+        for username, *_rest in passwords:
+            util.execWithRedirect("chage", ["-R", root, "-d", "", username])
 
     def setRootPassword(self, password, isCrypted=False, isLocked=False, algo=None, root="/"):
         return self.setUserPassword("root", password, isCrypted, isLocked, algo, root)
@@ -0,0 +1,111 @@
+#
+# Copyright (C) 2019  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import unittest
+from mock import Mock
+
+from pyanaconda.dbus.connection import Connection
+
+
+class TestConnection(Connection):
+    """Connection with a mocked bus."""
+
+    def get_new_connection(self):
+        return Mock()
+
+
+class DBusConnectionTestCase(unittest.TestCase):
+    """Test DBus connections."""
+
+    def setUp(self):
+        self.message_bus = TestConnection()
+        self.bus = self.message_bus.connection
+        self.bus.get.side_effect = lambda *args: Mock()
+
+    def _get_watch_callbacks(self, service_name):
+        """Get the callbacks of the watched service."""
+        for call in self.bus.watch_name.call_args_list:
+            args = call[0]
+
+            if args[0] == service_name:
+                return args[2], args[3]
+
+        self.fail("Service {} is not watched.".format(service_name))
+
+    def proxy_cache_test(self):
+        """Test the cache of proxies."""
+        proxy = self.message_bus.get_proxy("my.service", "/my/object")
+        self.bus.get.assert_called_once_with("my.service", "/my/object")
+        self.bus.watch_name.assert_called_once()
+
+        # The proxy is cached.
+        self.bus.get.reset_mock()
+        self.assertIs(self.message_bus.get_proxy("my.service", "/my/object"), proxy)
+        self.bus.get.assert_not_called()
+
+        # Other objects have their own proxies.
+        other = self.message_bus.get_proxy("my.service", "/my/other")
+        self.assertIsNot(other, proxy)
+        self.bus.get.assert_called_once_with("my.service", "/my/other")
+
+        # The service is watched only once.
+        self.bus.watch_name.assert_called_once()
+
+    def proxy_cache_invalidation_test(self):
+        """Test the invalidation of the cached proxies."""
+        proxy = self.message_bus.get_proxy("my.service", "/my/object")
+        other = self.message_bus.get_proxy("my.other", "/my/object")
+
+        appeared, vanished = self._get_watch_callbacks("my.service")
+        appeared()
+
+        # The proxies are still cached.
+        self.assertIs(self.message_bus.get_proxy("my.service", "/my/object"), proxy)
+
+        # The proxies of the service are dropped.
+        vanished()
+        self.assertIsNot(self.message_bus.get_proxy("my.service", "/my/object"), proxy)
+        self.assertIs(self.message_bus.get_proxy("my.other", "/my/object"), other)
+
+    def proxy_cache_disconnect_test(self):
+        """Test the cached proxies after disconnection."""
+        proxy = self.message_bus.get_proxy("my.service", "/my/object")
+        self.message_bus.disconnect()
+        self.bus.unwatch_name.assert_called_once()
+
+        self.assertIsNot(self.message_bus.get_proxy("my.service", "/my/object"), proxy)
+
+    def get_properties_snapshot_test(self):
+        """Test the snapshot of properties."""
+        proxy = Mock()
+        proxy.GetAll.side_effect = [{"A": 1, "B": "b"}, {"C": [1, 2]}]
+        self.bus.get.side_effect = None
+        self.bus.get.return_value = proxy
+
+        properties = self.message_bus.get_properties_snapshot(
+            "my.service", "/my/object", ["my.interface.1", "my.interface.2"]
+        )
+
+        self.bus.get.assert_called_once_with("my.service", "/my/object")
+        self.assertEqual(proxy.GetAll.call_count, 2)
+        proxy.GetAll.assert_any_call("my.interface.1")
+        proxy.GetAll.assert_any_call("my.interface.2")
+
+        self.assertEqual(properties.A, 1)
+        self.assertEqual(properties.B, "b")
+        self.assertEqual(properties.C, [1, 2])
+        self.assertEqual(properties.properties, {"A": 1, "B": "b", "C": [1, 2]})
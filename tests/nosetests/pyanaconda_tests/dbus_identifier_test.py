@@ -225,3 +225,39 @@ class DBusServiceIdentifierTestCase(unittest.TestCase):
         service.get_cached_observer(obj.object_path, interface_names=[interface.interface_name])
         bus.get_cached_observer.assert_called_with("a.b.c", "/a/b/c/object", ["a.b.c.interface"])
         bus.reset_mock()
+
+        service.get_cached_observer(obj)
+        bus.get_cached_observer.assert_called_with("a.b.c", "/a/b/c/object", ["a.b.c.object"])
+        bus.reset_mock()
+
+    def get_properties_snapshot_test(self):
+        """Test getting a snapshot of properties."""
+        bus = Mock()
+        namespace = ("a", "b", "c")
+
+        service = DBusServiceIdentifier(
+            namespace=namespace,
+            message_bus=bus
+        )
+
+        obj = DBusObjectIdentifier(
+            basename="object",
+            namespace=namespace
+        )
+
+        interface = DBusInterfaceIdentifier(
+            basename="interface",
+            namespace=namespace
+        )
+
+        service.get_properties_snapshot()
+        bus.get_properties_snapshot.assert_called_with("a.b.c", "/a/b/c", ["a.b.c"])
+        bus.reset_mock()
+
+        service.get_properties_snapshot(obj)
+        bus.get_properties_snapshot.assert_called_with("a.b.c", "/a/b/c/object", ["a.b.c.object"])
+        bus.reset_mock()
+
+        service.get_properties_snapshot(obj, interface_names=[interface.interface_name])
+        bus.get_properties_snapshot.assert_called_with("a.b.c", "/a/b/c/object", ["a.b.c.interface"])
+        bus.reset_mock()
@@ -21,7 +21,7 @@ import unittest
 
 from pyanaconda.dbus.typing import *  # pylint: disable=wildcard-import
 from pyanaconda.dbus.structure import dbus_structure, get_structure, apply_structure, \
-    DBusStructureError
+    get_structures, apply_structures, get_fields, DBusStructureError
 
 
 class DBusStructureTestCase(unittest.TestCase):
@@ -288,3 +288,43 @@ class DBusStructureTestCase(unittest.TestCase):
         data.c = [True, False]
 
         self.assertEqual(repr(data), "StringData(a=123, b='HELLO', c=[True, False])")
+
+    def field_dbus_type_test(self):
+        fields = get_fields(self.ComplicatedData)
+        self.assertEqual(fields["dictionary"].dbus_type, "a{is}")
+        self.assertEqual(fields["bool-list"].dbus_type, "ab")
+        self.assertEqual(fields["very-long-property-name"].dbus_type, "s")
+        self.assertEqual(fields["very-long-property-name"].data_name, "very_long_property_name")
+
+    def invalid_field_type_test(self):
+        with self.assertRaises(DBusStructureError) as cm:
+
+            @dbus_structure
+            class InvalidData(object):
+
+                @property
+                def x(self) -> set:
+                    return set()
+
+                @x.setter
+                def x(self, value):
+                    pass
+
+        self.assertIn("Field 'x' has unsupported type", str(cm.exception))
+
+    def get_structures_test(self):
+        data = [self.SimpleData(), self.SimpleData()]
+        data[0].x = 1
+        data[1].x = 2
+
+        self.assertEqual(get_structures([]), [])
+        self.assertEqual(get_structures(data), [get_structure(d) for d in data])
+
+    def apply_structures_test(self):
+        self.assertEqual(apply_structures([], self.SimpleData), [])
+
+        data = apply_structures([{'x': 1}, {'x': 2}], self.SimpleData)
+        self.assertEqual(len(data), 2)
+        self.assertIsInstance(data[0], self.SimpleData)
+        self.assertEqual(data[0].x, 1)
+        self.assertEqual(data[1].x, 2)
@@ -0,0 +1,47 @@
+#
+# Copyright (C) 2019  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import unittest
+from mock import Mock, call
+
+from pyanaconda.core.glib import wait_for_signals
+
+
+class WaitForSignalsTestCase(unittest.TestCase):
+    """Test waiting for DBus signals."""
+
+    def wait_for_signals_test(self):
+        """Test waiting for DBus signals."""
+        connection = Mock()
+        connection.signal_subscribe.side_effect = [1, 2]
+        signals = [("org.freedesktop.NetworkManager", None, "StateChanged", None),
+                   ("org.freedesktop.NetworkManager", None, "PropertiesChanged", None)]
+
+        # The check passes immediately.
+        check = Mock(return_value=True)
+        self.assertTrue(wait_for_signals(connection, signals, check, 10))
+        check.assert_called_once_with()
+        self.assertEqual(connection.signal_subscribe.call_count, 2)
+        connection.signal_unsubscribe.assert_has_calls([call(1), call(2)])
+
+        # The check never passes.
+        connection.reset_mock()
+        connection.signal_subscribe.side_effect = [3, 4]
+        check = Mock(return_value=False)
+        self.assertFalse(wait_for_signals(connection, signals, check, 0.1))
+        self.assertGreaterEqual(check.call_count, 2)
+        connection.signal_unsubscribe.assert_has_calls([call(3), call(4)])
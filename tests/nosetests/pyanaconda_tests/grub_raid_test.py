@@ -23,9 +23,11 @@ from blivet.devicelibs.raid import RAID1
 from blivet.formats import get_format
 from blivet.size import Size
 
+from pyanaconda.bootloader.base import BootLoaderError
 from pyanaconda.bootloader.grub2 import GRUB2
 
 import unittest
+from mock import Mock, PropertyMock, patch
 
 class GRUBRaidSimpleTest(unittest.TestCase):
     def setUp(self):
@@ -165,3 +167,105 @@ class GRUBRaidSimpleTest(unittest.TestCase):
         expected_targets = set([(self.sda1, self.boot_btrfs)])
 
         self.assertEqual(install_targets, expected_targets)
+
+
+class GRUBRaidInstallTest(unittest.TestCase):
+
+    def setUp(self):
+        self.grub = GRUB2()
+        self.md = Mock(path="/dev/md1", type="mdarray")
+        self.disks = [self._disk("/dev/sd%s" % c) for c in "abcd"]
+
+    def _disk(self, path, start=2048, biosboot=False, label_type="msdos"):
+        partition = Mock()
+        partition.getFlag.return_value = biosboot
+        partition.geometry.start = start
+        partition.disk.device.sectorSize = 512
+
+        disk = Mock(path=path)
+        disk.format.label_type = label_type
+        disk.format.parted_disk.partitions = [partition]
+        return disk
+
+    def _install(self, execWithRedirect, statuses=None, concurrent_task=None):
+        targets = [(disk, self.md) for disk in self.disks]
+        statuses = statuses or {}
+        execWithRedirect.side_effect = lambda cmd, args, **kwargs: statuses.get(args[-1], 0)
+
+        with patch.object(GRUB2, "install_targets", new_callable=PropertyMock) as install_targets:
+            install_targets.return_value = targets
+            self.grub.install(concurrent_task=concurrent_task)
+
+    @patch("pyanaconda.bootloader.grub2.util.execWithRedirect")
+    def grub_raid_install_test(self, execWithRedirect):
+        """Test installing GRUB to members of the /boot array."""
+        concurrent_task = Mock()
+        self._install(execWithRedirect, concurrent_task=concurrent_task)
+        concurrent_task.assert_called_once_with()
+
+        calls = [(c[0][0], c[0][1][-1]) for c in execWithRedirect.call_args_list]
+        self.assertEqual(calls[0], ("grub2-install", "/dev/sda"))
+        self.assertEqual(sorted(calls[1:]), [
+            ("grub2-bios-setup", "/dev/sdb"),
+            ("grub2-bios-setup", "/dev/sdc"),
+            ("grub2-bios-setup", "/dev/sdd"),
+        ])
+
+        args = execWithRedirect.call_args_list[1][0][1]
+        self.assertEqual(args[:2], ["-d", "/boot/grub2/i386-pc"])
+
+    @patch("pyanaconda.bootloader.grub2.util.execWithRedirect")
+    def grub_raid_install_failure_test(self, execWithRedirect):
+        """Test a failed installation of GRUB to members of the /boot array."""
+        concurrent_task = Mock()
+
+        with self.assertRaises(BootLoaderError) as cm:
+            self._install(execWithRedirect, {"/dev/sdb": 1, "/dev/sdd": 1}, concurrent_task)
+
+        self.assertEqual(str(cm.exception), "boot loader install failed on /dev/sdb, /dev/sdd")
+        self.assertEqual(execWithRedirect.call_count, 4)
+        concurrent_task.assert_called_once_with()
+
+        # Nothing else runs if grub2-install fails.
+        execWithRedirect.reset_mock()
+        concurrent_task.reset_mock()
+
+        with self.assertRaises(BootLoaderError):
+            self._install(execWithRedirect, {"/dev/sda": 1}, concurrent_task)
+
+        self.assertEqual(execWithRedirect.call_count, 1)
+        concurrent_task.assert_not_called()
+
+    @patch("pyanaconda.bootloader.grub2.util.execWithRedirect")
+    def grub_raid_install_no_embedding_test(self, execWithRedirect):
+        """Test installing GRUB to members of the /boot array without embedding."""
+        # The first partition starts too low to embed core.img.
+        self.disks[2] = self._disk("/dev/sdc", start=63)
+
+        calls = []
+        execWithRedirect.side_effect = lambda cmd, args, **kwargs: calls.append((cmd, args[-1])) or 0
+        concurrent_task = Mock(side_effect=lambda: calls.append(("write_config", None)))
+
+        targets = [(disk, self.md) for disk in self.disks]
+        with patch.object(GRUB2, "install_targets", new_callable=PropertyMock) as install_targets:
+            install_targets.return_value = targets
+            self.grub.install(concurrent_task=concurrent_task)
+
+        # Every disk gets its own core.img and the configuration is written after.
+        self.assertEqual(calls, [
+            ("grub2-install", "/dev/sda"),
+            ("grub2-install", "/dev/sdb"),
+            ("grub2-install", "/dev/sdc"),
+            ("grub2-install", "/dev/sdd"),
+            ("write_config", None),
+        ])
+
+    def grub_can_embed_core_test(self):
+        """Test the check of the place to embed core.img."""
+        can_embed = lambda **kwargs: self.grub._can_embed_core(self._disk("/dev/sda", **kwargs),
+                                                               self.md)
+        self.assertTrue(can_embed())
+        self.assertFalse(can_embed(start=63))
+        self.assertTrue(can_embed(start=63, biosboot=True))
+        self.assertFalse(can_embed(label_type="gpt"))
+        self.assertTrue(can_embed(biosboot=True, label_type="gpt"))
@@ -18,7 +18,9 @@
 # with the express permission of Red Hat, Inc.
 #
 
+import time
 import unittest
+from threading import Event, Lock
 
 from pyanaconda.installation_tasks import Task
 from pyanaconda.installation_tasks import TaskQueue
@@ -369,3 +371,89 @@ class InstallTasksTestCase(unittest.TestCase):
         self.assertEqual(self._test_variable1, 3)
         self.assertEqual(self._test_variable2, 2)
         self.assertEqual(self._test_variable3, 1)
+
+    def concurrent_task_queue_test(self):
+        """Check that a concurrent task queue respects the dependencies."""
+        lock = Lock()
+        events = []
+        running = set()
+        overlaps = []
+
+        def record(name):
+            with lock:
+                overlaps.append(set(running))
+                running.add(name)
+                events.append(("start", name))
+
+            time.sleep(0.05)
+
+            with lock:
+                running.remove(name)
+                events.append(("end", name))
+
+        def task_completed_cb(task):
+            self._task_completed_count += 1
+
+        queue = TaskQueue(name="queue", max_workers=4)
+        queue.task_completed.connect(task_completed_cb)
+        queue.append(Task("first", record, ("first",)))
+        queue.append(Task("a", record, ("a",), requires=()))
+        queue.append(Task("b", record, ("b",), requires=(), resources=("rpmdb",)))
+        queue.append(Task("c", record, ("c",), requires=(), resources=("rpmdb",)))
+        queue.append(Task("d", record, ("d",), requires=("a",)))
+        queue.append(Task("last", record, ("last",)))
+
+        queue.start()
+
+        self.assertTrue(queue.done)
+        self.assertEqual(self._task_completed_count, 6)
+        self.assertEqual(events[0], ("start", "first"))
+        self.assertEqual(events[1], ("end", "first"))
+        self.assertEqual(events[-2], ("start", "last"))
+        self.assertEqual(events[-1], ("end", "last"))
+        # the independent tasks overlapped
+        self.assertTrue(any(len(o) > 0 for o in overlaps))
+        # the tasks with the same resource never overlapped
+        self.assertLess(events.index(("end", "b")), events.index(("start", "c")))
+        # the dependency was respected
+        self.assertLess(events.index(("end", "a")), events.index(("start", "d")))
+
+    def concurrent_task_queue_failure_test(self):
+        """Check that a concurrent task queue stops on a failure."""
+        def fail():
+            raise RuntimeError("failed")
+
+        queue = TaskQueue(name="queue", max_workers=2)
+        queue.append(Task("fail", fail, requires=()))
+        queue.append(Task("barrier", self._increment_var1))
+        queue.append(Task("after", self._increment_var2, requires=()))
+
+        with self.assertRaises(RuntimeError):
+            queue.start()
+
+        self.assertEqual(self._test_variable1, 0)
+        self.assertEqual(self._test_variable2, 0)
+
+    def concurrent_nested_queue_test(self):
+        """Check that a nested queue of a concurrent queue reports its status."""
+        started = Event()
+        waited = []
+        messages = []
+
+        top_queue = TaskQueue(name="top queue")
+        top_queue.queue_started.connect(lambda q: messages.append(q.status_message))
+
+        queue = TaskQueue(name="queue", status_message="Running the queue", max_workers=2)
+        nested_queue = TaskQueue(name="nested queue", status_message="Running the nested queue",
+                                 requires=(), resources=("network",))
+        nested_queue.append(Task("wait", lambda: waited.append(started.wait(5))))
+        queue.append(nested_queue)
+        queue.append(Task("set", started.set, requires=()))
+        top_queue.append(queue)
+
+        top_queue.start()
+
+        # the nested queue ran concurrently with the task
+        self.assertEqual(waited, [True])
+        self.assertTrue(nested_queue.done)
+        self.assertEqual(messages, ["Running the queue", "Running the nested queue"])
@@ -130,6 +130,21 @@ echo "error" >&2
         # check that the output is an empty string
         self.assertEqual(util.execWithCapture("/bin/sh", ["-c", "exit 0"]), "")
 
+    def exec_with_callback_test(self):
+        """Test execWithCallback."""
+        lines = []
+
+        # both new lines and carriage returns end the lines
+        rc = util.execWithCallback("/bin/sh", ["-c", r"printf 'a\rb\nc\n'; echo d >&2; exit 3"],
+                                   lines.append)
+
+        self.assertEqual(rc, 3)
+        self.assertEqual(lines, ["a", "b", "c", "d"])
+
+        # the errors of the command are raised
+        with self.assertRaises(OSError):
+            util.execWithCallback("/nonexistent/command", [], lines.append)
+
     def exec_readlines_test(self):
         """Test execReadlines."""
 
@@ -761,6 +776,35 @@ class MiscTests(unittest.TestCase):
         finally:
             shutil.rmtree(test_dir)
 
+    def copy_tree_test(self):
+        """Test the copy_tree function"""
+        test_dir = tempfile.mkdtemp()
+        try:
+            src = os.path.join(test_dir, "src")
+            dst = os.path.join(test_dir, "dst")
+            os.makedirs(src + "/grub2/fonts")
+
+            with open(src + "/grub2/fonts/unicode.pf2", "wb") as f:
+                f.write(os.urandom(100000))
+
+            os.chmod(src + "/grub2/fonts/unicode.pf2", 0o640)
+            os.symlink("fonts/unicode.pf2", src + "/grub2/font")
+            os.utime(src + "/grub2", (100, 100))
+
+            # copy the tree twice, the second copy is merged into the first one
+            util.copy_tree(src, dst)
+            util.copy_tree(src, dst)
+
+            with open(src + "/grub2/fonts/unicode.pf2", "rb") as f1:
+                with open(dst + "/grub2/fonts/unicode.pf2", "rb") as f2:
+                    self.assertEqual(f1.read(), f2.read())
+
+            self.assertEqual(os.stat(dst + "/grub2/fonts/unicode.pf2").st_mode & 0o777, 0o640)
+            self.assertEqual(os.readlink(dst + "/grub2/font"), "fonts/unicode.pf2")
+            self.assertEqual(os.stat(dst + "/grub2").st_mtime, 100)
+        finally:
+            shutil.rmtree(test_dir)
+
     def item_counter_test(self):
         """Test the item_counter generator."""
         # normal usage
@@ -18,6 +18,7 @@
 
 import unittest
 import os
+import threading
 from contextlib import contextmanager
 from mock import Mock
 
@@ -246,6 +247,42 @@ class KickstartManagerTestCase(unittest.TestCase):
 
         self.assertEqual(errors, expected_errors)
 
+    def concurrent_distribute_test(self):
+        """Test that the modules read the kickstart at the same time."""
+        manager = KickstartManager()
+        barrier = threading.Barrier(2, timeout=10)
+
+        def read_kickstart(kickstart):
+            # Both modules have to read the kickstart at the same time.
+            barrier.wait()
+            return {"success": True}
+
+        module1 = TestModule(commands=["network"])
+        module1.ReadKickstart = Mock(side_effect=read_kickstart)
+        module2 = TestModule(commands=["firewall"])
+        module2.ReadKickstart = Mock(side_effect=read_kickstart)
+
+        manager.module_observers = [
+            TestModuleObserver("1", "1", module1),
+            TestModuleObserver("2", "2", module2),
+        ]
+
+        manager._elements = Mock()
+        manager._elements.get_kickstart_from_elements.side_effect = \
+            lambda elements: "\n".join(elements)
+        manager._elements.get_and_process_elements.side_effect = \
+            lambda commands, sections, addons: commands
+
+        self.assertEqual(manager.distribute(), [])
+        module1.ReadKickstart.assert_called_once_with("network")
+        module2.ReadKickstart.assert_called_once_with("firewall")
+
+        # The kickstart specifications of the modules are read only once.
+        barrier.reset()
+        self.assertEqual(manager.distribute(), [])
+        self.assertEqual(module1.specification_reads, 3)
+        self.assertEqual(module2.specification_reads, 3)
+
     def unknown_section_split_test(self):
         ks_content = """
 network --device=ens3
@@ -292,17 +329,21 @@ class TestModule(object):
         self.kickstart_sections = sections or []
         self.kickstart_addons = addons or []
         self.kickstart = ""
+        self.specification_reads = 0
 
     @property
     def KickstartSections(self):
+        self.specification_reads += 1
         return self.kickstart_sections
 
     @property
     def KickstartAddons(self):
+        self.specification_reads += 1
         return self.kickstart_addons
 
     @property
     def KickstartCommands(self):
+        self.specification_reads += 1
         return self.kickstart_commands
 
     def ReadKickstart(self, kickstart):
@@ -20,6 +20,7 @@ from pyanaconda import localization
 from pyanaconda.core.util import execWithCaptureBinary
 import locale as locale_mod
 import unittest
+from mock import patch
 
 class ParsingTests(unittest.TestCase):
     def invalid_langcodes_test(self):
@@ -163,3 +164,32 @@ class LangcodeLocaleMatchingTests(unittest.TestCase):
             order = localization.resolve_date_format(1, 2, 3, fail_safe=False)[0]
             for i in (1, 2, 3):
                 self.assertIn(i, order)
+
+class LangtableQueryTests(unittest.TestCase):
+
+    @patch.dict("pyanaconda.localization._langtable_results", clear=True)
+    @patch("pyanaconda.localization.langtable")
+    def langtable_query_test(self, langtable):
+        """The results of langtable queries should be remembered."""
+        langtable.list_locales.__name__ = "list_locales"
+        langtable.list_locales.return_value = ["cs_CZ.UTF-8"]
+        langtable.language_name.__name__ = "language_name"
+        langtable.language_name.side_effect = lambda **kwargs: kwargs["languageIdQuery"]
+
+        locales = localization.get_language_locales("cs")
+        self.assertEqual(locales, ["cs_CZ.UTF-8"])
+
+        # The returned list can be modified.
+        locales.append("cs_CZ.ISO-8859-2")
+        self.assertEqual(localization.get_language_locales("cs"), ["cs_CZ.UTF-8"])
+        self.assertEqual(langtable.list_locales.call_count, 1)
+
+        localization.get_language_locales("sk")
+        self.assertEqual(langtable.list_locales.call_count, 2)
+
+        # Different queries are remembered separately.
+        self.assertEqual(localization.get_english_name("cs_CZ"), "En")
+        self.assertEqual(localization.get_native_name("cs_CZ"), "Cs")
+        self.assertEqual(localization.get_english_name("cs_CZ"), "En")
+        self.assertEqual(localization.get_native_name("cs_CZ"), "Cs")
+        self.assertEqual(langtable.language_name.call_count, 2)
@@ -0,0 +1,53 @@
+#
+# Copyright (C) 2019  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import unittest
+from mock import Mock
+
+from pyanaconda.modules.boss.module_manager import ModuleManager
+
+
+class ModuleManagerTestCase(unittest.TestCase):
+    """Test the module manager."""
+
+    def _add_observer(self, module_manager, available):
+        """Add an observer of a module."""
+        observer = Mock()
+        observer.is_service_available = available
+        module_manager.module_observers.append(observer)
+        return observer
+
+    def modules_available_test(self):
+        """Test the modules_available signal."""
+        module_manager = ModuleManager()
+        callback = Mock()
+        module_manager.modules_available.connect(callback)
+
+        observer_1 = self._add_observer(module_manager, True)
+        observer_2 = self._add_observer(module_manager, False)
+
+        # The second module is not available yet.
+        module_manager._process_module_is_available(observer_1)
+        observer_1.proxy.Ping.assert_called_once_with()
+        callback.assert_not_called()
+        self.assertFalse(module_manager.check_modules_availability())
+
+        # All modules are available.
+        observer_2.is_service_available = True
+        module_manager._process_module_is_available(observer_2)
+        callback.assert_called_once_with()
+        self.assertTrue(module_manager.check_modules_availability())
@@ -17,10 +17,13 @@
 #
 # Red Hat Author(s): Radek Vykydal <rvykydal@redhat.com>
 #
+import os
+import tempfile
 import unittest
 from mock import Mock, patch
 
-from pyanaconda.modules.network.ifcfg import get_dracut_arguments_from_ifcfg
+from pyanaconda.modules.network.ifcfg import get_dracut_arguments_from_ifcfg, IfcfgIndex, \
+    IfcfgFile, get_ifcfg_file, get_ifcfg_index, IFCFG_DIR
 
 class IfcfgTestCase(unittest.TestCase):
     def ifcfg_mock(self, settings):
@@ -148,3 +151,83 @@ class IfcfgTestCase(unittest.TestCase):
             get_dracut_arguments_from_ifcfg(nm_client, ifcfg, "eth0", "10.34.102.77", None),
             set(["rd.znet=qeth,0.0.f5f0,0.0.f5f1,0.0.f5f2,layer2=1,portname=OSAPORT",
                  "ip=10.34.102.233::10.34.102.254:255.255.255.0::eth0:none"]))
+
+
+class IfcfgIndexTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._root = tempfile.TemporaryDirectory()
+        self._directory = os.path.normpath(self._root.name + IFCFG_DIR)
+        os.makedirs(self._directory)
+
+    def tearDown(self):
+        self._root.cleanup()
+
+    def _write_ifcfg(self, name, content):
+        path = os.path.join(self._directory, "ifcfg-" + name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def find_test(self):
+        """Test looking up ifcfg files in the index."""
+        ens3 = self._write_ifcfg("ens3", 'DEVICE="ens3"\nHWADDR="52:54:00:12:34:56"\nUUID="1"\n')
+        ens4 = self._write_ifcfg("ens4", 'HWADDR="52:54:00:12:34:57"\nUUID="2"\nMASTER="bond0"\n')
+        self._write_ifcfg("lo", 'DEVICE="lo"\n')
+
+        index = IfcfgIndex(self._directory)
+        self.assertEqual(index.find([("DEVICE", "ens3")]), ens3)
+        self.assertEqual(index.find([("UUID", "2")]), ens4)
+        self.assertEqual(index.find([("DEVICE", "lo")]), None)
+        self.assertEqual(index.find([("UUID", "3")]), None)
+        self.assertEqual(index.find([("DEVICE", "")]), ens4)
+
+        hwaddr_check = lambda mac: mac.upper() == "52:54:00:12:34:57"
+        self.assertEqual(index.find([("HWADDR", hwaddr_check), ("MASTER", lambda x: x)]), ens4)
+        self.assertEqual(index.find([("HWADDR", hwaddr_check), ("BRIDGE", lambda x: x)]), None)
+
+        self.assertEqual(sorted(ifcfg.path for ifcfg in index.get_files()), [ens3, ens4])
+
+    def update_test(self):
+        """Test updating of the index."""
+        ens3 = self._write_ifcfg("ens3", 'DEVICE="ens3"\nUUID="1"\n')
+
+        index = IfcfgIndex(self._directory)
+        self.assertEqual(index.find([("UUID", "1")]), ens3)
+
+        # The file is parsed only once.
+        with patch.object(IfcfgFile, "read") as read:
+            self.assertEqual(index.find([("DEVICE", "ens3")]), ens3)
+            read.assert_not_called()
+
+        # Modify the file in place.
+        with open(ens3, "a") as f:
+            f.write('ONBOOT="no"\n')
+
+        self.assertEqual(index.find([("ONBOOT", "no")]), ens3)
+
+        # Add a new file.
+        ens4 = self._write_ifcfg("ens4", 'DEVICE="ens4"\nUUID="2"\n')
+        self.assertEqual(index.find([("UUID", "2")]), ens4)
+
+        # Remove the file.
+        os.remove(ens3)
+        self.assertEqual(index.find([("UUID", "1")]), None)
+        self.assertEqual([ifcfg.path for ifcfg in index.get_files()], [ens4])
+
+    def get_ifcfg_file_test(self):
+        """Test the ifcfg file returned from the index."""
+        ens3 = self._write_ifcfg("ens3", 'DEVICE="ens3"\nUUID="1"\nONBOOT="yes"\n')
+        root_path = self._root.name
+
+        ifcfg = get_ifcfg_file([("UUID", "1")], root_path)
+        self.assertEqual(ifcfg.path, ens3)
+        self.assertEqual(ifcfg.get("ONBOOT"), "yes")
+
+        # Changes of the returned file don't modify the index.
+        ifcfg.set(("ONBOOT", "no"))
+        self.assertEqual(get_ifcfg_file([("ONBOOT", "no")], root_path), None)
+
+        # The written changes are visible in the index.
+        ifcfg.write()
+        self.assertEqual(get_ifcfg_index(root_path).find([("ONBOOT", "no")]), ens3)
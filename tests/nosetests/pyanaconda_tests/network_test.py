@@ -289,3 +289,45 @@ class NetworkKSDataTests(unittest.TestCase):
         # network --hostname newhostname
         self.assertEqual(ksdata.network.network[0].hostname, "")
         self.assertEqual(ksdata.network.network[1].hostname, "newhostname")
+
+
+class NetworkWaitTests(unittest.TestCase):
+
+    @patch("pyanaconda.network.wait_for_signals")
+    @patch("pyanaconda.network.DBus")
+    @patch("pyanaconda.network.NETWORK")
+    def wait_for_connected_NM_test(self, network_service, dbus, wait_for_signals):
+        """Test waiting for the connected NM."""
+        proxy = network_service.get_proxy.return_value
+
+        # Already connected.
+        proxy.Connected = True
+        self.assertTrue(network.wait_for_connected_NM(timeout=1))
+        wait_for_signals.assert_not_called()
+
+        # Not connecting.
+        proxy.Connected = False
+        proxy.IsConnecting.return_value = False
+        self.assertFalse(network.wait_for_connected_NM(timeout=1, only_connecting=True))
+        wait_for_signals.assert_not_called()
+
+        # Connected during the wait.
+        def connect(connection, signals, check, timeout):
+            self.assertFalse(check())
+            proxy.Connected = True
+            return check()
+
+        wait_for_signals.side_effect = connect
+        self.assertTrue(network.wait_for_connected_NM(timeout=1))
+        self.assertEqual(wait_for_signals.call_args[0][0], dbus.connection.con)
+
+        # Connecting finished without the connection.
+        def disconnect(connection, signals, check, timeout):
+            self.assertFalse(check())
+            proxy.IsConnecting.return_value = False
+            return check()
+
+        wait_for_signals.side_effect = disconnect
+        proxy.Connected = False
+        proxy.IsConnecting.return_value = True
+        self.assertFalse(network.wait_for_connected_NM(timeout=1, only_connecting=True))
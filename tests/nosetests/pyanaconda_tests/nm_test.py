@@ -18,7 +18,10 @@
 
 from pyanaconda import nm
 import unittest
+import copy
 import socket
+import threading
+from mock import Mock, patch
 
 class UtilityFunctionsTests(unittest.TestCase):
 
@@ -41,3 +44,151 @@ class UtilityFunctionsTests(unittest.TestCase):
         # The result will be 23505088 little-endian or 3232261633 big-endian
         self.assertEqual(nm.nm_ipv4_to_dbus_int("192.168.102.1"),
                          socket.ntohl(3232261633))
+
+
+class SettingsCacheTests(unittest.TestCase):
+
+    SETTINGS = {
+        "/org/freedesktop/NetworkManager/Settings/1": {
+            "connection": {"id": "ens3", "uuid": "uuid-1", "interface-name": "ens3"},
+            "802-3-ethernet": {"mac-address": [82, 84, 0, 18, 52, 86]},
+        },
+        "/org/freedesktop/NetworkManager/Settings/2": {
+            "connection": {"id": "vlan", "uuid": "uuid-2"},
+            "vlan": {"id": 222, "interface-name": "ens3.222"},
+        },
+    }
+
+    def setUp(self):
+        self._calls = []
+        self._signal_cb = None
+
+        def get_proxy(object_path, interface_name):
+            proxy = Mock()
+            proxy.ListConnections.side_effect = \
+                lambda: self._calls.append("list") or list(self.SETTINGS)
+            proxy.GetSettings.side_effect = \
+                lambda: self._calls.append(object_path) or self.SETTINGS[object_path]
+            return proxy
+
+        def signal_subscribe(*args):
+            self._signal_cb = args[-1]
+
+        bus = Mock()
+        bus.signal_subscribe.side_effect = signal_subscribe
+
+        # The signals that are not dispatched by the signal loop yet.
+        self._pending_signals = []
+
+        def invoke_full(priority, function):
+            while self._pending_signals:
+                self._signal_cb(*self._pending_signals.pop(0))
+            function()
+
+        context = Mock()
+        context.invoke_full.side_effect = invoke_full
+
+        patches = [
+            patch("pyanaconda.nm._get_proxy", side_effect=get_proxy),
+            patch("pyanaconda.nm.Gio.bus_get_sync", return_value=bus),
+            patch("pyanaconda.nm.create_new_context", return_value=context),
+        ]
+
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+        self._cache = nm._SettingsCache()
+
+    def find_test(self):
+        """Test the lookups of the cached settings."""
+        cache = self._cache
+        self.assertEqual(cache.find("ens3", "connection", "interface-name"),
+                         ["/org/freedesktop/NetworkManager/Settings/1"])
+        self.assertEqual(cache.find("52:54:00:12:34:56", "802-3-ethernet", "mac-address",
+                                    nm._format_hwaddr),
+                         ["/org/freedesktop/NetworkManager/Settings/1"])
+        self.assertEqual(cache.find(222, "vlan", "id"),
+                         ["/org/freedesktop/NetworkManager/Settings/2"])
+        self.assertEqual(cache.find("uuid-3", "connection", "uuid"), [])
+
+        # The settings were loaded only once.
+        self.assertEqual(len(self._calls), 3)
+
+    def signals_test(self):
+        """Test the updates of the cached settings."""
+        cache = self._cache
+        path = "/org/freedesktop/NetworkManager/Settings/1"
+        self.assertEqual(cache.find("uuid-1", "connection", "uuid"), [path])
+
+        self._signal_cb(None, None, path, nm.NM_CONNECTION_IFACE, "Updated", None)
+        self.assertEqual(cache.find("uuid-1", "connection", "uuid"), [path])
+        self.assertEqual(self._calls.count(path), 2)
+
+        self._signal_cb(None, None, path, nm.NM_CONNECTION_IFACE, "Removed", None)
+        self.assertEqual(cache.find("uuid-1", "connection", "uuid"), [])
+        self.assertEqual(self._calls.count("list"), 1)
+
+    def new_connection_test(self):
+        """Test a lookup right after another client added a connection."""
+        cache = self._cache
+        path = "/org/freedesktop/NetworkManager/Settings/3"
+        self.assertEqual(cache.find("uuid-3", "connection", "uuid"), [])
+
+        settings = {"connection": {"id": "ens4", "uuid": "uuid-3"}}
+        parameters = Mock()
+        parameters.unpack.return_value = (path, )
+
+        # The signal is emitted, but not dispatched yet.
+        with patch.dict(self.SETTINGS, {path: settings}):
+            self._pending_signals.append(
+                (None, None, nm.NM_SETTINGS_PATH, nm.NM_SETTINGS_IFACE, "NewConnection", parameters)
+            )
+            self.assertEqual(cache.find("uuid-3", "connection", "uuid"), [path])
+            self.assertEqual(cache.get(path), settings)
+
+        self.assertEqual(self._calls.count("list"), 1)
+
+    def updated_connection_test(self):
+        """Test a lookup right after another client updated a connection."""
+        cache = self._cache
+        path = "/org/freedesktop/NetworkManager/Settings/1"
+        self.assertEqual(cache.get(path)["connection"]["id"], "ens3")
+
+        settings = copy.deepcopy(self.SETTINGS[path])
+        settings["connection"]["id"] = "updated"
+
+        with patch.dict(self.SETTINGS, {path: settings}):
+            self._pending_signals.append(
+                (None, None, path, nm.NM_CONNECTION_IFACE, "Updated", None)
+            )
+            self.assertEqual(cache.find("updated", "connection", "id"), [path])
+
+    def copies_test(self):
+        """Test that the cached settings can't be modified by the callers."""
+        cache = self._cache
+        path = "/org/freedesktop/NetworkManager/Settings/1"
+
+        cache.get(path)["connection"]["id"] = "modified"
+        self.assertEqual(cache.get(path)["connection"]["id"], "ens3")
+
+        dict(cache.get_all())[path]["connection"]["id"] = "modified"
+        self.assertEqual(cache.get(path)["connection"]["id"], "ens3")
+
+    def signal_thread_test(self):
+        """Test that the signals are subscribed in a dedicated thread."""
+        threads = []
+
+        def signal_subscribe(*args):
+            threads.append(threading.current_thread())
+            self._signal_cb = args[-1]
+
+        with patch("pyanaconda.nm.create_new_context") as create_context:
+            with patch("pyanaconda.nm.MainLoop") as main_loop:
+                nm.Gio.bus_get_sync().signal_subscribe.side_effect = signal_subscribe
+                self._cache.get_all()
+
+        self.assertEqual(len(threads), 4)
+        self.assertNotEqual(threads[0], threading.main_thread())
+        create_context.return_value.push_thread_default.assert_called_once_with()
+        main_loop.assert_called_once_with(create_context.return_value)
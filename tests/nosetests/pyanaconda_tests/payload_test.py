@@ -18,16 +18,27 @@
 # Authors: Jiri Konecny <jkonecny@redhat.com>
 #
 
-from pyanaconda.payload import dnfpayload
+from pyanaconda.payload import dnfpayload, livepayload, rpmostreepayload
 from blivet.size import Size
 import unittest
 import tempfile
 import os
 import hashlib
 import shutil
+import gzip
+import bz2
+import lzma
+import queue
+import threading
+import time
+from mock import Mock, PropertyMock, patch
 
 from pyanaconda.payload.dnfpayload import RepoMDMetaHash
-from pyanaconda.payload import PayloadRequirements, PayloadRequirementsMissingApply
+from pyanaconda.payload.package_cache import PackageCache
+from pyanaconda.payload import PayloadRequirements, PayloadRequirementsMissingApply, \
+    PayloadInstallError, PackagePayload, run_for_kernels, get_kernel_workers
+from pyanaconda.core import util
+from pyanaconda.errors import ERROR_RAISE, ERROR_CONTINUE
 
 
 class PickLocation(unittest.TestCase):
@@ -84,6 +95,910 @@ class PickLocation(unittest.TestCase):
         self.assertEqual(mpoint, None)
 
 
+class SplitIntoBatchesTestCase(unittest.TestCase):
+    """Test the split of packages into batches."""
+
+    def _split(self, requirements, sizes, batch_size):
+        return dnfpayload._split_into_batches(
+            sorted(requirements.keys()),
+            lambda pkg: requirements[pkg],
+            lambda pkg: sizes.get(pkg, 1),
+            batch_size
+        )
+
+    def dependency_order_test(self):
+        """Required packages are placed first."""
+        requirements = {"a": ["b"], "b": ["c"], "c": [], "d": ["a"]}
+        batches = self._split(requirements, {}, 1)
+        self.assertEqual(batches, [["c"], ["b"], ["a"], ["d"]])
+
+    def cycle_test(self):
+        """Packages with cyclic dependencies are in the same batch."""
+        requirements = {"a": ["b"], "b": ["c"], "c": ["a"], "d": []}
+        batches = self._split(requirements, {}, 1)
+        self.assertEqual(len(batches), 2)
+        self.assertEqual(sorted(batches[0]), ["a", "b", "c"])
+        self.assertEqual(batches[1], ["d"])
+
+    def batch_size_test(self):
+        """Batches are filled up to the batch size."""
+        requirements = {"a": [], "b": [], "c": [], "d": []}
+        sizes = {"a": 2, "b": 2, "c": 3, "d": 1}
+        batches = self._split(requirements, sizes, 4)
+        self.assertEqual(batches, [["a", "b"], ["c", "d"]])
+
+    def big_package_test(self):
+        """A package bigger than the batch size gets its own batch."""
+        requirements = {"a": [], "b": [], "c": []}
+        sizes = {"b": 10}
+        batches = self._split(requirements, sizes, 4)
+        self.assertEqual(batches, [["a"], ["b"], ["c"]])
+
+    def empty_test(self):
+        self.assertEqual(self._split({}, {}, 4), [])
+
+
+class TestPackage(object):
+    """Package of a test transaction."""
+
+    def __init__(self, name):
+        self.name = name
+        self.reponame = "repo"
+        self.downloadsize = 1
+
+    def __str__(self):
+        return self.name
+
+
+class DownloadError(Exception):
+    """Error of a test download."""
+    pass
+
+
+class PipelinedInstallTestCase(unittest.TestCase):
+    """Test the pipelined download and installation of packages."""
+
+    def setUp(self):
+        self.events = []
+        self.a = TestPackage("a")
+        self.b = TestPackage("b")
+
+        self.payload = dnfpayload.DNFPayload.__new__(dnfpayload.DNFPayload)
+        self.payload._download_location = "/tmp/download"
+        self.payload._group_specs = ["@core"]
+        self.payload._base = Mock()
+        self.payload._base.download_packages.side_effect = self._download
+        self.payload._get_install_batches = Mock(return_value=[[self.a], [self.b]])
+        self.payload._get_install_reasons = Mock(return_value={self.a: 1, self.b: 2})
+        self.payload._restore_from_cache = Mock()
+        self.payload._store_to_cache = Mock()
+        self.payload._remove_downloaded_packages = Mock()
+        self.payload._handle_download_error = Mock()
+        self.payload._run_transaction = Mock(side_effect=self._run_transaction)
+
+        for name in ("progressQ", "progress_message", "PipelinedDownloadProgress"):
+            patcher = patch("pyanaconda.payload.dnfpayload." + name)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        patcher = patch("pyanaconda.payload.dnfpayload.dnf.exceptions.DownloadError", DownloadError)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _download(self, batch, progress):
+        # Make the downloads slow, so the main thread has to wait.
+        time.sleep(0.05)
+        self.events.append(("download", [str(pkg) for pkg in batch]))
+
+    def _run_transaction(self, batch, offset, total, concurrent_task, group_specs):
+        self.events.append(("transaction", batch, offset, total, group_specs))
+
+        if concurrent_task:
+            concurrent_task()
+
+    def install_test(self):
+        """Install the batches."""
+        self.payload._install_pipelined()
+        self.assertEqual(self.events, [
+            ("download", ["a"]),
+            ("transaction", [("a", "repo", 1)], 0, 2, None),
+            ("download", ["b"]),
+            ("transaction", [("b", "repo", 2)], 1, 2, ["@core"]),
+        ])
+        self.assertEqual(self.payload._remove_downloaded_packages.call_count, 2)
+
+    def no_batches_test(self):
+        """Install no batches."""
+        self.payload._get_install_batches.return_value = []
+        self.payload._install_pipelined()
+        self.assertEqual(self.events, [])
+
+    def download_failure_test(self):
+        """Stop the installation if the download fails."""
+        self.payload._restore_from_cache.side_effect = [None, OSError("No space left")]
+
+        with self.assertRaises(OSError):
+            self.payload._install_pipelined()
+
+        self.assertEqual(self.events, [
+            ("download", ["a"]),
+            ("transaction", [("a", "repo", 1)], 0, 2, None),
+        ])
+
+    def download_error_test(self):
+        """Stop the installation if the packages are not downloaded."""
+        self.payload._base.download_packages.side_effect = DownloadError("a")
+
+        with self.assertRaises(dnfpayload.payload.PayloadInstallError):
+            self.payload._install_pipelined()
+
+        # Don't ask the user whether to continue.
+        self.payload._handle_download_error.assert_not_called()
+        self.payload._run_transaction.assert_not_called()
+
+    def transaction_error_test(self):
+        """Wait for the running download if the transaction fails."""
+        def run_transaction(batch, offset, total, concurrent_task, group_specs):
+            concurrent_task()
+            raise dnfpayload.payload.PayloadError("DNF quit")
+
+        self.payload._run_transaction.side_effect = run_transaction
+
+        with self.assertRaises(dnfpayload.payload.PayloadError):
+            self.payload._install_pipelined()
+
+        # The download of the next batch has finished.
+        self.assertEqual(self.events, [("download", ["a"]), ("download", ["b"])])
+        self.assertEqual([t for t in threading.enumerate() if t.name == "AnaDownloadBatchThread"],
+                         [])
+
+
+class SelectBatchTestCase(unittest.TestCase):
+    """Test the selection of a batch of packages."""
+
+    def setUp(self):
+        self.a = TestPackage("a")
+        self.b = TestPackage("b")
+        self.base = Mock()
+        self.base.sack.query().available().filter.side_effect = \
+            lambda nevra, reponame: [self.a] if nevra == "a" else []
+
+        self.tsi = Mock(pkg=self.a, reason=None)
+        self.base.transaction.__iter__ = Mock(return_value=iter([self.tsi]))
+        self.base.transaction.install_set = [self.a]
+
+    def select_batch_test(self):
+        """Select a batch with the original reasons."""
+        base = self.base
+        dnfpayload._select_batch(base, [("a", "repo", 2)])
+
+        # Only the system repository is loaded.
+        base.reset.assert_called_once_with(goal=True)
+        base.sack.load_system_repo.assert_called_once_with(build_cache=False)
+        base.fill_sack.assert_not_called()
+
+        base.package_install.assert_called_once_with(self.a, strict=True)
+        base.install_specs.assert_not_called()
+        self.assertEqual(self.tsi.reason, 2)
+        base.download_packages.assert_not_called()
+
+    def select_groups_test(self):
+        """Select the groups again with the last batch."""
+        base = self.base
+        dnfpayload._select_batch(base, [("a", "repo", 2)], ["@core", "@^minimal"], ["b"])
+        base.install_specs.assert_called_once_with(install=["@core", "@^minimal"], exclude=["b"])
+
+    def missing_packages_test(self):
+        """Don't download the packages that are not in the batch."""
+        base = self.base
+        base.transaction.install_set = [self.a, self.b]
+
+        with self.assertRaises(dnfpayload.payload.PayloadInstallError) as cm:
+            dnfpayload._select_batch(base, [("a", "repo", 2)])
+
+        self.assertIn("b", str(cm.exception))
+        base.download_packages.assert_not_called()
+
+
+class TestQuery(object):
+    """Query of test packages."""
+
+    def __init__(self, provides=None, files=None):
+        self._provides = provides or {}
+        self._files = files or {}
+
+    def filter(self, provides=None, file=None):
+        if provides is not None:
+            if not isinstance(provides, list):
+                provides = [provides]
+
+            return [p for r in provides for p in self._provides.get(r, [])]
+
+        return [p for f in file for p in self._files.get(f, [])]
+
+
+class RequiredPackagesTestCase(unittest.TestCase):
+    """Test the requirements of packages."""
+
+    def setUp(self):
+        self.a = TestPackage("a")
+        self.b = TestPackage("b")
+        self.c = TestPackage("c")
+        self.packages = [self.a, self.b, self.c]
+
+    def requires_test(self):
+        """Match the provides and the files."""
+        query = TestQuery(provides={"libb.so": [self.b]}, files={"/usr/bin/c": [self.c]})
+        self.a.requires = ["libb.so", "/usr/bin/c", "rpmlib(PayloadIsXz)"]
+
+        self.assertEqual(dnfpayload._get_required_packages(query, self.a, self.packages),
+                         [self.b, self.c])
+
+    def rich_requires_test(self):
+        """Depend on all packages if a rich dependency can't be resolved."""
+        query = TestQuery(provides={"(b or c)": [self.b]})
+
+        self.a.requires = ["(b or c)"]
+        self.assertEqual(dnfpayload._get_required_packages(query, self.a, self.packages),
+                         [self.b])
+
+        self.a.requires = ["(d if e)"]
+        self.assertEqual(dnfpayload._get_required_packages(query, self.a, self.packages),
+                         self.packages)
+
+
+class DownloadSpaceTestCase(unittest.TestCase):
+    """Test the space required for the download."""
+
+    @patch("pyanaconda.payload.dnfpayload.conf")
+    def pipelined_test(self, conf):
+        """Require the space for the two largest consecutive batches."""
+        conf.payload.pipelined_install = True
+
+        payload = dnfpayload.DNFPayload.__new__(dnfpayload.DNFPayload)
+        payload._base = Mock()
+        payload._get_install_batches = Mock(return_value=[
+            [Mock(downloadsize=100)],
+            [Mock(downloadsize=500), Mock(downloadsize=600)],
+            [Mock(downloadsize=300)],
+        ])
+
+        self.assertEqual(payload._download_space, Size(1400) + Size("150 MB"))
+
+        payload._get_install_batches.return_value = [[Mock(downloadsize=100)]]
+        self.assertEqual(payload._download_space, Size(100) + Size("150 MB"))
+
+
+class RunInParallelTestCase(unittest.TestCase):
+    """Test the bounded pool of repository workers."""
+
+    def results_order_test(self):
+        """The results are in the order of the items."""
+        results = dnfpayload._run_in_parallel(lambda x: x * 2, [3, 1, 2], max_workers=2)
+        self.assertEqual(results, [6, 2, 4])
+
+    def empty_test(self):
+        self.assertEqual(dnfpayload._run_in_parallel(lambda x: x, []), [])
+
+    def error_test(self):
+        """The first error is raised."""
+        def fail(x):
+            raise ValueError(x)
+
+        with self.assertRaises(ValueError):
+            dnfpayload._run_in_parallel(fail, [1, 2])
+
+
+class RepoError(Exception):
+    pass
+
+
+class GatherRepoMetadataTestCase(unittest.TestCase):
+    """Test the loading of the repository metadata."""
+
+    def _create_repo(self, repo_id, error=None):
+        repo = Mock(id=repo_id)
+
+        if error:
+            repo.load.side_effect = RepoError(error)
+
+        return repo
+
+    @patch("pyanaconda.payload.dnfpayload.dnf.exceptions.RepoError", RepoError)
+    def failed_repos_test(self):
+        """Disable the failed repositories in the calling thread."""
+        repos = [
+            self._create_repo("a", "Failed to load a"),
+            self._create_repo("b"),
+            self._create_repo("c", "Failed to load c"),
+        ]
+        threads = []
+
+        payload = dnfpayload.DNFPayload.__new__(dnfpayload.DNFPayload)
+        payload._repos_lock = threading.RLock()
+        payload._base = Mock()
+        payload._base.repos.iter_enabled.return_value = repos
+        payload._prune_metadata_cache = Mock()
+        payload._refreshEnvironmentAddons = Mock()
+        payload.disableRepo = Mock(side_effect=lambda r: threads.append(threading.current_thread()))
+        payload.verbose_errors = []
+
+        payload.gatherRepoMetadata()
+
+        for repo in repos:
+            repo.load.assert_called_once_with()
+
+        self.assertEqual([c[0][0] for c in payload.disableRepo.call_args_list], ["a", "c"])
+        self.assertEqual(threads, [threading.current_thread()] * 2)
+        self.assertEqual(payload.verbose_errors, ["Failed to load a", "Failed to load c"])
+
+
+class PruneMetadataCacheTestCase(unittest.TestCase):
+    """Test the pruning of the repository metadata cache."""
+
+    def prune_metadata_cache_test(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            dirs = ["fedora-2d95c80a1fa0a67d", "updates-0123456789abcdef",
+                    "removed-fedcba9876543210", "removed-repo", "@System"]
+            files = ["fedora.solv", "fedora-filenames.solvx", "updates.solv",
+                     "removed.solv", "removed-filenames.solvx", "@System.solv",
+                     "expired_repos.json", "last_makecache"]
+
+            for name in dirs:
+                os.mkdir(os.path.join(cache_dir, name))
+
+            for name in files:
+                open(os.path.join(cache_dir, name), "w").close()
+
+            payload = dnfpayload.DNFPayload.__new__(dnfpayload.DNFPayload)
+            payload._base = Mock(repos={"fedora": Mock(), "updates": Mock()})
+
+            with patch("pyanaconda.payload.dnfpayload.DNF_CACHE_DIR", cache_dir):
+                payload._prune_metadata_cache()
+
+            self.assertEqual(sorted(os.listdir(cache_dir)), sorted([
+                "fedora-2d95c80a1fa0a67d", "updates-0123456789abcdef", "removed-repo",
+                "@System", "fedora.solv", "fedora-filenames.solvx", "updates.solv",
+                "@System.solv", "expired_repos.json", "last_makecache"
+            ]))
+
+
+class TransactionProgressQueueTestCase(unittest.TestCase):
+    """Test the batched progress messages of the transaction."""
+
+    def batches_test(self):
+        """The messages are sent in batches."""
+        queue_instance = queue.Queue()
+        progress_queue = dnfpayload.TransactionProgressQueue(queue_instance, interval=60)
+        progress_queue.start()
+
+        progress_queue.put(('install', 'a'))
+        progress_queue.put(('log', 'Installed: a'))
+        self.assertTrue(queue_instance.empty())
+
+        progress_queue.flush()
+        self.assertEqual(queue_instance.get_nowait(), [('install', 'a'), ('log', 'Installed: a')])
+
+        # The final messages are sent immediately.
+        progress_queue.put(('verify', 'a'))
+        progress_queue.put(('done', None))
+        self.assertEqual(queue_instance.get_nowait(), [('verify', 'a'), ('done', None)])
+
+        progress_queue.put(('quit', 'DNF quit'))
+        progress_queue.stop()
+        self.assertEqual(queue_instance.get_nowait(), [('quit', 'DNF quit')])
+        self.assertTrue(queue_instance.empty())
+
+    def periodic_flush_test(self):
+        """The messages are sent periodically."""
+        queue_instance = queue.Queue()
+        progress_queue = dnfpayload.TransactionProgressQueue(queue_instance, interval=0.01)
+        progress_queue.start()
+        progress_queue.put(('install', 'a'))
+        self.assertEqual(queue_instance.get(timeout=10), [('install', 'a')])
+        progress_queue.stop()
+
+
+class PackageCacheTestCase(unittest.TestCase):
+    """Test the persistent package cache."""
+
+    def setUp(self):
+        self._cache_dir = tempfile.mkdtemp()
+        self._download_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._cache_dir)
+        shutil.rmtree(self._download_dir)
+
+    def _create_package(self, name, content):
+        path = os.path.join(self._download_dir, name)
+
+        with open(path, "wb") as f:
+            f.write(content)
+
+        return path, hashlib.sha256(content).hexdigest()
+
+    def store_and_restore_test(self):
+        """Store a package and restore it."""
+        cache = PackageCache(self._cache_dir, 1024)
+        path, checksum = self._create_package("a.rpm", b"package a")
+
+        self.assertTrue(cache.store("sha256", checksum, path))
+        os.remove(path)
+
+        self.assertTrue(cache.restore("sha256", checksum, path))
+
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), b"package a")
+
+    def missing_test(self):
+        """Restore a package that is not cached."""
+        cache = PackageCache(self._cache_dir, 1024)
+        path = os.path.join(self._download_dir, "a.rpm")
+
+        self.assertFalse(cache.restore("sha256", "0" * 64, path))
+        self.assertFalse(os.path.exists(path))
+
+    def corrupted_test(self):
+        """Replace a corrupted package."""
+        cache = PackageCache(self._cache_dir, 1024)
+        path, _checksum = self._create_package("a.rpm", b"package a")
+        other_path, other_checksum = self._create_package("b.rpm", b"package b")
+
+        # Store the package with a wrong checksum.
+        self.assertTrue(cache.store("sha256", other_checksum, path))
+        os.remove(path)
+
+        # The package is verified by DNF after it is restored.
+        self.assertTrue(cache.restore("sha256", other_checksum, path))
+
+        # The package downloaded again replaces the corrupted one.
+        self.assertTrue(cache.store("sha256", other_checksum, other_path))
+        os.remove(other_path)
+
+        self.assertTrue(cache.restore("sha256", other_checksum, other_path))
+
+        with open(other_path, "rb") as f:
+            self.assertEqual(f.read(), b"package b")
+
+        self.assertEqual(cache.evict(), 0)
+
+    def evict_test(self):
+        """Remove the least recently used packages."""
+        cache = PackageCache(self._cache_dir, 20)
+        packages = []
+
+        for name in ["a", "b", "c"]:
+            path, checksum = self._create_package(name, name.encode() * 10)
+            os.utime(path, (100, 100))
+            self.assertTrue(cache.store("sha256", checksum, path))
+            os.remove(path)
+            packages.append((path, checksum))
+
+        # Use the packages a and c to make b the least recently used one.
+        for path, checksum in (packages[0], packages[2]):
+            self.assertTrue(cache.restore("sha256", checksum, path))
+            os.remove(path)
+
+        self.assertEqual(cache.evict(), 1)
+
+        for (path, checksum), cached in zip(packages, [True, False, True]):
+            self.assertEqual(cache.restore("sha256", checksum, path), cached)
+
+    def skip_restored_test(self):
+        """Don't store the restored packages that were not downloaded again."""
+        path_a, checksum_a = self._create_package("a.rpm", b"package a")
+        path_b, checksum_b = self._create_package("b.rpm", b"package b")
+
+        payload = dnfpayload.DNFPayload.__new__(dnfpayload.DNFPayload)
+        payload._download_location = self._download_dir
+        payload._package_cache = Mock()
+        payload._package_cache.restore.return_value = True
+
+        packages = []
+        for path, checksum in ((path_a, checksum_a), (path_b, checksum_b)):
+            pkg = Mock()
+            pkg.localPkg.return_value = path
+            pkg.returnIdSum.return_value = ("sha256", checksum)
+            packages.append(pkg)
+
+        restored = payload._restore_from_cache(packages)
+        self.assertEqual(sorted(restored), [path_a, path_b])
+
+        # The package b is downloaded again.
+        os.remove(path_b)
+        self._create_package("b.rpm", b"package b")
+
+        payload._store_to_cache(packages, restored)
+        payload._package_cache.store.assert_called_once_with("sha256", checksum_b, path_b)
+
+
+class LiveImageProgressTestCase(unittest.TestCase):
+    """Test the progress of the live image installation."""
+
+    def parse_rsync_progress_test(self):
+        parse = livepayload._parse_rsync_progress
+        self.assertEqual(parse("1,238,099,968  45%  118.09MB/s    0:00:10 (xfr#12, ir-chk=10/200)"),
+                         1238099968)
+        self.assertEqual(parse("0   0%    0.00kB/s    0:00:00"), 0)
+        self.assertEqual(parse("rsync: failed to set times on \"/mnt/sysimage/tmp\""), None)
+        self.assertEqual(parse(""), None)
+
+    def tar_decompress_option_test(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "image")
+
+            for module, option in ((gzip, "--gzip"), (bz2, "--bzip2"), (lzma, "--xz")):
+                with module.open(path, "wb") as f:
+                    f.write(b"data")
+
+                self.assertEqual(livepayload._get_tar_decompress_option(path), option)
+
+            with open(path, "wb") as f:
+                f.write(b"data")
+
+            self.assertEqual(livepayload._get_tar_decompress_option(path), None)
+
+    def read_chunks_test(self):
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(b"x" * (livepayload.IMAGE_CHUNK_SIZE + 1))
+            f.flush()
+
+            chunks = list(livepayload._read_chunks(f.name))
+            self.assertEqual([len(c) for c in chunks], [livepayload.IMAGE_CHUNK_SIZE, 1])
+
+    def run_with_progress_test(self):
+        payload = livepayload.LiveImagePayload.__new__(livepayload.LiveImagePayload)
+        progress = Mock()
+        script = r"printf '      1,024  50%%  1.00MB/s  0:00:01\r      2,048 100%%  1.00MB/s  0:00:00\n'; " \
+                 r"echo 'rsync: warning'; exit 23"
+
+        with patch("pyanaconda.payload.livepayload.program_log") as program_log:
+            rc = payload._run_with_progress("/bin/sh", ["-c", script],
+                                            livepayload._parse_rsync_progress, progress)
+
+        self.assertEqual(rc, 23)
+        self.assertEqual([c[0][0] for c in progress.update.call_args_list], [1024, 2048])
+        program_log.info.assert_called_once_with("rsync: warning")
+
+    def format_time_test(self):
+        self.assertEqual(livepayload._format_time(5), "0:05")
+        self.assertEqual(livepayload._format_time(125.5), "2:05")
+        self.assertEqual(livepayload._format_time(3725), "1:02:05")
+
+    def progress_test(self):
+        progress = livepayload.InstallProgress(200)
+        self.assertEqual(progress.pct, 0)
+        progress.bytes_copied = 50
+        self.assertEqual(progress.pct, 25)
+        progress.bytes_copied = 300
+        self.assertEqual(progress.pct, 100)
+
+        progress = livepayload.InstallProgress()
+        self.assertEqual(progress.pct, None)
+        self.assertEqual(progress.eta, None)
+
+
+class DownloadedImageChecksumTestCase(unittest.TestCase):
+    """Test the checksum of the downloaded live image."""
+
+    def setUp(self):
+        self._tmp_dir = tempfile.mkdtemp()
+        self._data = b"data of the image" * 1000
+
+    def tearDown(self):
+        shutil.rmtree(self._tmp_dir)
+
+    def _pre_install(self, checksum, headers):
+        payload = livepayload.LiveImageKSPayload.__new__(livepayload.LiveImageKSPayload)
+        payload.data = Mock()
+        payload.data.method.url = "http://example.com/image.tar"
+        payload.data.method.checksum = checksum
+        payload.data.method.noverifyssl = False
+        payload._proxies = {}
+        payload._session = Mock()
+        payload.image_path = os.path.join(self._tmp_dir, "disk.img")
+
+        response = payload._session.get.return_value
+        response.headers = headers
+        response.iter_content.side_effect = lambda size: iter([self._data[:100], self._data[100:]])
+
+        with patch("pyanaconda.payload.livepayload.conf") as conf, \
+                patch("pyanaconda.payload.livepayload.errorHandler") as error_handler, \
+                patch("pyanaconda.payload.livepayload.progressQ"), \
+                patch("pyanaconda.payload.livepayload.DownloadProgress"), \
+                patch.object(payload, "_calculate_image_checksum") as calculate_checksum:
+            conf.payload.stream_tar_image = False
+            error_handler.cb.return_value = ERROR_RAISE
+            try:
+                payload.preInstall()
+            finally:
+                # The checksum is calculated from the downloaded data.
+                calculate_checksum.assert_not_called()
+
+                with open(payload.image_path, "rb") as f:
+                    self.assertEqual(f.read(), self._data)
+
+        return payload
+
+    def checksum_match_test(self):
+        checksum = hashlib.sha256(self._data).hexdigest()
+
+        for headers in ({"content-length": str(len(self._data))}, {}):
+            payload = self._pre_install(checksum.upper(), headers)
+            self.assertEqual(payload._image_checksum, checksum)
+
+    def checksum_mismatch_test(self):
+        checksum = hashlib.sha256(b"other data").hexdigest()
+
+        for headers in ({"content-length": str(len(self._data))}, {}):
+            with self.assertRaises(PayloadInstallError) as cm:
+                self._pre_install(checksum, headers)
+
+            self.assertEqual(str(cm.exception), "Checksum of image does not match")
+
+
+class StreamedTarTestCase(unittest.TestCase):
+    """Test the installation of the streamed tar archive."""
+
+    def _get_payload(self, url="http://example.com/image.tar.xz", checksum=None):
+        payload = livepayload.LiveImageKSPayload.__new__(livepayload.LiveImageKSPayload)
+        payload.data = Mock()
+        payload.data.method.url = url
+        payload.data.method.checksum = checksum
+        payload.data.method.noverifyssl = False
+        payload._proxies = {}
+        payload._session = Mock()
+        return payload
+
+    def _set_response(self, payload, data):
+        response = payload._session.get.return_value
+        response.headers = {"content-length": str(len(data))}
+        response.iter_content.side_effect = lambda size: iter([data[:4], data[4:]])
+
+    def _install(self, payload, rc=0):
+        extracted = []
+
+        def extract_tar(chunks, decompress, progress):
+            extracted.append((b"".join(chunks), decompress))
+            return rc
+
+        with patch.object(payload, "_extract_tar", side_effect=extract_tar), \
+                patch("pyanaconda.payload.livepayload.InstallProgress"):
+            err = payload._install_streamed_tar()
+
+        return err, extracted
+
+    def is_streamed_test(self):
+        with patch("pyanaconda.payload.livepayload.conf") as conf:
+            conf.payload.stream_tar_image = True
+            self.assertTrue(self._get_payload().is_streamed)
+            self.assertTrue(self._get_payload("http://example.com/image.tar.gz").is_streamed)
+            self.assertFalse(self._get_payload("http://example.com/image.img").is_streamed)
+            self.assertFalse(self._get_payload("file:///image.tar.xz").is_streamed)
+
+            conf.payload.stream_tar_image = False
+            self.assertFalse(self._get_payload().is_streamed)
+
+    def decompress_option_test(self):
+        # The compression is detected from the data, not from the url.
+        for compress, option in ((gzip.compress, "--gzip"), (bz2.compress, "--bzip2"),
+                                 (lzma.compress, "--xz"), (lambda data: data, None)):
+            data = compress(b"data of the archive")
+            payload = self._get_payload("http://example.com/image.tar")
+            self._set_response(payload, data)
+
+            err, extracted = self._install(payload)
+            self.assertIsNone(err)
+            self.assertEqual(extracted, [(data, option)])
+
+    def checksum_test(self):
+        data = b"data of the archive"
+        checksum = hashlib.sha256(data).hexdigest()
+
+        payload = self._get_payload(checksum=checksum.upper())
+        self._set_response(payload, data)
+        self.assertEqual(self._install(payload)[0], None)
+
+        payload = self._get_payload(checksum=hashlib.sha256(b"other data").hexdigest())
+        self._set_response(payload, data)
+        self.assertEqual(self._install(payload)[0], "Checksum of image does not match")
+
+    def tar_failure_test(self):
+        payload = self._get_payload()
+        self._set_response(payload, b"data of the archive")
+        self.assertEqual(self._install(payload, rc=2)[0], "tar exited with code 2")
+
+    def http_error_test(self):
+        payload = self._get_payload()
+        error = livepayload.requests.exceptions.HTTPError("404 Client Error")
+        payload._session.get.return_value.raise_for_status.side_effect = error
+
+        err, extracted = self._install(payload)
+        self.assertEqual(err, "404 Client Error")
+        self.assertEqual(extracted, [])
+
+    def download_error_test(self):
+        payload = self._get_payload()
+        response = payload._session.get.return_value
+        response.headers = {}
+
+        def iter_content(size):
+            yield b"data"
+            raise livepayload.requests.exceptions.ConnectionError("Connection reset")
+
+        response.iter_content.side_effect = iter_content
+        err, _extracted = self._install(payload)
+        self.assertEqual(err, "Error downloading liveimg: Connection reset")
+
+    def install_tar_failure_test(self):
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(gzip.compress(b"data of the archive"))
+            f.flush()
+
+            payload = self._get_payload()
+            payload.image_path = f.name
+
+            with patch.object(payload, "_extract_tar", return_value=2) as extract_tar, \
+                    patch("pyanaconda.payload.livepayload.InstallProgress"):
+                self.assertEqual(payload._install_tar(), "tar exited with code 2")
+                self.assertEqual(extract_tar.call_args[0][1], "--gzip")
+
+            with patch.object(payload, "_extract_tar", return_value=0), \
+                    patch("pyanaconda.payload.livepayload.InstallProgress"):
+                self.assertIsNone(payload._install_tar())
+
+
+class OSTreeLocalReposTestCase(unittest.TestCase):
+    """Test the local repositories of the OSTree payload."""
+
+    def setUp(self):
+        self._tmp_dir = tempfile.mkdtemp()
+        self._payload = rpmostreepayload.RPMOSTreePayload.__new__(rpmostreepayload.RPMOSTreePayload)
+        self._payload._local_repo_mounts = []
+
+    def tearDown(self):
+        shutil.rmtree(self._tmp_dir)
+
+    def _create_repo(self, name):
+        path = os.path.join(self._tmp_dir, name)
+        os.makedirs(os.path.join(path, "objects"))
+        return path
+
+    @patch("pyanaconda.payload.rpmostreepayload.conf")
+    def get_local_repos_test(self, conf):
+        repo_a = self._create_repo("a")
+        repo_b = self._create_repo("b")
+        mount_dir = os.path.join(self._tmp_dir, "mount-%d")
+
+        def setup_nfs(mountpoint, server, path, options):
+            if server == "failed":
+                raise rpmostreepayload.PayloadSetupError("mount failed")
+            os.makedirs(os.path.join(mountpoint, "objects"))
+
+        conf.payload.ostree_local_repos = [
+            repo_a, os.path.join(self._tmp_dir, "missing"), "nfs://failed:/repo",
+            "nfs://server:/repo", repo_b
+        ]
+
+        with patch("pyanaconda.payload.rpmostreepayload.OSTREE_REPO_MOUNT_DIR", mount_dir), \
+                patch.object(self._payload, "_setupNFS", side_effect=setup_nfs) as setup:
+            local_repos = self._payload._getLocalRepos()
+
+        self.assertEqual(local_repos, [repo_a, mount_dir % 0, repo_b])
+        self.assertEqual(self._payload._local_repo_mounts, [mount_dir % 0])
+        self.assertEqual([c[0][1:3] for c in setup.call_args_list],
+                         [("failed", "/repo"), ("server", "/repo")])
+
+    @patch("pyanaconda.payload.rpmostreepayload.Variant", lambda t, v: (t, v))
+    @patch("pyanaconda.payload.rpmostreepayload.conf")
+    def pull_options_test(self, conf):
+        local_repos = [self._create_repo("a"), self._create_repo("b")]
+        conf.payload.ostree_local_repos = local_repos
+        conf.payload.ostree_static_deltas = True
+
+        with patch("gi.repository.OSTree") as ostree:
+            ostree.check_version.return_value = True
+            self.assertEqual(self._payload._getPullOptions("fedora/x86_64"), {
+                "refs": ("as", ["fedora/x86_64"]),
+                "localcache-repos": ("as", local_repos),
+            })
+
+            conf.payload.ostree_static_deltas = False
+            self.assertEqual(self._payload._getPullOptions("fedora/x86_64"), {
+                "refs": ("as", ["fedora/x86_64"]),
+                "localcache-repos": ("as", local_repos),
+                "disable-static-deltas": ("b", True),
+            })
+
+            # The local repositories are not supported by old versions of OSTree.
+            ostree.check_version.return_value = False
+            self.assertNotIn("localcache-repos", self._payload._getPullOptions("fedora/x86_64"))
+
+
+class RunForKernelsTestCase(unittest.TestCase):
+    """Test the processing of kernels."""
+
+    def workers_test(self):
+        """The number of workers is limited."""
+        self.assertEqual(get_kernel_workers(1), 1)
+        self.assertLessEqual(get_kernel_workers(1000), os.cpu_count())
+
+    def run_test(self):
+        """Process all kernels."""
+        processed = []
+
+        def process(kernel):
+            processed.append(kernel)
+            return 0
+
+        failed = run_for_kernels(["5.0.1", "5.0.2", "5.0.3"], process)
+        self.assertEqual(failed, [])
+        self.assertEqual(sorted(processed), ["5.0.1", "5.0.2", "5.0.3"])
+
+    def failures_test(self):
+        """Collect the failed kernels."""
+        def process(kernel):
+            if kernel == "5.0.1":
+                return 1
+            if kernel == "5.0.3":
+                raise OSError("failed")
+            return 0
+
+        with patch("pyanaconda.payload.errorHandler") as handler:
+            handler.cb.return_value = ERROR_CONTINUE
+            failed = run_for_kernels(["5.0.1", "5.0.2", "5.0.3"], process, max_workers=1)
+
+        self.assertEqual(failed, ["5.0.1", "5.0.3"])
+        exn = handler.cb.call_args[0][0]
+        self.assertIsInstance(exn, PayloadInstallError)
+        self.assertIn("5.0.1, 5.0.3", str(exn))
+
+        with patch("pyanaconda.payload.errorHandler") as handler:
+            handler.cb.return_value = ERROR_RAISE
+
+            with self.assertRaises(PayloadInstallError):
+                run_for_kernels(["5.0.1", "5.0.2"], process)
+
+    def log_prefix_test(self):
+        """Prefix the messages about programs with the kernel version."""
+        prefixes = {}
+
+        def process(kernel):
+            prefixes[kernel] = util._get_program_log_prefix()
+            return 0
+
+        run_for_kernels(["5.0.1", "5.0.2"], process)
+        self.assertEqual(prefixes, {"5.0.1": "5.0.1: ", "5.0.2": "5.0.2: "})
+        self.assertEqual(util._get_program_log_prefix(), "")
+
+    def empty_test(self):
+        self.assertEqual(run_for_kernels([], None), [])
+
+    @patch("pyanaconda.payload.conf")
+    @patch("pyanaconda.payload.os.path.exists", return_value=False)
+    @patch("pyanaconda.payload.util.execInSysroot")
+    def recreate_initrds_depmod_failure_test(self, exec_in_sysroot, exists, conf):
+        """A failure of depmod is reported like a failure of dracut."""
+        conf.target.is_image = False
+        exec_in_sysroot.side_effect = \
+            lambda cmd, args: 1 if cmd == "depmod" and args[-1] == "5.0.1" else 0
+
+        payload = PackagePayload.__new__(PackagePayload)
+
+        with patch.object(PackagePayload, "kernelVersionList", new_callable=PropertyMock) as kernels, \
+                patch("pyanaconda.payload.errorHandler") as handler:
+            kernels.return_value = ["5.0.1", "5.0.2"]
+            handler.cb.return_value = ERROR_RAISE
+
+            with self.assertRaises(PayloadInstallError) as cm:
+                payload.recreateInitrds()
+
+        self.assertEqual(str(cm.exception), "Processing of the kernels has failed: 5.0.1")
+        dracut_kernels = [c[0][1][-1] for c in exec_in_sysroot.call_args_list if c[0][0] == "dracut"]
+        self.assertEqual(dracut_kernels, ["5.0.2"])
+
+
 class DummyRepo(object):
     def __init__(self):
         self.id = "anaconda"
@@ -0,0 +1,148 @@
+#
+# Copyright (C) 2019  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import os
+import json
+import unittest
+import tempfile
+
+from mock import patch
+
+from pyanaconda.core import util
+from pyanaconda.core.profiling import profile_task, profile_program, write_profile_report, \
+    reset_profile_records, PROFILE_TIMELINE_FILE, PROFILE_TRACE_FILE, PROFILE_TASK, PROFILE_PROGRAM
+
+
+class ProfilingTestCase(unittest.TestCase):
+    """Test the profile of the installation."""
+
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._records_file = os.path.join(self._tmp_dir.name, "profile.jsonl")
+
+        patcher = patch("pyanaconda.core.profiling.PROFILE_RECORDS_FILE", self._records_file)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # The profiling is disabled by default.
+        patcher = patch("pyanaconda.core.profiling.conf")
+        conf = patcher.start()
+        conf.anaconda.profiling = True
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def _load_records(self):
+        with open(self._records_file) as f:
+            return [json.loads(line) for line in f]
+
+    def profile_task_test(self):
+        """Test the profile of a task."""
+        with profile_task("Task A"):
+            sum(range(100000))
+
+        records = self._load_records()
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["name"], "Task A")
+        self.assertEqual(records[0]["category"], PROFILE_TASK)
+        self.assertEqual(records[0]["pid"], os.getpid())
+        self.assertGreaterEqual(records[0]["wall_time"], 0)
+        self.assertGreaterEqual(records[0]["cpu_time"], 0)
+        self.assertGreater(records[0]["max_rss"], 0)
+
+    def profile_failed_task_test(self):
+        """Test the profile of a failed task."""
+        with self.assertRaises(RuntimeError):
+            with profile_task("Task B"):
+                raise RuntimeError()
+
+        records = self._load_records()
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["name"], "Task B")
+
+    def profile_program_test(self):
+        """Test the profile of a program."""
+        rc = util.execWithRedirect("sh", ["-c", "i=0; while [ $i -lt 20000 ]; do i=$((i+1)); done"])
+
+        self.assertEqual(rc, 0)
+        records = self._load_records()
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["category"], PROFILE_PROGRAM)
+        self.assertTrue(records[0]["name"].startswith("sh -c"))
+        self.assertGreater(records[0]["cpu_time"], 0)
+        self.assertGreater(records[0]["max_rss"], 0)
+
+    def profile_failed_program_test(self):
+        """Test the profile of a program killed by a signal."""
+        rc = util.execWithRedirect("sh", ["-c", "kill -9 $$"])
+        self.assertEqual(rc, -9)
+
+        records = self._load_records()
+        self.assertEqual(len(records), 1)
+
+    def reset_profile_records_test(self):
+        """Test the removal of the records of a previous run."""
+        with profile_task("Task E"):
+            pass
+
+        reset_profile_records()
+        self.assertFalse(os.path.exists(self._records_file))
+
+        # Nothing to remove.
+        reset_profile_records()
+
+    @patch("pyanaconda.core.profiling.conf")
+    def profiling_disabled_test(self, conf):
+        """Test the disabled profiling."""
+        conf.anaconda.profiling = False
+
+        with profile_task("Task C"):
+            pass
+
+        self.assertFalse(os.path.exists(self._records_file))
+
+    def write_profile_report_test(self):
+        """Test the profile report."""
+        with profile_program(["true", "--foo"]):
+            pass
+
+        with profile_task("Task D"):
+            pass
+
+        output_dir = os.path.join(self._tmp_dir.name, "var", "log", "anaconda")
+        write_profile_report([output_dir])
+
+        with open(os.path.join(output_dir, PROFILE_TIMELINE_FILE)) as f:
+            timeline = json.load(f)
+
+        names = [r["name"] for r in timeline["records"]]
+        self.assertEqual(names, ["true --foo", "Task D"])
+        self.assertEqual(timeline["records"][0]["category"], PROFILE_PROGRAM)
+
+        with open(os.path.join(output_dir, PROFILE_TRACE_FILE)) as f:
+            trace = json.load(f)
+
+        events = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+        self.assertEqual([e["name"] for e in events], ["true --foo", "Task D"])
+        self.assertEqual(events[0]["tid"], events[1]["tid"])
+
+        metadata = [e for e in trace["traceEvents"] if e["ph"] == "M"]
+        self.assertEqual(len(metadata), 1)
+
+        mode = os.stat(os.path.join(output_dir, PROFILE_TRACE_FILE)).st_mode
+        self.assertEqual(mode & 0o777, 0o600)
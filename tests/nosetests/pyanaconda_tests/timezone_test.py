@@ -36,6 +36,30 @@ class TimezonesListings(unittest.TestCase):
             for zone in zones:
                 self.assertTrue(timezone.is_valid_timezone(region + "/" + zone))
 
+    def cached_timezones_test(self):
+        """Check if the timezones are created only once."""
+        regions = timezone.get_all_regions_and_timezones()
+        self.assertIn("Europe", regions)
+        self.assertIn("Etc", regions)
+        self.assertEqual(regions["Etc"], frozenset(timezone.ETC_ZONES))
+
+        # The returned dictionary can be modified.
+        del regions["Europe"]
+        regions = timezone.get_all_regions_and_timezones()
+        self.assertIn("Europe", regions)
+
+        # The timezones are shared.
+        self.assertIs(regions["Europe"], timezone.get_all_regions_and_timezones()["Europe"])
+
+    def valid_timezones_test(self):
+        """Check the validation of timezones."""
+        self.assertTrue(timezone.is_valid_timezone("Europe/Prague"))
+        self.assertTrue(timezone.is_valid_timezone("Etc/GMT+1"))
+        self.assertTrue(timezone.is_valid_timezone("Etc/UTC"))
+        self.assertFalse(timezone.is_valid_timezone("Europe/Nonexistent"))
+        self.assertFalse(timezone.is_valid_timezone("GMT+1"))
+        self.assertFalse(timezone.is_valid_timezone("Etc/UCT"))
+
 class TerritoryTimezones(unittest.TestCase):
     def string_valid_territory_zone_test(self):
         """Check if the returned value is string for a valid territory."""
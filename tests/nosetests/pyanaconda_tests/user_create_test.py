@@ -353,3 +353,65 @@ class UserCreateTest(unittest.TestCase):
         grp_fields = self._readFields("/etc/group", "test_group")
         self.assertIsNotNone(grp_fields)
         self.assertEqual(grp_fields[2], "1047")
+
+    def create_groups_test(self):
+        """Create groups at once."""
+        with open(self.tmpdir + "/etc/group", "w") as f:
+            f.write("existing:x:47:\n")
+
+        errors = self.users.createGroups([
+            ("test1", {}),
+            ("test2", {"gid": 5000}),
+            ("existing", {}),
+            ("test3", {"gid": 47}),
+            ("test4", {"gid": 5000}),
+            ("test2", {}),
+        ], root=self.tmpdir)
+
+        self.assertEqual(sorted(str(e) for e in errors), [
+            "GID 47 already exists",
+            "GID 5000 already exists",
+            "Group existing already exists",
+            "Group test2 already exists",
+        ])
+
+        self.assertIsNotNone(self._readFields("/etc/group", "test1"))
+        self.assertEqual(self._readFields("/etc/group", "test2")[2], "5000")
+        self.assertIsNone(self._readFields("/etc/group", "test3"))
+        self.assertIsNone(self._readFields("/etc/group", "test4"))
+
+    def create_users_test(self):
+        """Create users at once."""
+        with open(self.tmpdir + "/etc/passwd", "w") as f:
+            f.write("existing:x:1000:1000::/:/bin/sh\n")
+
+        errors = self.users.createUsers([
+            ("test_user1", {"password": "password", "groups": ["test1", "test2(5001)"]}),
+            ("test_user2", {"password": "", "lock": True, "groups": ["test1"]}),
+            ("test_user3", {"uid": 1000}),
+            ("existing", {}),
+            ("test_user4", {"uid": 1047}),
+            ("test_user5", {"uid": 1047}),
+            ("test_user1", {}),
+        ], root=self.tmpdir)
+
+        self.assertEqual(sorted(str(e) for e in errors), [
+            "UID 1000 already exists",
+            "UID 1047 already exists",
+            "User existing already exists",
+            "User test_user1 already exists",
+        ])
+
+        shadow_fields = self._readFields("/etc/shadow", "test_user1")
+        self.assertEqual(crypt.crypt("password", shadow_fields[1]), shadow_fields[1])
+        self.assertEqual(shadow_fields[2], "")
+
+        shadow_fields = self._readFields("/etc/shadow", "test_user2")
+        self.assertEqual("!", shadow_fields[1])
+
+        self.assertEqual(self._readFields("/etc/passwd", "test_user4")[2], "1047")
+        self.assertIsNone(self._readFields("/etc/passwd", "test_user3"))
+        self.assertIsNone(self._readFields("/etc/passwd", "test_user5"))
+
+        self.assertEqual(self._readFields("/etc/group", "test1")[3], "test_user1,test_user2")
+        self.assertEqual(self._readFields("/etc/group", "test2")[2], "5001")